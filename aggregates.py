@@ -0,0 +1,229 @@
+"""Incrementally maintained aggregates behind the Results dashboard.
+
+Responses are folded into one bucket per (CSC, day). Each bucket keeps the
+response count, latest timestamp, per-rating count/sum/sum-of-squares plus a
+value histogram (the sliders are discrete, so quartiles stay exact), and
+option counts for the skills and audit questions. Dashboard filters are
+answered by merging the matching buckets, so their cost scales with the
+number of buckets rather than the number of responses.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import math
+import threading
+
+from repository import SurveyRepository, get_repository
+from survey_schema import get_schema
+
+BucketKey = Tuple[Optional[str], Optional[str]]  # (CSC, "YYYY-MM-DD")
+
+NO_RESPONSE = "No Response"
+
+
+def _planned(plan: str, columns: Sequence[str]) -> List[str]:
+    """Schema columns aggregated with ``plan`` that are present in ``columns``, in survey order."""
+    present = set(columns)
+    return [c for c in get_schema().plans[plan] if c in present]
+
+
+def rating_columns(columns: Sequence[str]) -> List[str]:
+    return _planned("rating", columns)
+
+
+def skill_columns(columns: Sequence[str]) -> List[str]:
+    return _planned("options", columns)
+
+
+def audit_columns(columns: Sequence[str]) -> List[str]:
+    """The Yes/No audit flag columns (details live in ``storage.AUDIT_COLUMNS``)."""
+    return _planned("flag", columns)
+
+
+def audit_answers(series: Any) -> Any:
+    """Yes/No audit flags, with blanks reported as "No Response"."""
+    text = series.astype(object).fillna("").astype(str).str.strip()
+    return text.where(text != "", NO_RESPONSE)
+
+
+@dataclass
+class Bucket:
+    count: int = 0
+    latest: Any = None
+    n: Counter = field(default_factory=Counter)
+    sums: Counter = field(default_factory=Counter)
+    sumsq: Counter = field(default_factory=Counter)
+    hist: Dict[str, Counter] = field(default_factory=dict)
+    options: Dict[str, Counter] = field(default_factory=dict)
+
+    def merge(self, other: "Bucket") -> "Bucket":
+        self.count += other.count
+        if other.latest is not None and (self.latest is None or other.latest > self.latest):
+            self.latest = other.latest
+        self.n.update(other.n)
+        self.sums.update(other.sums)
+        self.sumsq.update(other.sumsq)
+        for col, counts in other.hist.items():
+            self.hist.setdefault(col, Counter()).update(counts)
+        for col, counts in other.options.items():
+            self.options.setdefault(col, Counter()).update(counts)
+        return self
+
+    # -------------------------------------------------------------- ratings
+    def mean(self, column: str) -> float:
+        n = self.n[column]
+        return self.sums[column] / n if n else math.nan
+
+    def std(self, column: str) -> float:
+        """Sample standard deviation (ddof=1), matching pandas."""
+        n = self.n[column]
+        if n < 2:
+            return math.nan
+        var = (self.sumsq[column] - self.sums[column] ** 2 / n) / (n - 1)
+        return math.sqrt(max(var, 0.0))
+
+    def quantile(self, column: str, q: float) -> float:
+        """Linear-interpolated quantile from the value histogram (pandas' default)."""
+        values = sorted(self.hist.get(column, Counter()).items())
+        total = sum(c for _, c in values)
+        if not total:
+            return math.nan
+        pos = q * (total - 1)
+        lo, hi = math.floor(pos), math.ceil(pos)
+        at_lo = at_hi = None
+        seen = 0
+        for value, c in values:
+            seen += c
+            if at_lo is None and lo < seen:
+                at_lo = value
+            if hi < seen:
+                at_hi = value
+                break
+        return at_lo + (at_hi - at_lo) * (pos - lo)
+
+    def describe(self, columns: Sequence[str]) -> Any:
+        """Equivalent of ``DataFrame.describe()`` for rating columns."""
+        import pandas as pd
+
+        stats: Dict[str, List[float]] = {}
+        for col in columns:
+            values = self.hist.get(col, Counter())
+            stats[col] = [
+                float(self.n[col]),
+                self.mean(col),
+                self.std(col),
+                float(min(values)) if values else math.nan,
+                self.quantile(col, 0.25),
+                self.quantile(col, 0.5),
+                self.quantile(col, 0.75),
+                float(max(values)) if values else math.nan,
+            ]
+        return pd.DataFrame(stats, index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"])
+
+    # -------------------------------------------------------------- options
+    def value_counts(self, column: str) -> List[Tuple[str, int]]:
+        """(option, count) pairs, most common first."""
+        return [(k, v) for k, v in self.options.get(column, Counter()).most_common() if v]
+
+
+class AggregateStore:
+    """(CSC, day) buckets kept in step with the repository."""
+
+    def __init__(self, repository: Optional[SurveyRepository] = None) -> None:
+        self.repository = repository or get_repository()
+        self.buckets: Dict[BucketKey, Bucket] = {}
+        self.columns: List[str] = []
+        self._cursor: Any = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Fold rows stored since the last refresh into the buckets."""
+        with self._lock:
+            rows, cursor, reset = self.repository.rows_since(self._cursor)
+            if reset:
+                self.buckets = {}
+            self._absorb(rows)
+            self._cursor = cursor
+
+    def _absorb(self, df: Any) -> None:
+        import pandas as pd
+
+        self.columns = list(df.columns) if len(df.columns) else self.columns
+        if df.empty:
+            return
+        if "CSC" in df.columns:
+            csc = df["CSC"].astype(object).where(df["CSC"].notna(), None)
+        else:
+            csc = pd.Series(None, index=df.index)
+        stamps = df["Timestamp"] if "Timestamp" in df.columns else pd.Series(pd.NaT, index=df.index)
+        day = stamps.dt.strftime("%Y-%m-%d")
+        keys = pd.Series(list(zip(csc, day.where(day.notna(), None))), index=df.index)
+        groups = df.groupby(keys, sort=False)
+
+        for key, size in groups.size().items():
+            bucket = self.buckets.setdefault(key, Bucket())
+            bucket.count += int(size)
+        for key, latest in stamps.groupby(keys, sort=False).max().items():
+            bucket = self.buckets[key]
+            if pd.notna(latest) and (bucket.latest is None or latest > bucket.latest):
+                bucket.latest = latest
+
+        for col in rating_columns(df.columns):
+            values = pd.to_numeric(df[col], errors="coerce")
+            for (key, value), c in values.groupby(keys, sort=False).value_counts().items():
+                bucket = self.buckets[key]
+                value = float(value)
+                bucket.hist.setdefault(col, Counter())[value] += int(c)
+                bucket.n[col] += int(c)
+                bucket.sums[col] += value * c
+                bucket.sumsq[col] += value * value * c
+
+        categorical = [(col, df[col].astype(object)) for col in skill_columns(df.columns)]
+        categorical += [(col, audit_answers(df[col])) for col in audit_columns(df.columns)]
+        for col, series in categorical:
+            for (key, option), c in series.groupby(keys, sort=False).value_counts().items():
+                self.buckets[key].options.setdefault(col, Counter())[option] += int(c)
+
+    def select(
+        self,
+        cscs: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> Tuple[Bucket, Dict[str, int]]:
+        """Merge the buckets matching the filters (same semantics as ``repository.query``).
+
+        Returns the merged bucket and per-CSC response counts.
+        """
+        wanted = set(cscs) if cscs else None
+        lo = start.isoformat() if start else None
+        hi = end.isoformat() if end else None
+        total = Bucket()
+        per_csc: Counter = Counter()
+        with self._lock:
+            for (csc, day), bucket in self.buckets.items():
+                if wanted is not None and csc not in wanted:
+                    continue
+                if (lo or hi) and day is None:
+                    continue
+                if (lo and day < lo) or (hi and day > hi):
+                    continue
+                total.merge(bucket)
+                if csc is not None:
+                    per_csc[csc] += bucket.count
+        return total, dict(per_csc.most_common())
+
+
+_store: Optional[AggregateStore] = None
+_store_lock = threading.Lock()
+
+
+def get_aggregates() -> AggregateStore:
+    """Return the process-wide aggregate store, brought up to date."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AggregateStore()
+    _store.refresh()
+    return _store
@@ -0,0 +1,228 @@
+"""Process-wide cache of parsed survey CSV files.
+
+Entries are keyed on file identity (inode, size, mtime). When a file has only
+grown since it was cached, just the new tail bytes are parsed and appended to
+the cached frame; a full reparse happens only after truncation or a rewrite.
+
+Cached frames use a compact, schema-aware representation: categoricals for
+closed-vocabulary answers, small nullable integers for the sliders and
+datetime64 for ``Timestamp``. Open-text columns (``storage.TEXT_COLUMNS``) are
+kept out of the main frame and only parsed when a view asks for them.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+import io
+import os
+import threading
+
+import storage
+from survey_schema import get_schema
+
+# Bytes just before the cached end that must be unchanged for a tail read
+_PROBE_BYTES = 256
+
+# Column -> in-memory dtype, from the compiled survey schema
+_DTYPES = get_schema().dtypes
+
+CORE = "core"
+TEXT = "text"
+
+
+@dataclass
+class _Entry:
+    inode: int
+    size: int
+    mtime_ns: int
+    header: bytes
+    probe: bytes
+    frame: Any
+    version: int = 0
+    generation: int = 0
+
+
+_entries: Dict[Tuple[str, str], _Entry] = {}
+_lock = threading.Lock()
+_generations = 0
+# path -> (generation, rows, bytes) of the file parsed with default pandas dtypes
+_baselines: Dict[str, Tuple[int, int, int]] = {}
+
+
+def compact(df: Any) -> Any:
+    """Convert a default-dtype survey frame to the compact representation in place."""
+    import pandas as pd
+
+    for col, dtype in _DTYPES.items():
+        if col not in df.columns or dtype == "object":
+            continue
+        if dtype.startswith("datetime64"):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        elif dtype == "Int8":
+            df[col] = pd.to_numeric(df[col], errors="coerce").round().astype(dtype)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def _parse(data: bytes, part: str) -> Any:
+    import pandas as pd
+
+    text = set(storage.TEXT_COLUMNS)
+    if part == TEXT:
+        return pd.read_csv(io.BytesIO(data), usecols=lambda c: c in text, dtype=object)
+    df = pd.read_csv(io.BytesIO(data), usecols=lambda c: c not in text, dtype={
+        c: "category" for c in storage.CATEGORICAL_COLUMNS
+    })
+    return compact(df)
+
+
+def _concat(head: Any, tail: Any) -> Any:
+    """Row-wise concat that keeps categoricals categorical (unioning categories)."""
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+
+    if tail.empty:
+        return head
+    out = pd.concat([head, tail], ignore_index=True)
+    for col in head.columns:
+        if isinstance(head[col].dtype, pd.CategoricalDtype) and col in tail.columns:
+            out[col] = pd.Categorical(union_categoricals([head[col], tail[col].astype("category")], ignore_order=True))
+    return out
+
+
+def _full_load(path: str, part: str) -> _Entry:
+    # Same-process writers append whole rows under this lock
+    with storage._write_lock:
+        with open(path, "rb") as fh:
+            st_file = os.fstat(fh.fileno())
+            data = fh.read()
+    header = data.split(b"\n", 1)[0] + b"\n"
+    return _Entry(
+        inode=st_file.st_ino,
+        size=len(data),
+        mtime_ns=st_file.st_mtime_ns,
+        header=header,
+        probe=data[max(0, len(data) - _PROBE_BYTES):],
+        frame=_parse(data, part),
+    )
+
+
+def _extend(path: str, entry: _Entry, part: str) -> Optional[_Entry]:
+    """Parse only the bytes appended since ``entry``; None if the file was rewritten."""
+    with storage._write_lock:
+        with open(path, "rb") as fh:
+            st_file = os.fstat(fh.fileno())
+            if st_file.st_ino != entry.inode or st_file.st_size < entry.size:
+                return None
+            fh.seek(max(0, entry.size - len(entry.probe)))
+            if fh.read(len(entry.probe)) != entry.probe:
+                return None
+            tail = fh.read()
+    frame, bumped = entry.frame, entry.version
+    if tail.strip():
+        frame = _concat(entry.frame, _parse(entry.header + tail, part))
+        bumped += 1
+    probe = (entry.probe + tail)[-_PROBE_BYTES:]
+    return _Entry(
+        st_file.st_ino, entry.size + len(tail), st_file.st_mtime_ns, entry.header, probe, frame, bumped, entry.generation
+    )
+
+
+def _current(path: str, part: str = CORE) -> _Entry:
+    global _generations
+    st_file = os.stat(path)
+    with _lock:
+        entry = _entries.get((path, part))
+        if entry is not None and (entry.inode, entry.size, entry.mtime_ns) == (
+            st_file.st_ino, st_file.st_size, st_file.st_mtime_ns
+        ):
+            return entry
+        updated = _extend(path, entry, part) if entry is not None else None
+        if updated is None:
+            updated = _full_load(path, part)
+            updated.version = entry.version + 1 if entry is not None else 0
+            _generations += 1
+            updated.generation = _generations
+        _entries[(path, part)] = updated
+        return updated
+
+
+def load(path: str = storage.CSV_FILE) -> Any:
+    """Return the compact dataset (without open-text columns) for ``path``.
+
+    The returned frame is shared between sessions and must not be mutated.
+    """
+    return _current(path).frame
+
+
+def load_text(path: str = storage.CSV_FILE) -> Any:
+    """Return the open-text columns for ``path``, row-aligned with ``load``."""
+    return _current(path, TEXT).frame
+
+
+def load_full(path: str = storage.CSV_FILE) -> Any:
+    """Compact columns plus open text, in the file's column order."""
+    import pandas as pd
+
+    core = load(path)
+    text = load_text(path)
+    order = [c for c in storage.read_header(path) if c in core.columns or c in text.columns]
+    return pd.concat([core, text], axis=1)[order]
+
+
+def snapshot(path: str = storage.CSV_FILE) -> Tuple[int, Any]:
+    """Return (generation, frame). Within one generation the frame only ever grows
+    at the end; a new generation means it was reparsed from scratch."""
+    entry = _current(path)
+    return entry.generation, entry.frame
+
+
+def version(path: str = storage.CSV_FILE) -> int:
+    """Monotonic version of the cached dataset; bumps whenever its contents change."""
+    with _lock:
+        entry = _entries.get((path, CORE))
+        return entry.version if entry is not None else -1
+
+
+def _default_footprint(path: str, core: Optional[_Entry]) -> int:
+    """Memory use of ``path`` parsed with default dtypes. The file is parsed once
+    per cache generation; rows appended since then are extrapolated per row."""
+    import pandas as pd
+
+    generation = core.generation if core is not None else 0
+    with _lock:
+        cached = _baselines.get(path)
+    if cached is None or cached[0] != generation:
+        baseline = pd.read_csv(path)
+        if "Timestamp" in baseline.columns:
+            baseline["Timestamp"] = pd.to_datetime(baseline["Timestamp"], errors="coerce")
+        cached = (generation, len(baseline), int(baseline.memory_usage(deep=True).sum()))
+        with _lock:
+            _baselines[path] = cached
+    _, rows, size = cached
+    current = len(core.frame) if core is not None else rows
+    return size * current // rows if rows and current > rows else size
+
+
+def memory_footprint(path: str = storage.CSV_FILE) -> Dict[str, int]:
+    """Deep memory use in bytes: the compact frame, its open-text columns if
+    loaded, and an estimate of the same file parsed with default pandas dtypes."""
+    with _lock:
+        core = _entries.get((path, CORE))
+        text = _entries.get((path, TEXT))
+    return {
+        "compact": int(core.frame.memory_usage(deep=True).sum()) if core else 0,
+        "text": int(text.frame.memory_usage(deep=True).sum()) if text else 0,
+        "default": _default_footprint(path, core),
+    }
+
+
+def invalidate(path: Optional[str] = None) -> None:
+    with _lock:
+        if path is None:
+            _entries.clear()
+            _baselines.clear()
+        else:
+            for key in [k for k in _entries if k[0] == path]:
+                _entries.pop(key, None)
+            _baselines.pop(path, None)
@@ -0,0 +1,183 @@
+"""On-demand download artifacts for the Results page.
+
+Filtered CSV/Excel exports are only serialized when someone asks for one.
+Finished artifacts are kept in the process-wide ``shared_cache`` under a
+hash of (dataset version, filters, format), so they count towards its memory
+budget and are evicted least-recently-used. Exports larger than
+``SURVEY_EXPORT_BACKGROUND_ROWS`` rows are built by a background worker that
+reports its progress, so the page never blocks on serialization.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional, Sequence
+import hashlib
+import io
+import json
+import queue
+import threading
+
+from shared_cache import SharedCache, get_shared_cache
+from utils import _excel_value, _get_secret
+
+SHEET_NAME = "responses"
+
+# format -> (label, file extension, MIME type)
+FORMATS: Dict[str, tuple] = {
+    "csv": ("CSV", "csv", "text/csv"),
+    "xlsx": ("Excel", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+# Rows serialized between progress updates
+_CHUNK_ROWS = 500
+
+
+def export_key(
+    version: str,
+    fmt: str,
+    cscs: Optional[Sequence[str]] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> str:
+    """Cache key for an export of the filtered dataset at ``version``."""
+    state = [version, fmt, sorted(cscs or []), start.isoformat() if start else None, end.isoformat() if end else None]
+    return hashlib.sha256(json.dumps(state).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class Artifact:
+    fmt: str
+    data: bytes
+    rows: int
+    created: datetime = field(default_factory=datetime.now)
+
+    @property
+    def file_name(self) -> str:
+        return f"survey_results_filtered_{self.created.strftime('%Y%m%d_%H%M%S')}.{FORMATS[self.fmt][1]}"
+
+
+@dataclass
+class ExportJob:
+    key: str
+    fmt: str
+    rows: int
+    progress: float = 0.0
+    error: Optional[str] = None
+    result: Optional[Artifact] = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+def _write_csv(df: Any, on_progress: Callable[[float], None]) -> bytes:
+    buffer = io.StringIO()
+    total = len(df)
+    for i in range(0, max(total, 1), _CHUNK_ROWS):
+        df.iloc[i:i + _CHUNK_ROWS].to_csv(buffer, index=False, header=i == 0)
+        on_progress(min(i + _CHUNK_ROWS, total) / total if total else 1.0)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _write_xlsx(df: Any, on_progress: Callable[[float], None]) -> bytes:
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(SHEET_NAME)
+    ws.append([str(c) for c in df.columns])
+    total = len(df)
+    for i in range(0, total, _CHUNK_ROWS):
+        chunk = df.iloc[i:i + _CHUNK_ROWS].astype(object)
+        for row in chunk.where(chunk.notna(), None).itertuples(index=False, name=None):
+            ws.append([_excel_value(v) for v in row])
+        # Leave the last few percent for zipping the workbook up
+        on_progress(0.95 * min(i + _CHUNK_ROWS, total) / total)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    on_progress(1.0)
+    return buffer.getvalue()
+
+
+_WRITERS: Dict[str, Callable[[Any, Callable[[float], None]], bytes]] = {"csv": _write_csv, "xlsx": _write_xlsx}
+
+
+class ExportManager:
+    """Finished exports (kept in the shared cache) plus the worker that builds large ones."""
+
+    def __init__(self, cache: Optional[SharedCache] = None, background_rows: int = 5000) -> None:
+        self.cache = cache or get_shared_cache()
+        self.background_rows = background_rows
+        self._jobs: Dict[str, ExportJob] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------------------------------------------------------------- cache
+    def get(self, key: str) -> Optional[Artifact]:
+        return self.cache.get(("export", key))
+
+    def _store(self, key: str, artifact: Artifact) -> None:
+        self.cache.put(("export", key), artifact)
+
+    # --------------------------------------------------------------- builds
+    def build(self, key: str, df: Any, fmt: str) -> Artifact:
+        """Serialize ``df`` right away and cache the result."""
+        artifact = Artifact(fmt, _WRITERS[fmt](df, lambda _: None), len(df))
+        self._store(key, artifact)
+        return artifact
+
+    def job(self, key: str) -> Optional[ExportJob]:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def submit(self, key: str, df: Any, fmt: str) -> ExportJob:
+        """Queue ``df`` for background serialization (deduplicated by ``key``)."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or (job.done.is_set() and job.error):
+                job = ExportJob(key, fmt, len(df))
+                self._jobs[key] = job
+                self._queue.put((job, df))
+        self.start()
+        return job
+
+    def _run(self) -> None:
+        while True:
+            job, df = self._queue.get()
+            try:
+                def on_progress(value: float) -> None:
+                    job.progress = value
+
+                artifact = Artifact(job.fmt, _WRITERS[job.fmt](df, on_progress), len(df))
+                self._store(job.key, artifact)
+                job.result = artifact
+                with self._lock:
+                    self._jobs.pop(job.key, None)
+            except Exception as e:  # noqa: BLE001
+                print("Export failed:", e)
+                job.error = str(e)
+            finally:
+                job.done.set()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="export-worker", daemon=True)
+                self._thread.start()
+
+
+_manager: Optional[ExportManager] = None
+_manager_lock = threading.Lock()
+
+
+def _int_setting(name: str, default: int) -> int:
+    try:
+        return int(float(_get_secret(name, str(default)) or default))
+    except ValueError:
+        return default
+
+
+def get_exports() -> ExportManager:
+    """Return the process-wide export manager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ExportManager(background_rows=_int_setting("SURVEY_EXPORT_BACKGROUND_ROWS", 5000))
+        return _manager
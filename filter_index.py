@@ -0,0 +1,174 @@
+"""Filter index over the cached dataset for the dashboard's CSC/date filters.
+
+Rows are kept in timestamp order (as positions into the cached frame), so a
+date range is two binary searches. Each CSC keeps the sorted list of its
+positions in that order, i.e. a sparse bitmap; a multi-select filter
+intersects the date slice with those lists and merges them. The work done per
+query therefore scales with the number of matching rows, not the dataset.
+
+Indexes follow ``dataset_cache``: appended rows extend the index and a
+rewritten file (or rows arriving out of timestamp order) rebuilds it.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import threading
+
+import dataset_cache
+
+
+@dataclass
+class FilterIndex:
+    generation: int = -1
+    rows: int = 0
+    # Frame positions of rows with a timestamp, ordered by timestamp
+    order: Any = None
+    # Their timestamps (int64 nanoseconds), sorted
+    stamps: Any = None
+    # Frame positions of rows without a usable timestamp
+    undated: Any = None
+    # CSC -> sorted indexes into ``order`` (dated rows) and positions of undated rows
+    by_csc: Dict[Any, Any] = field(default_factory=dict)
+    undated_by_csc: Dict[Any, Any] = field(default_factory=dict)
+    # True when the file is already in timestamp order with no undated rows
+    identity: bool = False
+
+
+def _columns(frame: Any, start: int) -> Tuple[Any, Any, Any]:
+    import numpy as np
+    import pandas as pd
+
+    part = frame.iloc[start:]
+    if "Timestamp" in part.columns:
+        stamps = part["Timestamp"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        dated = part["Timestamp"].notna().to_numpy()
+    else:
+        stamps = np.zeros(len(part), dtype=np.int64)
+        dated = np.zeros(len(part), dtype=bool)
+    csc = part["CSC"].astype(object).to_numpy() if "CSC" in part.columns else np.full(len(part), None, dtype=object)
+    csc = np.where(pd.isna(csc), None, csc)
+    return stamps, dated, csc
+
+
+def _group(keys: Any, values: Any) -> Dict[Any, Any]:
+    """Map each distinct key to the (already ordered) values where it occurs."""
+    import numpy as np
+    import pandas as pd
+
+    out: Dict[Any, Any] = {}
+    if len(keys):
+        for key, idx in pd.Series(np.arange(len(keys))).groupby(pd.Series(keys, dtype=object), dropna=False, sort=False):
+            out[None if pd.isna(key) else key] = values[idx.to_numpy()]
+    return out
+
+
+def _merged(base: Dict[Any, Any], extra: Dict[Any, Any]) -> Dict[Any, Any]:
+    import numpy as np
+
+    out = dict(base)
+    for key, values in extra.items():
+        out[key] = np.concatenate([out[key], values]) if key in out else values
+    return out
+
+
+def build(frame: Any, generation: int) -> FilterIndex:
+    import numpy as np
+
+    stamps, dated, csc = _columns(frame, 0)
+    positions = np.arange(len(frame))
+    order = positions[dated][np.argsort(stamps[dated], kind="stable")]
+    undated = positions[~dated]
+    return FilterIndex(
+        generation=generation,
+        rows=len(frame),
+        order=order,
+        stamps=stamps[order],
+        undated=undated,
+        by_csc=_group(csc[order], np.arange(len(order))),
+        undated_by_csc=_group(csc[undated], undated),
+        identity=len(undated) == 0 and bool((order == positions).all()),
+    )
+
+
+def extend(index: FilterIndex, frame: Any) -> Optional[FilterIndex]:
+    """A new index that also covers rows appended since ``index`` was built.
+
+    Returns None if the new rows break timestamp order (the caller rebuilds).
+    """
+    import numpy as np
+
+    stamps, dated, csc = _columns(frame, index.rows)
+    new_positions = np.arange(index.rows, len(frame))
+    new_stamps = stamps[dated]
+    if len(new_stamps) and (
+        bool((np.diff(new_stamps) < 0).any()) or (len(index.stamps) and new_stamps[0] < index.stamps[-1])
+    ):
+        return None
+    base = len(index.order)
+    return FilterIndex(
+        generation=index.generation,
+        rows=len(frame),
+        order=np.concatenate([index.order, new_positions[dated]]),
+        stamps=np.concatenate([index.stamps, new_stamps]),
+        undated=np.concatenate([index.undated, new_positions[~dated]]),
+        by_csc=_merged(index.by_csc, _group(csc[dated], np.arange(base, base + len(new_stamps)))),
+        undated_by_csc=_merged(index.undated_by_csc, _group(csc[~dated], new_positions[~dated])),
+        identity=index.identity and bool(dated.all()),
+    )
+
+
+def select(index: FilterIndex, cscs: Optional[Sequence[Any]], lo: Any = None, hi: Any = None) -> Any:
+    """Frame positions (timestamp order) matching the filters.
+
+    ``lo``/``hi`` are a half-open [lo, hi) timestamp range; undated rows only
+    match when neither bound is given. An empty ``cscs`` means every CSC.
+    Returns a ``slice`` when the match is one contiguous run of the frame.
+    """
+    import numpy as np
+    import pandas as pd
+
+    start = int(np.searchsorted(index.stamps, pd.Timestamp(lo).value, "left")) if lo is not None else 0
+    stop = int(np.searchsorted(index.stamps, pd.Timestamp(hi).value, "left")) if hi is not None else len(index.stamps)
+    dated_only = lo is not None or hi is not None
+    wanted = [c for c in (cscs or []) if c in index.by_csc or c in index.undated_by_csc]
+    everything = not cscs or set(index.by_csc) | set(index.undated_by_csc) <= set(cscs)
+
+    if everything:
+        if index.identity:
+            return slice(start, stop)
+        picked = index.order[start:stop]
+        if not dated_only:
+            picked = np.concatenate([picked, index.undated])
+        return picked
+
+    parts: List[Any] = []
+    for csc in wanted:
+        positions = index.by_csc.get(csc)
+        if positions is not None:
+            parts.append(positions[np.searchsorted(positions, start):np.searchsorted(positions, stop)])
+    picked = index.order[np.sort(np.concatenate(parts))] if parts else np.empty(0, dtype=np.int64)
+    if not dated_only:
+        extra = [index.undated_by_csc[c] for c in wanted if c in index.undated_by_csc]
+        if extra:
+            picked = np.concatenate([picked, *extra])
+    return picked
+
+
+_indexes: Dict[str, FilterIndex] = {}
+_lock = threading.Lock()
+
+
+def for_path(path: str) -> Tuple[FilterIndex, Any]:
+    """Return (index, core frame) for the cached dataset at ``path``, kept in step with it."""
+    generation, frame = dataset_cache.snapshot(path)
+    with _lock:
+        index = _indexes.get(path)
+        if index is not None and index.generation == generation and index.rows <= len(frame):
+            if index.rows < len(frame):
+                index = extend(index, frame)
+        else:
+            index = None
+        if index is None:
+            index = build(frame, generation)
+        _indexes[path] = index
+        return index, frame
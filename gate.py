@@ -0,0 +1,188 @@
+"""Access gate shared by every page: kill switch, time window, event code and signed links.
+
+Gate settings are parsed once per process and re-parsed only when one of the
+raw values in secrets/environment changes. Attendees can also arrive through a
+signed link (``?t=<token>``, e.g. from the QR code): the token carries its own
+expiry and an HMAC over it, so checking it needs no storage lookup.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from zoneinfo import ZoneInfo
+import base64
+import hashlib
+import hmac
+import threading
+import time
+
+from utils import _get_secret
+
+MESSAGES = {
+    "closed": "🚫 This app is no longer available.",
+    "not_now": "⏳ This survey isn’t open right now.",
+    "prompt": "🔑 Enter Event Code",
+    "bad_code": "That code didn’t work. Please try again or ask the host.",
+    "bad_link": "This link is expired or invalid.",
+}
+
+TZ_NAME = "America/New_York"
+LINK_PARAM = "t"
+_SETTINGS = (
+    "SURVEY_OPEN",
+    "SURVEY_PASS",
+    "SURVEY_START",
+    "SURVEY_END",
+    "SURVEY_LINK_SECRET",
+    "SURVEY_LINK_TTL_HOURS",
+    "SURVEY_PUBLIC_URL",
+) + tuple(f"SURVEY_MESSAGE_{key.upper()}" for key in MESSAGES)
+
+
+@dataclass(frozen=True)
+class GateConfig:
+    open: bool
+    event_code: str
+    # (start, end) in TZ_NAME, or None when the survey has no time window
+    window: Optional[Tuple[datetime, datetime]]
+    messages: Dict[str, str]
+    link_key: bytes
+    link_ttl: int  # seconds
+    public_url: str
+
+
+def _parse(raw: Dict[str, Optional[str]]) -> GateConfig:
+    tz = ZoneInfo(TZ_NAME)
+    window = None
+    if raw["SURVEY_START"] and raw["SURVEY_END"]:
+        try:
+            window = (
+                datetime.fromisoformat(raw["SURVEY_START"]).replace(tzinfo=tz),
+                datetime.fromisoformat(raw["SURVEY_END"]).replace(tzinfo=tz),
+            )
+        except ValueError as e:
+            print("Ignoring invalid SURVEY_START/SURVEY_END:", e)
+    try:
+        ttl_hours = float(raw["SURVEY_LINK_TTL_HOURS"] or 12)
+    except ValueError:
+        ttl_hours = 12.0
+    event_code = raw["SURVEY_PASS"] or "changeme"
+    # Without a dedicated secret, links are tied to the event code: changing it revokes them
+    secret = raw["SURVEY_LINK_SECRET"] or "survey-link:" + event_code
+    return GateConfig(
+        open=(raw["SURVEY_OPEN"] or "true").lower() == "true",
+        event_code=event_code,
+        window=window,
+        messages={key: raw[f"SURVEY_MESSAGE_{key.upper()}"] or text for key, text in MESSAGES.items()},
+        link_key=hashlib.sha256(secret.encode("utf-8")).digest(),
+        link_ttl=int(ttl_hours * 3600),
+        public_url=(raw["SURVEY_PUBLIC_URL"] or "https://survey.soulwaresystems.com").rstrip("/"),
+    )
+
+
+_config: Optional[GateConfig] = None
+_config_raw: Optional[Tuple[Optional[str], ...]] = None
+_config_checked = 0.0
+_config_lock = threading.Lock()
+_RECHECK_SECONDS = 5.0
+
+
+def get_config() -> GateConfig:
+    """Return the parsed gate settings.
+
+    The raw values are re-read at most every few seconds and only parsed again
+    when one of them changed, so edits to secrets.toml still take effect.
+    """
+    global _config, _config_raw, _config_checked
+    with _config_lock:
+        if _config is not None and time.monotonic() - _config_checked < _RECHECK_SECONDS:
+            return _config
+        raw = {name: _get_secret(name) for name in _SETTINGS}
+        signature = tuple(raw.values())
+        if _config is None or signature != _config_raw:
+            _config, _config_raw = _parse(raw), signature
+        _config_checked = time.monotonic()
+        return _config
+
+
+def message(key: str) -> str:
+    return get_config().messages[key]
+
+
+def in_window(config: GateConfig, now: Optional[datetime] = None) -> bool:
+    if config.window is None:
+        return True
+    now = now or datetime.now(config.window[0].tzinfo)
+    return config.window[0] <= now <= config.window[1]
+
+
+# ------------------------------------------------------------ signed links
+def _signature(config: GateConfig, expires: str) -> str:
+    digest = hmac.new(config.link_key, b"survey-link:" + expires.encode("ascii"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:16]).decode("ascii").rstrip("=")
+
+
+def make_token(expires: Optional[float] = None, config: Optional[GateConfig] = None) -> str:
+    """A link token valid until ``expires`` (epoch seconds).
+
+    Defaults to the end of the survey window, or ``SURVEY_LINK_TTL_HOURS``
+    (12) from now when there is no window.
+    """
+    config = config or get_config()
+    if expires is None:
+        expires = config.window[1].timestamp() if config.window else time.time() + config.link_ttl
+    stamp = format(int(expires), "x")
+    return f"{stamp}.{_signature(config, stamp)}"
+
+
+def verify_token(token: str, config: Optional[GateConfig] = None, now: Optional[float] = None) -> bool:
+    """True if ``token`` was signed with the current key and has not expired."""
+    config = config or get_config()
+    stamp, _, signature = token.partition(".")
+    try:
+        expires = int(stamp, 16)
+    except ValueError:
+        return False
+    valid = hmac.compare_digest(_signature(config, stamp), signature)
+    return valid and (now if now is not None else time.time()) <= expires
+
+
+def signed_link(path: str = "Survey", expires: Optional[float] = None) -> str:
+    """Public URL of ``path`` carrying a fresh link token."""
+    config = get_config()
+    return f"{config.public_url}/{path.lstrip('/')}?{LINK_PARAM}={make_token(expires, config)}"
+
+
+# -------------------------------------------------------------- page gate
+def require_access() -> None:
+    """Stop the page unless the survey is open and this session is authorised."""
+    import streamlit as st
+
+    config = get_config()
+    if not config.open:
+        st.title(config.messages["closed"])
+        st.stop()
+    if not in_window(config):
+        st.title(config.messages["not_now"])
+        st.stop()
+    if st.session_state.get("authed"):
+        return
+
+    token = st.query_params.get(LINK_PARAM)
+    if token:
+        del st.query_params[LINK_PARAM]
+        if verify_token(token, config):
+            # Carry on rendering in this run: no extra rerun for link arrivals
+            st.session_state["authed"] = True
+            return
+        st.warning(config.messages["bad_link"])
+
+    st.title(config.messages["prompt"])
+    code = st.text_input("Code", type="password")
+    if st.button("Enter"):
+        if hmac.compare_digest(code.encode("utf-8"), config.event_code.encode("utf-8")):
+            st.session_state["authed"] = True
+            st.rerun()
+        else:
+            st.error(config.messages["bad_code"])
+    st.stop()
@@ -0,0 +1,258 @@
+"""Write-ahead journal for survey submissions.
+
+A submission is acknowledged as soon as it is appended (and fsynced) to the
+journal. A background committer then folds batches of journaled records into
+the storage repository (group commit), and any records that were acknowledged but
+not yet committed are replayed from the journal on startup. The Excel master
+is derived from the CSV afterwards (see ``materializer``).
+"""
+
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import atexit
+import json
+import os
+import threading
+
+import storage
+from repository import SurveyRepository, get_repository
+
+JOURNAL_FILE = "submissions.journal"
+CHECKPOINT_FILE = "submissions.journal.checkpoint"
+
+
+class SubmissionJournal:
+    """Durable submission log with a batching committer thread."""
+
+    def __init__(
+        self,
+        journal_file: str = JOURNAL_FILE,
+        checkpoint_file: str = CHECKPOINT_FILE,
+        repository: Optional[SurveyRepository] = None,
+        on_commit: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        batch_size: int = 100,
+        commit_interval: float = 0.25,
+    ) -> None:
+        self.journal_file = journal_file
+        self.checkpoint_file = checkpoint_file
+        self.repository = repository or get_repository()
+        self.on_commit = on_commit
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+
+        self._fh = open(journal_file, "ab")
+        self._size = self._fh.seek(0, os.SEEK_END)
+        # (journal end offset, record) for everything not yet committed
+        self._pending: Deque[Tuple[int, Dict[str, Any]]] = deque()
+        self._cond = threading.Condition()
+        self._commit_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._written = 0
+        self._synced = 0
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ----------------------------------------------------------- append path
+    def append(self, record: Dict[str, Any]) -> None:
+        """Durably log one submission; returns once it is safe to acknowledge."""
+        line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+        with self._cond:
+            self._fh.write(line)
+            self._fh.flush()
+            self._size += len(line)
+            self._written += 1
+            ticket = self._written
+            self._pending.append((self._size, record))
+            self._cond.notify()
+
+        # Group fsync: one fsync covers every append written before it
+        if storage._fsync_policy() == "never":
+            return
+        with self._sync_lock:
+            if self._synced < ticket:
+                target = self._written
+                os.fsync(self._fh.fileno())
+                self._synced = target
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    # -------------------------------------------------------------- recovery
+    def _read_checkpoint(self) -> int:
+        try:
+            with open(self.checkpoint_file, "r", encoding="utf-8") as fh:
+                offset = int(json.load(fh).get("offset", 0))
+        except (FileNotFoundError, ValueError, AttributeError):
+            return 0
+        # A checkpoint past the end means the journal was compacted after it
+        return offset if 0 <= offset <= self._size else 0
+
+    def _write_checkpoint(self, offset: int) -> None:
+        tmp = self.checkpoint_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"offset": offset}, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, self.checkpoint_file)
+
+    def recover(self) -> int:
+        """Requeue journaled records past the checkpoint for the committer thread.
+
+        Returns how many records will be replayed into the master files; they
+        are committed (and the derived stores refreshed) once ``start`` runs.
+        """
+        replayed = 0
+        with self._commit_lock:
+            offset = self._read_checkpoint()
+            entries: List[Tuple[int, Dict[str, Any]]] = []
+            with open(self.journal_file, "rb") as fh:
+                fh.seek(offset)
+                for line in fh:
+                    if not line.endswith(b"\n"):
+                        break  # torn write from a crash; it was never acknowledged
+                    offset += len(line)
+                    try:
+                        entries.append((offset, json.loads(line)))
+                    except ValueError:
+                        continue
+            with self._cond:
+                if offset < self._size:
+                    self._fh.truncate(offset)
+                    self._size = offset
+
+            if entries:
+                # A crash between the master append and the checkpoint must not double-count
+                committed = self.repository.existing_ids(str(r.get("SubmissionID", "")) for _, r in entries)
+                replay = [(o, r) for o, r in entries if str(r.get("SubmissionID", "")) not in committed]
+                replayed = len(replay)
+                if replay:
+                    replay[-1] = (entries[-1][0], replay[-1][1])
+                    with self._cond:
+                        self._pending.extendleft(reversed(replay))
+                else:
+                    self._write_checkpoint(entries[-1][0])
+        self._compact()
+        return replayed
+
+    # ---------------------------------------------------------- group commit
+    def _compact(self) -> None:
+        """Truncate the journal once everything in it has been committed."""
+        with self._cond:
+            if self._pending or self._read_checkpoint() != self._size:
+                return
+            self._fh.truncate(0)
+            self._size = 0
+            self._write_checkpoint(0)
+
+    def commit_pending(self) -> int:
+        """Fold up to ``batch_size`` pending records into the master files."""
+        with self._commit_lock:
+            with self._cond:
+                batch = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+            if not batch:
+                return 0
+            records = [r for _, r in batch]
+            self.repository.insert_many(records)
+            self._write_checkpoint(batch[-1][0])
+            with self._cond:
+                for _ in batch:
+                    self._pending.popleft()
+            self._compact()
+        # Outside the commit lock: a slow refresh must not hold up the next batch
+        if self.on_commit is not None:
+            try:
+                self.on_commit(records)
+            except Exception as e:  # noqa: BLE001
+                print("Journal on_commit hook failed:", e)
+        return len(batch)
+
+    def flush(self) -> None:
+        """Commit everything that is pending right now."""
+        while self.commit_pending():
+            pass
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping and not self._pending:
+                    return
+                # Give concurrent submitters a moment to join this batch
+                if len(self._pending) < self.batch_size and not self._stopping:
+                    self._cond.wait(self.commit_interval)
+            try:
+                self.commit_pending()
+            except Exception as e:  # noqa: BLE001
+                print("Journal commit failed, will retry:", e)
+                with self._cond:
+                    if self._stopping:
+                        return
+                    self._cond.wait(max(self.commit_interval, 1.0))
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="submission-committer", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self._fh.close()
+
+
+def _after_commit(records: List[Dict[str, Any]]) -> None:
+    """Refresh everything derived from the master data once a batch is checkpointed.
+
+    Runs on the committer thread. Each getter creates its store on first use
+    and folds in the rows committed since its last refresh; one failing store
+    does not keep the others from catching up.
+    """
+    from aggregates import get_aggregates
+    from materializer import get_materializer
+    from near_duplicates import get_near_duplicates
+    from text_analytics import get_text_analytics
+    from text_index import get_text_index
+
+    refreshers: List[Tuple[str, Callable[[], Any]]] = [
+        ("Excel master", lambda: get_materializer().request()),
+        ("aggregates", get_aggregates),
+        ("text index", get_text_index),
+        ("near-duplicate clusters", get_near_duplicates),
+        ("text analytics", get_text_analytics),
+    ]
+    for name, refresh in refreshers:
+        try:
+            refresh()
+        except Exception as e:  # noqa: BLE001
+            print(f"Refreshing {name} after a commit failed:", e)
+
+
+_journal: Optional[SubmissionJournal] = None
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> SubmissionJournal:
+    """Return the process-wide journal, replaying it and starting the committer on first use."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            from migrate_audit_columns import ensure_migrated
+
+            try:
+                ensure_migrated()
+            except Exception as e:  # noqa: BLE001
+                print("Audit column migration failed:", e)
+            journal = SubmissionJournal(on_commit=_after_commit)
+            try:
+                journal.recover()
+            except Exception as e:  # noqa: BLE001
+                print("Journal replay failed, the committer will retry:", e)
+            journal.start()
+            atexit.register(journal.close)
+            _journal = journal
+        return _journal
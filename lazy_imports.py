@@ -0,0 +1,185 @@
+"""Deferred imports, and a benchmark of what each page imports on a cold start.
+
+``lazy_module("altair")`` returns a stand-in that imports the real module the
+first time one of its attributes is used, so a page can keep its usual
+``alt.Chart(...)`` code while the gate, the demographics form and the survey
+widgets render without loading pandas or altair. Call sites that only need a
+module inside one function import it there instead, as elsewhere in the repo.
+
+``python lazy_imports.py`` runs every page in a fresh interpreter under
+``-X importtime`` and reports, per page and stage (gate, signed in, survey
+widgets), how long the script run took, how much of it was spent importing,
+and which heavy packages it loaded. It exits non-zero when a ``LIGHT_STAGES``
+run loads any of ``HEAVY``, so CI can run it as a check.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import importlib
+import importlib.util
+import json
+import sys
+import threading
+import types
+
+HEAVY = ("pandas", "numpy", "pyarrow", "altair", "openpyxl")
+
+
+class LazyModule(types.ModuleType):
+    """Stands in for a module until one of its attributes is first used."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+        self.__dict__["_lazy_lock"] = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_target"]
+        if module is None:
+            # Script runs for several sessions can hit the first use at once
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_target"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_target"] = module
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__["_lazy_target"] is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_module(name: str) -> types.ModuleType:
+    """``name`` itself if it is already imported, otherwise a ``LazyModule`` for it.
+
+    A missing module still fails here, like a plain ``import`` would.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    return LazyModule(name)
+
+
+# ------------------------------------------------------------- benchmark
+PAGES: Dict[str, Tuple[str, ...]] = {
+    "Home.py": ("gate", "signed_in"),
+    "pages/2_Survey.py": ("gate", "signed_in", "survey"),
+    "pages/3_Results.py": ("gate", "signed_in"),
+}
+STAGES: Dict[str, Dict[str, Any]] = {
+    "gate": {},
+    "signed_in": {"authed": True},
+    # Demographics done, so the training sections are on screen
+    "survey": {"authed": True, "demographics_completed": True, "user_name": "Benchmark"},
+}
+# Stages that must render without importing anything in HEAVY
+LIGHT_STAGES = ("gate", "survey")
+_MARK = "-- page run --"
+_CHILD = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+at = AppTest.from_file(%(page)r, default_timeout=300)
+at.secrets["SURVEY_OPEN"] = "true"
+at.secrets["SURVEY_PASS"] = "benchmark"
+for key, value in %(state)r.items():
+    at.session_state[key] = value
+before = set(sys.modules)
+sys.stderr.write(%(mark)r + "\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+sys.stderr.flush()
+sys.stderr.write(%(mark)r + "\\n")
+print(json.dumps({
+    "run_ms": elapsed * 1000,
+    "errors": [str(e.value) for e in at.exception],
+    "modules": sorted(set(sys.modules) - before),
+}))
+"""
+
+
+def _parse_importtime(lines: List[str]) -> Tuple[float, List[Tuple[str, float]]]:
+    """Total import time in ms, and the top-level imports with their cumulative ms."""
+    total = 0.0
+    top: List[Tuple[str, float]] = []
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|", 2)
+        total += int(own) / 1000
+        # Nested imports are indented by two spaces per level
+        if not name[1:].startswith(" "):
+            top.append((name.strip(), int(cumulative) / 1000))
+    return total, top
+
+
+def measure(page: str, stage: str, root: Optional[str] = None) -> Dict[str, Any]:
+    """Run ``page`` once at ``stage`` in a fresh interpreter and time what it imports."""
+    import os
+    import subprocess
+
+    root = root or os.path.dirname(os.path.abspath(__file__))
+    code = _CHILD % {"page": os.path.join(root, page), "state": STAGES[stage], "mark": _MARK}
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env, check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{page} ({stage}) failed:\n{proc.stderr[-2000:]}")
+    # Only count imports made by the page itself; streamlit is already loaded in a server
+    err = proc.stderr.splitlines()
+    marks = [i for i, line in enumerate(err) if line == _MARK]
+    import_ms, top = _parse_importtime(err[marks[0] + 1:marks[-1]] if len(marks) >= 2 else [])
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    loaded = set(result["modules"])
+    return {
+        "page": page,
+        "stage": stage,
+        "run_ms": result["run_ms"],
+        "import_ms": import_ms,
+        "modules": len(loaded),
+        "heavy": [name for name in HEAVY if name in loaded],
+        "slowest": sorted(top, key=lambda item: item[1], reverse=True),
+        "errors": result["errors"],
+    }
+
+
+def _benchmark(top: int = 0) -> List[Dict[str, Any]]:
+    results = []
+    for page, stages in PAGES.items():
+        for stage in stages:
+            row = measure(page, stage)
+            results.append(row)
+            heavy = ",".join(row["heavy"]) or "-"
+            print(f"{page:20} {stage:10} {row['run_ms']:9.1f} ms  imports {row['import_ms']:8.1f} ms"
+                  f"  {row['modules']:4} modules  heavy: {heavy}")
+            for name, ms in row["slowest"][:top]:
+                print(f"{'':32} {ms:9.1f} ms  {name}")
+            for error in row["errors"]:
+                print(f"{'':32} error: {error}")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cold-start import time of each page, per stage.")
+    parser.add_argument("--top", type=int, default=0, help="also list the N slowest top-level imports")
+    args = parser.parse_args()
+    heavy_runs = [row for row in _benchmark(args.top) if row["stage"] in LIGHT_STAGES and row["heavy"]]
+    for row in heavy_runs:
+        print(f"FAIL: {row['page']} ({row['stage']}) loads {', '.join(row['heavy'])}")
+    sys.exit(1 if heavy_runs else 0)
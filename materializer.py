@@ -0,0 +1,188 @@
+"""Background materialization of the Excel master from the primary CSV.
+
+The XLSX master is a derived artifact: submissions only pay for the CSV write,
+and this module rewrites the workbook from it on a debounce, streaming the rows
+through a write-only workbook whenever the CSV has changed since the last run.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import csv
+import io
+import json
+import math
+import os
+import re
+import threading
+import time
+
+import storage
+from survey_schema import get_schema
+from utils import _get_secret, write_excel_stream
+
+SHEET_NAME = "responses"
+
+
+# Only the sliders are numbers; every other answer stays text, so IDs and
+# free text such as "007", "1_000" or "inf" reach the workbook unchanged
+_RATING_COLUMNS = {c for c, dtype in get_schema().dtypes.items() if dtype == "Int8"}
+_NUMBER = re.compile(r"[+-]?\d+(?:\.\d+)?")
+
+
+def _cell(column: str, value: str) -> Any:
+    """Convert a CSV field back into an Excel cell value (numbers for rating columns only)."""
+    if value == "":
+        return None
+    if column in _RATING_COLUMNS and _NUMBER.fullmatch(value.strip()):
+        number = float(value)
+        if math.isfinite(number):
+            return int(number) if number.is_integer() else number
+    return value
+
+
+def _records(header: List[str], rows: List[List[str]]) -> List[Dict[str, Any]]:
+    return [{c: _cell(c, v) for c, v in zip(header, row)} for row in rows]
+
+
+class ExcelMaterializer:
+    """Keeps ``excel_file`` in sync with ``csv_file`` from a background thread."""
+
+    def __init__(
+        self,
+        csv_file: str = storage.CSV_FILE,
+        excel_file: str = storage.EXCEL_FILE,
+        debounce: float = 5.0,
+        max_delay: float = 60.0,
+    ) -> None:
+        self.csv_file = csv_file
+        self.excel_file = excel_file
+        self.meta_file = excel_file + ".meta.json"
+        self.debounce = debounce
+        self.max_delay = max_delay
+
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        self._dirty_since: Optional[float] = None
+        self._last_request = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------- metadata
+    def _read_meta(self) -> Dict[str, Any]:
+        try:
+            with open(self.meta_file, "r", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_meta(self, meta: Dict[str, Any]) -> None:
+        tmp = self.meta_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh)
+        os.replace(tmp, self.meta_file)
+
+    def freshness(self) -> Optional[datetime]:
+        """When the workbook was last brought up to date, or None if never."""
+        stamp = self._read_meta().get("materialized_at")
+        return datetime.fromisoformat(stamp) if stamp else None
+
+    def is_stale(self) -> bool:
+        """True when the CSV holds rows the workbook does not have yet."""
+        meta = self._read_meta()
+        try:
+            st_csv = os.stat(self.csv_file)
+        except FileNotFoundError:
+            return False
+        return (
+            not os.path.exists(self.excel_file)
+            or meta.get("source_inode") != st_csv.st_ino
+            or meta.get("source_offset") != st_csv.st_size
+        )
+
+    # -------------------------------------------------------- materializing
+    def _read_source(self) -> Tuple[List[str], List[List[str]], int, int]:
+        """Return (header, rows, end offset, inode) for the whole CSV."""
+        # Hold the writer lock so the copy always ends on a complete record
+        with storage._write_lock:
+            with open(self.csv_file, "rb") as fh:
+                inode = os.fstat(fh.fileno()).st_ino
+                first = fh.readline()
+                tail = fh.read()
+                end = fh.tell()
+        header = next(csv.reader([first.decode("utf-8")]), [])
+        rows = list(csv.reader(io.StringIO(tail.decode("utf-8"), newline="")))
+        return header, [r for r in rows if r], end, inode
+
+    def materialize(self) -> int:
+        """Bring the workbook up to date; returns the number of rows written."""
+        with self._lock:
+            if not os.path.exists(self.csv_file) or not self.is_stale():
+                return 0
+            # Runs are debounced, so one streaming rewrite covers a burst of submissions
+            header, rows, end, inode = self._read_source()
+            write_excel_stream(_records(header, rows), self.excel_file, header, SHEET_NAME)
+
+            self._write_meta({
+                "source_inode": inode,
+                "source_offset": end,
+                "materialized_at": datetime.now().isoformat(timespec="seconds"),
+            })
+            return len(rows)
+
+    # ----------------------------------------------------------- scheduling
+    def request(self, *_: Any) -> None:
+        """Schedule a (debounced) refresh of the workbook."""
+        with self._cond:
+            now = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            self._last_request = now
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._dirty_since is None:
+                    self._cond.wait()
+                # Trailing debounce, but never hold a refresh back longer than max_delay
+                while True:
+                    now = time.monotonic()
+                    due = min(self._last_request + self.debounce, self._dirty_since + self.max_delay)
+                    if now >= due:
+                        break
+                    self._cond.wait(due - now)
+                self._dirty_since = None
+            try:
+                self.materialize()
+            except Exception as e:  # noqa: BLE001
+                print("Excel materialization failed, will retry:", e)
+                time.sleep(self.debounce)
+                self.request()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="excel-materializer", daemon=True)
+            self._thread.start()
+
+
+_materializer: Optional[ExcelMaterializer] = None
+_materializer_lock = threading.Lock()
+
+
+def _debounce_seconds() -> float:
+    try:
+        return float(_get_secret("SURVEY_EXCEL_DEBOUNCE", "5") or 5)
+    except ValueError:
+        return 5.0
+
+
+def get_materializer() -> ExcelMaterializer:
+    """Return the process-wide materializer, starting it (and catching up) on first use."""
+    global _materializer
+    with _materializer_lock:
+        if _materializer is None:
+            materializer = ExcelMaterializer(debounce=_debounce_seconds())
+            materializer.start()
+            if materializer.is_stale():
+                materializer.request()
+            _materializer = materializer
+        return _materializer
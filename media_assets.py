@@ -0,0 +1,202 @@
+"""Intro video for the Home page: cached discovery, renditions and static delivery.
+
+``python media_assets.py`` runs ffmpeg on the intro video to produce a poster
+frame plus a low and a high bitrate MP4 (``+faststart``, so playback can start
+from the first ranges). They are written to ``static/media/`` under names
+fingerprinted by the source's size and mtime, and listed in its manifest.
+Streamlit's static file serving answers HTTP range requests, so phones fetch
+only the poster until someone presses play, and then only what they watch.
+
+Until renditions exist (or with static serving off, or on a Streamlit release
+that cannot serve MP4 with its real type, see ``static_assets.serves_static``)
+the page falls back to ``st.video`` on the source file.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+
+from static_assets import serves_static
+
+ROOT = Path(__file__).resolve().parent
+ASSETS_DIR = ROOT / "assets"
+MEDIA_DIR = ROOT / "static" / "media"
+MEDIA_URL = "app/static/media"
+MANIFEST = "manifest.json"
+VIDEO_CANDIDATES = [
+    "avatar_intro.mp4",
+    "Survey Intro.mp4",
+]
+POSTER = "poster"
+# name -> (height, video bitrate, audio bitrate)
+RENDITIONS: Dict[str, Tuple[int, str, str]] = {
+    "low": (480, "700k", "64k"),
+    "high": (720, "1800k", "96k"),
+}
+
+
+@dataclass(frozen=True)
+class IntroVideo:
+    source: Path
+    # Static URLs; empty until ``prepare`` has run for this version of the source
+    poster: Optional[str]
+    renditions: Dict[str, str]
+
+
+def _is_valid_media(path: Path) -> bool:
+    try:
+        return path.exists() and path.stat().st_size > 0
+    except OSError:
+        return False
+
+
+def _discover(assets_dir: Path) -> Optional[Path]:
+    for candidate in VIDEO_CANDIDATES:
+        video_path = assets_dir / candidate
+        if _is_valid_media(video_path):
+            return video_path
+
+    fallback_videos = sorted(
+        (
+            video
+            for video in assets_dir.glob("*.mp4")
+            if video.name not in VIDEO_CANDIDATES and _is_valid_media(video)
+        ),
+        key=lambda video: video.stat().st_mtime,
+        reverse=True,
+    )
+
+    return fallback_videos[0] if fallback_videos else None
+
+
+def fingerprint(path: Path) -> str:
+    """Identifies a version of ``path`` without reading it (name, size, mtime)."""
+    stat = path.stat()
+    return hashlib.sha1(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8")).hexdigest()[:10]
+
+
+def _mtime(path: Path) -> Optional[int]:
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+_lock = threading.Lock()
+# (assets dir mtime, manifest mtime) -> result of the last lookup
+_cached: Tuple[Any, Optional[IntroVideo]] = (None, None)
+
+
+def intro_video(assets_dir: Path = ASSETS_DIR, media_dir: Path = MEDIA_DIR) -> Optional[IntroVideo]:
+    """The intro video and its renditions, looked up again only when either directory changes."""
+    global _cached
+    key = (_mtime(assets_dir), _mtime(media_dir / MANIFEST))
+    with _lock:
+        if _cached[0] == key and key[0] is not None:
+            return _cached[1]
+        source = _discover(assets_dir) if key[0] is not None else None
+        video = None
+        if source is not None:
+            built = _load_manifest(media_dir).get(fingerprint(source), {})
+            files = {name: f for name, f in built.items() if (media_dir / f).exists()}
+            video = IntroVideo(
+                source=source,
+                poster=f"{MEDIA_URL}/{files[POSTER]}" if POSTER in files else None,
+                renditions={name: f"{MEDIA_URL}/{files[name]}" for name in RENDITIONS if name in files},
+            )
+        _cached = (key, video)
+        return video
+
+
+# --------------------------------------------------------- preprocessing
+def _load_manifest(media_dir: Path) -> Dict[str, Dict[str, str]]:
+    try:
+        with open(media_dir / MANIFEST, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _ffmpeg(args: List[str], target: Path) -> None:
+    tmp = target.with_name(target.stem + ".tmp" + target.suffix)
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", *args, str(tmp)], check=True)
+    os.replace(tmp, target)
+
+
+def prepare(source: Path, media_dir: Path = MEDIA_DIR) -> Dict[str, str]:
+    """Build the poster and renditions of ``source``; returns name -> file name in ``media_dir``."""
+    if shutil.which("ffmpeg") is None:
+        raise RuntimeError("ffmpeg is required to prepare video renditions")
+    media_dir.mkdir(parents=True, exist_ok=True)
+    tag = fingerprint(source)
+    stem = "".join(c if c.isalnum() else "-" for c in source.stem.lower())
+    files = {POSTER: f"{stem}.{tag}.{POSTER}.jpg", **{name: f"{stem}.{tag}.{name}.mp4" for name in RENDITIONS}}
+
+    if not (media_dir / files[POSTER]).exists():
+        _ffmpeg(["-ss", "1", "-i", str(source), "-frames:v", "1", "-vf", "scale=-2:720", "-q:v", "4"],
+                media_dir / files[POSTER])
+    for name, (height, video_rate, audio_rate) in RENDITIONS.items():
+        if (media_dir / files[name]).exists():
+            continue
+        _ffmpeg([
+            "-i", str(source),
+            "-vf", f"scale=-2:{height}",
+            "-c:v", "libx264", "-preset", "slow", "-profile:v", "main",
+            "-b:v", video_rate, "-maxrate", video_rate, "-bufsize", video_rate,
+            "-c:a", "aac", "-b:a", audio_rate,
+            "-movflags", "+faststart",
+        ], media_dir / files[name])
+
+    manifest = {tag: files}  # older versions of the source are dropped
+    tmp = media_dir / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, media_dir / MANIFEST)
+    for entry in media_dir.iterdir():
+        if entry.name != MANIFEST and entry.name not in files.values():
+            entry.unlink()
+    return files
+
+
+# -------------------------------------------------------------- delivery
+def render_intro_video(low_power: bool = False) -> bool:
+    """Show the intro video; returns False when there is none."""
+    import streamlit as st
+
+    video = intro_video()
+    if video is None:
+        return False
+    # Phones and low-power clients only get the small rendition; the others
+    # pick the larger one on wide screens (browsers without <source media> use the first)
+    names = [n for n in (["low"] if low_power else ["high", "low"]) if n in video.renditions]
+    # Older Streamlit releases serve .mp4 as text/plain, which <video> will not play
+    if not names or not serves_static(video.renditions[names[0]]):
+        st.video(str(video.source))
+        return True
+
+    sources = "".join(
+        f'<source src="{video.renditions[name]}" type="video/mp4"'
+        + (' media="(min-width: 800px)"' if name == "high" and len(names) > 1 else "")
+        + ">"
+        for name in names
+    )
+    poster = f' poster="{video.poster}"' if video.poster else ""
+    st.markdown(
+        f'<video class="intro-video" controls playsinline preload="none"{poster}>{sources}</video>',
+        unsafe_allow_html=True,
+    )
+    return True
+
+
+if __name__ == "__main__":
+    found = _discover(ASSETS_DIR)
+    if found is None:
+        print(f"No intro video found in {ASSETS_DIR}")
+    else:
+        for name, filename in prepare(found).items():
+            print(f"{name:7} {filename:40} {(MEDIA_DIR / filename).stat().st_size:12,} bytes")
@@ -0,0 +1,92 @@
+"""One-time migration: split combined audit answers into flag + details columns.
+
+Older master files store each audit answer as ``"{Yes|No} - {details}"`` in
+``*_Audit_Issues``. This rewrites them so ``*_Audit_Issues`` holds just the
+Yes/No flag and the text moves to the matching ``*_Audit_Details`` column.
+The migration is idempotent and runs automatically on startup (see
+``journal.get_journal``); it can also be run by hand::
+
+    python migrate_audit_columns.py
+"""
+
+from typing import List
+import csv
+import os
+import shutil
+import sqlite3
+
+import storage
+from repository import DB_FILE, TABLE
+
+BACKUP_SUFFIX = ".pre-audit-split.bak"
+
+
+def _migrated_header(header: List[str]) -> List[str]:
+    out: List[str] = []
+    for col in header:
+        out.append(col)
+        details = storage.AUDIT_COLUMNS.get(col)
+        if details and details not in header:
+            out.append(details)
+    return out
+
+
+def migrate_csv(filename: str = storage.CSV_FILE) -> bool:
+    """Rewrite ``filename`` with split audit columns; returns True if it changed."""
+    header = storage.read_header(filename)
+    new_header = _migrated_header(header)
+    if new_header == header:
+        return False
+
+    tmp = filename + ".migrating"
+    with storage._write_lock:
+        with open(filename, "r", newline="", encoding="utf-8") as src, \
+                open(tmp, "w", newline="", encoding="utf-8") as dst:
+            writer = csv.DictWriter(dst, fieldnames=new_header, lineterminator="\n")
+            writer.writeheader()
+            for row in csv.DictReader(src):
+                for flag_col, details_col in storage.AUDIT_COLUMNS.items():
+                    if flag_col in row and details_col not in header:
+                        row[flag_col], row[details_col] = storage.split_audit_answer(row[flag_col])
+                writer.writerow(row)
+            dst.flush()
+            os.fsync(dst.fileno())
+        shutil.copy2(filename, filename + BACKUP_SUFFIX)
+        os.replace(tmp, filename)
+    return True
+
+
+def migrate_sqlite(db_file: str = DB_FILE) -> int:
+    """Split legacy audit answers in the SQLite store; returns rows updated."""
+    if not os.path.exists(db_file):
+        return 0
+    updated = 0
+    with sqlite3.connect(db_file, timeout=30) as conn:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({TABLE})")}
+        for flag_col, details_col in storage.AUDIT_COLUMNS.items():
+            if flag_col not in columns:
+                continue
+            if details_col not in columns:
+                conn.execute(f'ALTER TABLE {TABLE} ADD COLUMN "{details_col}" TEXT')
+            rows = conn.execute(
+                f'SELECT rowid, "{flag_col}" FROM {TABLE} WHERE "{flag_col}" LIKE \'% - %\''
+            ).fetchall()
+            conn.executemany(
+                f'UPDATE {TABLE} SET "{flag_col}" = ?, "{details_col}" = ? WHERE rowid = ?',
+                [(*storage.split_audit_answer(value), rowid) for rowid, value in rows],
+            )
+            updated += len(rows)
+    return updated
+
+
+def ensure_migrated() -> None:
+    """Migrate whichever master files still use the combined audit format."""
+    if os.path.exists(storage.CSV_FILE):
+        migrate_csv(storage.CSV_FILE)
+    migrate_sqlite(DB_FILE)
+
+
+if __name__ == "__main__":
+    changed = migrate_csv(storage.CSV_FILE) if os.path.exists(storage.CSV_FILE) else False
+    print(f"{storage.CSV_FILE}: {'migrated' if changed else 'already up to date'}")
+    print(f"{DB_FILE}: {migrate_sqlite(DB_FILE)} rows migrated")
@@ -0,0 +1,272 @@
+"""Near-duplicate detection for open-text answers (MinHash + LSH).
+
+Each answer gets a MinHash signature over its character shingles. Signatures
+are split into bands; answers sharing any band bucket for the same question are
+candidates, and candidates whose estimated Jaccard similarity clears
+``THRESHOLD`` are merged into one cluster. New submissions are folded in as
+they arrive, so the cost per answer stays constant instead of comparing every
+pair. Signatures and clusters are saved to ``MINHASH_FILE``.
+"""
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import atexit
+import os
+import pickle
+import re
+import threading
+import time
+import zlib
+
+import storage
+from repository import SurveyRepository, get_repository
+
+MINHASH_FILE = "survey_minhash.pkl"
+_FORMAT = 1
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: pairs above ~0.5 similarity usually collide
+THRESHOLD = 0.6
+SHINGLE = 5
+
+_PRIME = (1 << 31) - 1
+_SAVE_INTERVAL = 30.0
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def _permutations() -> Tuple[Any, Any]:
+    import numpy as np
+
+    rng = np.random.RandomState(1)  # fixed, so saved signatures stay comparable
+    a = rng.randint(1, _PRIME, size=NUM_PERM).astype(np.uint64)
+    b = rng.randint(0, _PRIME, size=NUM_PERM).astype(np.uint64)
+    return a, b
+
+
+_A, _B = _permutations()
+
+
+def signature(text: str) -> bytes:
+    """MinHash signature of ``text`` (NUM_PERM 32-bit values, as bytes)."""
+    import numpy as np
+
+    norm = normalize(text)
+    shingles = {norm[i:i + SHINGLE] for i in range(max(1, len(norm) - SHINGLE + 1))}
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) & _PRIME for s in shingles), dtype=np.uint64)
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32).tobytes()
+
+
+def similarity(sig_a: bytes, sig_b: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    import numpy as np
+
+    return float((np.frombuffer(sig_a, dtype=np.uint32) == np.frombuffer(sig_b, dtype=np.uint32)).mean())
+
+
+class _FieldClusters:
+    """Signatures, LSH buckets and union-find clusters for one question."""
+
+    def __init__(self) -> None:
+        self.submission: List[str] = []
+        self.text: List[str] = []
+        self.signature: List[bytes] = []
+        self.parent: List[int] = []
+        self.buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        # signature -> first answer with it; identical answers skip the LSH buckets
+        self.exact: Dict[bytes, int] = {}
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def add(self, submission_id: str, text: str, sig: Optional[bytes] = None) -> None:
+        doc = len(self.submission)
+        sig = sig or signature(text)
+        self.submission.append(submission_id)
+        self.text.append(text)
+        self.signature.append(sig)
+        self.parent.append(doc)
+
+        if sig in self.exact:
+            self.parent[doc] = self.find(self.exact[sig])
+            return
+        self.exact[sig] = doc
+
+        width = len(sig) // BANDS
+        checked: Set[int] = set()
+        for band in range(BANDS):
+            bucket = self.buckets.setdefault((band, sig[band * width:(band + 1) * width]), [])
+            for other in bucket:
+                if other in checked or self.find(other) == self.find(doc):
+                    continue
+                checked.add(other)
+                if similarity(sig, self.signature[other]) >= THRESHOLD:
+                    root_a, root_b = self.find(doc), self.find(other)
+                    if root_a != root_b:
+                        self.parent[max(root_a, root_b)] = min(root_a, root_b)
+            bucket.append(doc)
+
+
+class NearDuplicateIndex:
+    """Clusters of near-identical answers per open-text question."""
+
+    def __init__(self, fields: Iterable[str] = storage.TEXT_COLUMNS) -> None:
+        self.fields: Dict[str, _FieldClusters] = {f: _FieldClusters() for f in fields}
+        self.submissions: Set[str] = set()
+        self._cursor: Any = None
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._last_save = 0.0
+        self._save_lock = threading.Lock()
+        self._saver: Optional[threading.Thread] = None
+
+    def add_rows(self, df: Any) -> int:
+        """Sign the open-text answers of ``df``; submissions already seen are skipped."""
+        if df.empty or "SubmissionID" not in df.columns:
+            return 0
+        fields = [f for f in self.fields if f in df.columns]
+        ids = df["SubmissionID"].astype(str).tolist()
+        columns = [df[f].astype(object).tolist() for f in fields]
+        added = 0
+        for row, submission_id in enumerate(ids):
+            if submission_id in self.submissions:
+                continue
+            self.submissions.add(submission_id)
+            for field, values in zip(fields, columns):
+                text = values[row]
+                if isinstance(text, str) and normalize(text):
+                    self.fields[field].add(submission_id, text.strip())
+                    added += 1
+        return added
+
+    def _drop_missing(self, present: Iterable[str]) -> None:
+        """Forget submissions that are no longer stored (after a rewrite).
+
+        Merged clusters cannot be split, so each question is re-clustered from
+        the signatures it already has for the remaining answers.
+        """
+        gone = self.submissions - set(present)
+        if not gone:
+            return
+        for field, state in self.fields.items():
+            kept = _FieldClusters()
+            for submission_id, text, sig in zip(state.submission, state.text, state.signature):
+                if submission_id not in gone:
+                    kept.add(submission_id, text, sig)
+            self.fields[field] = kept
+        self.submissions -= gone
+        self._dirty = True
+
+    def refresh(self, repository: Optional[SurveyRepository] = None) -> None:
+        """Fold rows stored since the last refresh into the clusters."""
+        repository = repository or get_repository()
+        with self._lock:
+            rows, cursor, reset = repository.rows_since(self._cursor, include_text=True)
+            if reset and "SubmissionID" in rows.columns:
+                self._drop_missing(rows["SubmissionID"].astype(str))
+            if self.add_rows(rows):
+                self._dirty = True
+            self._cursor = cursor
+            if self._dirty and time.monotonic() - self._last_save > _SAVE_INTERVAL:
+                self._save_in_background()
+
+    def clusters(self, field: str, submission_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Clusters for ``field`` as dicts (Answer, Responses, Variants), largest first.
+
+        With ``submission_ids`` only those submissions' answers are counted,
+        e.g. the rows left after the dashboard filters.
+        """
+        allowed = set(submission_ids) if submission_ids is not None else None
+        with self._lock:
+            state = self.fields.get(field)
+            if state is None:
+                return []
+            grouped: Dict[int, List[int]] = {}
+            for doc, submission_id in enumerate(state.submission):
+                if allowed is None or submission_id in allowed:
+                    grouped.setdefault(state.find(doc), []).append(doc)
+            out = []
+            for docs in grouped.values():
+                wordings = Counter(state.text[d] for d in docs)
+                # The most common wording represents the cluster
+                representative = wordings.most_common(1)[0][0]
+                out.append({"Answer": representative, "Responses": len(docs), "Variants": len(wordings)})
+        return sorted(out, key=lambda c: -c["Responses"])
+
+    # --------------------------------------------------------- persistence
+    def save(self, path: str = MINHASH_FILE) -> None:
+        with self._save_lock:
+            with self._lock:
+                data = pickle.dumps((_FORMAT, self.fields, self.submissions), protocol=pickle.HIGHEST_PROTOCOL)
+                self._dirty = False
+                self._last_save = time.monotonic()
+            tmp = path + ".tmp"
+            try:
+                with open(tmp, "wb") as fh:
+                    fh.write(data)
+                os.replace(tmp, path)
+            except OSError:
+                self._dirty = True
+                raise
+
+    def _save_in_background(self) -> None:
+        """Save from a short-lived thread so a refresh never waits for the pickle."""
+        if self._saver is not None and self._saver.is_alive():
+            return
+        self._last_save = time.monotonic()
+        self._saver = threading.Thread(target=self._save_quietly, name="minhash-save", daemon=True)
+        self._saver.start()
+
+    def _save_quietly(self) -> None:
+        try:
+            self.save()
+        except Exception as e:  # noqa: BLE001
+            print("Could not save near-duplicate clusters:", e)
+
+    @classmethod
+    def load(cls, path: str = MINHASH_FILE) -> "NearDuplicateIndex":
+        """Load saved clusters, or start empty (rebuilt on refresh) if they are missing or unusable."""
+        index = cls()
+        try:
+            with open(path, "rb") as fh:
+                fmt, fields, submissions = pickle.load(fh)
+            if fmt != _FORMAT:
+                raise ValueError(f"saved format {fmt}, expected {_FORMAT}")
+            if set(fields) != set(index.fields):
+                raise ValueError("the clustered fields have changed")
+            index.fields, index.submissions = fields, submissions
+        except FileNotFoundError:
+            pass
+        except Exception as e:  # noqa: BLE001
+            print("Could not load the saved near-duplicate clusters, rebuilding them:", e)
+            return cls()
+        return index
+
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def _save_on_exit() -> None:
+    if _index is not None and _index._dirty:
+        try:
+            _index.save()
+        except OSError as e:
+            print("Could not save near-duplicate clusters:", e)
+
+
+def get_near_duplicates() -> NearDuplicateIndex:
+    """Return the process-wide near-duplicate index, brought up to date."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex.load()
+            atexit.register(_save_on_exit)
+    _index.refresh()
+    return _index
@@ -1,52 +1,11 @@
-import os
 import streamlit as st
 from datetime import datetime
-from zoneinfo import ZoneInfo
 
-MESSAGES = {
-    "closed": "🚫 This app is no longer available.",
-    "not_now": "⏳ This survey isn’t open right now.",
-    "prompt": "🔑 Enter Event Code",
-    "bad_code": "That code didn’t work. Please try again or ask the host.",
-    "bad_link": "This link is expired or invalid.",
-}
+from gate import require_access
+from static_assets import inject as inject_styles
 
-
-def _message(key: str) -> str:
-    env_key = f"SURVEY_MESSAGE_{key.upper()}"
-    return st.secrets.get(env_key, os.getenv(env_key, MESSAGES[key]))
-
-SURVEY_OPEN = (st.secrets.get("SURVEY_OPEN", os.getenv("SURVEY_OPEN", "true")).lower() == "true")
-EVENT_CODE = st.secrets.get("SURVEY_PASS", os.getenv("SURVEY_PASS", "changeme"))
-
-# Kill switch
-if not SURVEY_OPEN:
-    st.title(_message("closed"))
-    st.stop()
-
-# Time window (optional)
-TZ = ZoneInfo("America/New_York")
-start = st.secrets.get("SURVEY_START")  # e.g. "2025-10-01 18:30"
-end = st.secrets.get("SURVEY_END")    # e.g. "2025-10-01 21:30"
-if start and end:
-    now = datetime.now(TZ)
-    s = datetime.fromisoformat(start).replace(tzinfo=TZ)
-    e = datetime.fromisoformat(end).replace(tzinfo=TZ)
-    if not (s <= now <= e):
-        st.title(_message("not_now"))
-        st.stop()
-
-# Passcode gate
-if not st.session_state.get("authed"):
-    st.title(_message("prompt"))
-    code = st.text_input("Code", type="password")
-    if st.button("Enter"):
-        if code == EVENT_CODE:
-            st.session_state["authed"] = True
-            st.rerun()
-        else:
-            st.error(_message("bad_code"))
-    st.stop()
+# Kill switch, time window and event code / signed link
+require_access()
 
 __doc__ = """
 Training Feedback Survey Page - Fixed Version
@@ -55,335 +14,22 @@ Collects survey responses for Title Class, FDRI/DLID, Driver examiners,
 Compliance, and Advanced VDH FDRII training. Saves results to the master CSV + Excel.
 """
 
-import pandas as pd
+from typing import Any, Dict
+from uuid import uuid4
 
-# Master files (everything writes here)
-CSV_FILE = "Updated_Training_Feedback_Survey_Template.csv"
-EXCEL_FILE = "Updated_Training_Feedback_Survey_Template.xlsx"
+from journal import get_journal
+from survey_schema import Question, Section, get_schema
 
 # Page settings
 st.set_page_config(page_title="Training Feedback Survey", layout="wide")
 
-# Enhanced styling for engaging yet professional background
-st.markdown(
-    """
-    <style>
-        /* Main background with Results page color scheme */
-        .stApp {
-            background: linear-gradient(135deg, #2F1B14 0%, #8B2635 50%, #2F1B14 100%);
-            min-height: 100vh;
-            position: relative;
-        }
-
-        main .block-container {
-            max-width: min(1150px, 96vw);
-            margin: 0 auto;
-            padding: clamp(1.25rem, 2vw, 2.5rem) clamp(0.75rem, 4vw, 2.25rem) 4.5rem;
-        }
-        
-        /* Header styling with granulated glowing effect */
-        .main-header {
-            background: linear-gradient(135deg, #2F1B14 0%, #8B2635 50%, #2F1B14 100%);
-            background-size: 200% 200%;
-            animation: gradientShift 4s ease infinite;
-            padding: 2rem;
-            border-radius: 15px;
-            text-align: center;
-            margin: 2rem auto;
-            max-width: 940px;
-            box-shadow: 
-                0 0 20px rgba(139, 38, 53, 0.4),
-                0 0 40px rgba(47, 27, 20, 0.3),
-                0 0 60px rgba(139, 38, 53, 0.2),
-                0 8px 32px rgba(0,0,0,0.1);
-            border: 1px solid rgba(255,255,255,0.3);
-            position: relative;
-            overflow: hidden;
-        }
-        
-        .main-header::before {
-            content: '';
-            position: absolute;
-            top: -50%;
-            left: -50%;
-            width: 200%;
-            height: 200%;
-            background: radial-gradient(circle, rgba(255,255,255,0.1) 0%, transparent 70%);
-            animation: rotate 8s linear infinite;
-            pointer-events: none;
-        }
-        
-        @keyframes gradientShift {
-            0% { background-position: 0% 50%; }
-            50% { background-position: 100% 50%; }
-            100% { background-position: 0% 50%; }
-        }
-        
-        @keyframes rotate {
-            0% { transform: rotate(0deg); }
-            100% { transform: rotate(360deg); }
-        }
-        
-        .main-header h1 {
-            color: white;
-            margin: 0;
-            font-size: 2.5em;
-            text-shadow: 
-                0 0 10px rgba(255,255,255,0.5),
-                0 0 20px rgba(255,255,255,0.3),
-                0 0 30px rgba(139, 38, 53, 0.4),
-                2px 2px 4px rgba(0,0,0,0.3);
-            position: relative;
-            z-index: 2;
-        }
-        
-        .main-header h3 {
-            color: rgba(255,255,255,0.95);
-            margin: 10px 0 0 0;
-            font-weight: 300;
-            text-shadow: 
-                0 0 8px rgba(255,255,255,0.3),
-                0 0 15px rgba(139, 38, 53, 0.3),
-                1px 1px 2px rgba(0,0,0,0.2);
-            position: relative;
-            z-index: 2;
-        }
-        
-        /* Gradient burgundy section header banners */
-        .gradient-header {
-            background: linear-gradient(135deg, #8B2635 0%, #2F1B14 50%, #8B2635 100%);
-            background-size: 200% 200%;
-            animation: gradientText 3s ease infinite;
-            color: white;
-            text-align: center;
-            font-weight: 700;
-            font-size: 1.3em;
-            margin: 2rem auto 1rem auto;
-            padding: 0.75rem 1rem;
-            border-radius: 12px;
-            box-shadow: 
-                0 0 15px rgba(139, 38, 53, 0.3),
-                0 0 30px rgba(47, 27, 20, 0.2),
-                0 4px 15px rgba(0,0,0,0.2);
-            border: 1px solid rgba(255,255,255,0.2);
-            text-shadow: 1px 1px 2px rgba(0,0,0,0.5);
-        }
-        
-        @keyframes gradientText {
-            0% { background-position: 0% 50%; }
-            50% { background-position: 100% 50%; }
-            100% { background-position: 0% 50%; }
-        }
-        
-        /* Demographics section with darker burgundy background */
-        .aligned-demographics-info {
-            background: linear-gradient(135deg, #6B1F2E 0%, #4A1621 100%);
-            padding: 0.75rem 1.5rem;
-            border-radius: 8px;
-            margin: 0 auto 0.5rem auto;
-            max-width: 940px;
-            box-shadow: 
-                0 4px 15px rgba(139, 38, 53, 0.3),
-                inset 0 1px 0 rgba(255,255,255,0.1);
-            border: 1px solid #8B2635;
-        }
-        
-        .aligned-demographics-info strong {
-            color: #FFFFFF !important;
-            text-shadow: 1px 1px 2px rgba(0,0,0,0.5) !important;
-        }
-        
-        .aligned-demographics-info br + strong {
-            display: inline-block;
-            margin-top: 0.5rem;
-        }
-        
-        /* Submit button styling */
-        .stButton > button {
-            background: linear-gradient(135deg, #8B4513 0%, #A0522D 100%);
-            color: white !important;
-            border: 2px solid #654321;
-            border-radius: 8px;
-            padding: 0.75rem 2rem;
-            font-size: 1.1em;
-            font-weight: 600;
-            box-shadow: 
-                0 4px 15px rgba(139, 69, 19, 0.3),
-                inset 0 1px 0 rgba(255,255,255,0.2);
-            transition: all 0.3s ease;
-            text-shadow: 1px 1px 2px rgba(0,0,0,0.3);
-        }
-        
-        .stButton > button:hover {
-            transform: translateY(-2px);
-            box-shadow: 
-                0 6px 20px rgba(139, 69, 19, 0.4),
-                inset 0 1px 0 rgba(255,255,255,0.3);
-            background: linear-gradient(135deg, #A0522D 0%, #8B4513 100%);
-        }
-        
-        /* General text styling */
-        p, div:not(.stButton) {
-            color: #FFFFFF !important;
-            text-shadow: 1px 1px 2px rgba(0,0,0,0.5);
-        }
-        
-        /* Survey content alignment */
-        .survey-section-content {
-            margin: 0 auto 1.5rem auto;
-            max-width: 940px;
-            padding: 0;
-        }
-        
-        .aligned-content {
-            margin: 0 auto;
-            max-width: 940px;
-            padding: 0 1rem;
-        }
-        
-        .edit-demographics-container {
-            margin: 0.5rem auto 1rem auto;
-            max-width: 940px;
-            padding: 0;
-        }
-        
-        /* Streamlit input fields styling */
-        .stTextInput > div > div > input,
-        .stTextArea > div > div > textarea,
-        .stSelectbox > div > div > div,
-        .stRadio > div,
-        .stSlider {
-            padding: 0.5rem !important;
-            border-radius: 6px !important;
-        }
-        
-        /* Demographics form styling */
-        .demographics-form-text {
-            color: #FFFFFF;
-            font-weight: 600;
-            text-shadow: 1px 1px 2px rgba(0,0,0,0.5);
-            margin: 0 0 0.5rem 0;
-        }
-        
-        .aligned-content ul {
-            margin: 0;
-            padding-left: 1.2rem;
-            list-style-position: outside;
-        }
-        
-        .aligned-content li {
-            margin-bottom: 0.5rem;
-            color: #FFFFFF !important;
-            text-shadow: 1px 1px 2px rgba(0,0,0,0.5);
-        }
-
-        /* Responsive layout adjustments */
-        @media (max-width: 1024px) {
-            main .block-container {
-                padding: 1.5rem 1.5rem 3.5rem;
-            }
-
-            .main-header {
-                margin: 1.75rem auto;
-                padding: 1.75rem 1.25rem;
-            }
-
-            .gradient-header {
-                margin: 1.5rem auto 0.75rem auto;
-                padding: 1rem 1.5rem;
-            }
-
-            .survey-section-content,
-            .aligned-content,
-            .aligned-demographics-info,
-            .edit-demographics-container {
-                margin-left: auto;
-                margin-right: auto;
-            }
-        }
+SCHEMA = get_schema()
 
-        @media (max-width: 768px) {
-            main .block-container {
-                padding: 1.3rem 0.85rem 3rem;
-            }
-
-            .main-header {
-                margin: 1.5rem auto 1rem auto;
-                padding: 1.5rem 1rem;
-            }
-
-            .main-header h1 {
-                font-size: 1.9em;
-            }
-
-            .main-header h3 {
-                font-size: 1.1em;
-            }
-
-            .gradient-header {
-                font-size: 1.1em;
-                margin: 1.25rem auto 0.5rem auto;
-                padding: 0.95rem 1.2rem;
-            }
-
-            .aligned-content {
-                margin: 0 auto;
-                padding: 0 0.75rem;
-            }
-
-            .survey-section-content,
-            .aligned-demographics-info,
-            .edit-demographics-container {
-                margin: 0.25rem auto 1rem auto;
-                padding-left: 0.5rem;
-                padding-right: 0.5rem;
-            }
-
-            .stButton > button {
-                font-size: 1em;
-                padding: 0.85rem 1.1rem;
-            }
-
-            [data-testid="column"] {
-                flex: 1 1 100% !important;
-                min-width: 100% !important;
-            }
-
-            .stTextInput > div > div > input,
-            .stTextArea > div > div > textarea,
-            .stSelectbox > div > div > div {
-                font-size: 0.95rem !important;
-            }
-        }
+# Replays any acknowledged-but-uncommitted submissions on first load
+get_journal()
 
-        @media (max-width: 540px) {
-            main .block-container {
-                padding: 1.1rem 0.65rem 2.5rem;
-            }
-
-            .main-header h1 {
-                font-size: 1.7em;
-            }
-
-            .aligned-content {
-                padding: 0 0.5rem;
-            }
-
-            .survey-section-content,
-            .aligned-demographics-info,
-            .edit-demographics-container {
-                padding-left: 0.35rem;
-                padding-right: 0.35rem;
-            }
-
-            .stTextArea > div > div > textarea {
-                min-height: 140px !important;
-            }
-        }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+# Enhanced styling for engaging yet professional background
+inject_styles("survey")
 
 # Enhanced banner header  
 st.markdown(
@@ -434,11 +80,7 @@ if not st.session_state.get("demographics_completed"):
         
         with col2:
             st.markdown('<p class="demographics-form-text"><strong>CSC Location</strong> (Required)</p>', unsafe_allow_html=True)
-            csc = st.selectbox("CSC", [
-                "", "Ashland", "Chester", "Chesterfield", "East Henrico", "Emporia", "Ft Gregg Adams", "Hopewell",
-                "Kilmarnock", "Petersburg", "Richmond Center (HQ)", "Tappahannock", "West Henrico", "Williamsburg",
-                "Other (please specify in email field)"
-            ], index=0, label_visibility="collapsed")
+            csc = st.selectbox("CSC", ["", *SCHEMA.questions["CSC"].options], index=0, label_visibility="collapsed")
             st.markdown('<p class="demographics-form-text"><strong>Email</strong> (Optional)</p>', unsafe_allow_html=True)
             email = st.text_input("Email", value=st.session_state.get("user_email", ""), 
                                  label_visibility="collapsed", placeholder="your.email@domain.com")
@@ -484,146 +126,58 @@ else:
 if not st.session_state.get("demographics_completed"):
     st.stop()
 
-# --- Skills options for each section ---
-SECTION_SKILLS = {
-    "Title_Class_Skills_Important": [
-        "Accuracy in data entry",
-        "Understanding title documentation",
-        "Customer communication",
-        "Problem-solving with difficult cases",
-        "All of the above",
-    ],
-    "FDR1_and_DLID_Skills_Important": [
-        "ID & document verification accuracy",
-        "System navigation speed",
-        "Fraud detection basics",
-        "Customer communication",
-        "All of the above",
-    ],
-    "Driver_Examiner_Skills_Important": [
-        "Road test protocol adherence",
-        "Safety & vehicle inspection",
-        "Customer instruction & communication",
-        "Documentation accuracy",
-        "All of the above",
-    ],
-    "Compliance_Skills_Important": [
-        "Regulation & policy knowledge",
-        "Exception handling & escalation",
-        "Audit trail documentation",
-        "Data privacy & confidentiality",
-        "All of the above",
-    ],
-    "Advanced_VDH_FDR_II_FDR_III_Skills_Important": [
-        "Complex case resolution",
-        "Document verification",
-        "Data analysis & reporting",
-        "Mentoring & leadership",
-        "All of the above",
-    ],
-}
-
-# ---------------- Collect Survey Responses ----------------
-responses = {}
-
-for section_key, skills in SECTION_SKILLS.items():
-    # Get the proper section name for display
-    display_name = section_key.replace("_Skills_Important", "").replace("_", " ")
-    if "FDR II FDR III" in display_name:
-        display_name = "Advanced VDH FDRII"
-    elif "FDR1 and DLID" in display_name:
-        display_name = "FDRI/DLID"
-    
-    # Create gradient banner for section header
-    st.markdown(f'<div class="gradient-header">{display_name} Section</div>', unsafe_allow_html=True)
-
-    # 1. Skills (multiple choice)
-    responses[section_key] = st.radio(
-        f"1. What skills do you find most important for agents coming out of {display_name} training?",
-        skills,
-        key=f"{section_key}_skills",
-    )
+# ---------------- Survey sections ----------------
+# Questions, options and follow-ups come from the compiled survey schema
+# (survey_schema.json). Each section is a fragment: a slider drag or radio
+# change reruns only that section (so follow-up questions still appear as
+# soon as they apply) instead of the gate, styling and every other section.
+# Answers live in the widgets' session state, keyed by column, and are read
+# back only when the survey is submitted.
 
-    # Generate the correct column names for responses (matching CSV structure)
-    base_name = section_key.replace("_Skills_Important", "")
-    
-    # 2. Challenges (open text)
-    responses[base_name + "_Challenges"] = st.text_area(
-        f"2. What specific challenges do they usually face when they return to their roles?",
-        key=f"{section_key}_challenges",
-    )
+def is_shown(question: Question) -> bool:
+    """Whether a follow-up question applies, given the answer it depends on."""
+    if question.show_if is None:
+        return True
+    column, answers = question.show_if
+    return st.session_state.get(column) in answers
 
-    # 3. Confidence (slider)
-    responses[base_name + "_Confidence"] = st.slider(
-        f"3. How confident are agents after completing the {display_name} class?",
-        1, 10, 5,
-        key=f"{section_key}_confidence",
-    )
 
-    # 4. Expected Improvements (open text)
-    responses[base_name + "_Expected_Improvements"] = st.text_area(
-        f"4. After completing the {display_name} training, what improvements do you expect to see in agents' performance?",
-        key=f"{section_key}_improvements",
-    )
+def render_question(question: Question) -> None:
+    if question.kind == "rating":
+        low, high = question.scale
+        st.slider(question.prompt, low, high, question.default, key=question.column)
+    elif question.kind == "choice":
+        st.radio(question.prompt, question.options, key=question.column)
+    else:
+        st.text_area(question.prompt, key=question.column)
 
-    # 5. Audit Issues (Yes/No + details)
-    audit = st.radio(
-        f"5. Do agents in your center experience a high number of audit issues/errors from {display_name} transactions?",
-        ["Yes", "No"],
-        key=f"{section_key}_audit",
-    )
-    audit_details = ""
-    if audit == "Yes":
-        audit_details = st.text_area(
-            "If yes: Please describe the most common errors.",
-            key=f"{section_key}_audit_details",
-        )
-    responses[base_name + "_Audit_Issues"] = f"{audit} - {audit_details}"
-
-# ---------------- Onboarding ----------------
-st.markdown('<div class="gradient-header">Onboarding</div>', unsafe_allow_html=True)
-st.markdown('<div class="survey-section-content">', unsafe_allow_html=True)
 
-onboarding_desc = st.text_area(
-    "1. Describe how a new hire is onboarded in your CSC."
-)
-onboarding_coach = st.radio(
-    "2. Are they assigned a dedicated coach/senior/work leader for shadowing, coaching and development?",
-    ["Yes", "No"],
-)
-onboarding_support = ""
-if onboarding_coach == "Yes":
-    onboarding_support = st.text_area("If yes: Please describe how they support new hires.")
-
-# New questions about e-Learning and OJT
-elearning_time = st.radio(
-    "3. Are new hires provided adequate dedicated time to complete their required e-Learning modules?",
-    ["Yes", "No", "Sometimes"],
-)
-elearning_details = ""
-if elearning_time in ["No", "Sometimes"]:
-    elearning_details = st.text_area("If no or sometimes: Please explain the challenges or barriers.")
+@st.fragment
+def render_section(section: Section) -> None:
+    st.markdown(f'<div class="gradient-header">{section.title}</div>', unsafe_allow_html=True)
+    if not section.training:
+        st.markdown('<div class="survey-section-content">', unsafe_allow_html=True)
 
-ojt_assessment = st.radio(
-    "4. Do new hires successfully complete and pass their Basic Skills OJT guide assessment before being scheduled for Title class?",
-    ["Always", "Usually", "Sometimes", "Rarely", "Never"],
-)
-ojt_details = ""
-if ojt_assessment in ["Sometimes", "Rarely", "Never"]:
-    ojt_details = st.text_area("If not consistently: What factors prevent successful completion?")
+    for question in section.questions:
+        if is_shown(question):
+            render_question(question)
 
-st.markdown('</div>', unsafe_allow_html=True)
+    if not section.training:
+        st.markdown('</div>', unsafe_allow_html=True)
 
-# ---------------- Survey Experience ----------------
-st.markdown('<div class="gradient-header">Feedback on Survey Experience</div>', unsafe_allow_html=True)
-st.markdown('<div class="survey-section-content">', unsafe_allow_html=True)
 
-ai_rating = st.slider("1. How did you like the hybrid AI guided survey structure?", 1, 5, 3)
-ai_comments = st.text_area("2. Comments on the AI survey experience")
-recommend = st.radio("3. Would you recommend this survey app?", ["Yes", "No", "Maybe"])
-recommend_why = st.text_area("4. Why or why not?")
+def collect_answers() -> Dict[str, Any]:
+    """Assemble the survey answers from widget state; hidden follow-ups are blank."""
+    state = st.session_state
+    return {
+        q.column: state.get(q.column, q.default) if is_shown(q) else ""
+        for section in SCHEMA.sections
+        for q in section.questions
+    }
 
-st.markdown('</div>', unsafe_allow_html=True)
+
+for section in SCHEMA.sections:
+    render_section(section)
 
 # ---------------- Review & Submit ----------------
 st.markdown('<div class="gradient-header">📝 Review Your Responses</div>', unsafe_allow_html=True)
@@ -636,7 +190,7 @@ st.markdown('<div class="survey-section-content">', unsafe_allow_html=True)
 if st.button("✅ Submit Survey", type="primary", use_container_width=True):
     try:
         record = {
-            "SubmissionID": f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{st.session_state.get('user_name', '')}",
+            "SubmissionID": f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{st.session_state.get('user_name', '')}_{uuid4().hex[:6]}",
             "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         }
         record.update({
@@ -645,67 +199,17 @@ if st.button("✅ Submit Survey", type="primary", use_container_width=True):
             "CSC": st.session_state.get('user_csc', ''),
             "User_Email": st.session_state.get('user_email', '')
         })
-        record.update(responses)
-        record.update({
-            "Onboarding_Process_Description": onboarding_desc,
-            "Onboarding_Assigned_Coach": onboarding_coach,
-            "Onboarding_Coach_Support": onboarding_support,
-            "ELearning_Dedicated_Time": elearning_time,
-            "ELearning_Time_Details": elearning_details,
-            "OJT_Assessment_Success": ojt_assessment,
-            "OJT_Assessment_Details": ojt_details,
-            "AI_Survey_Experience_Rating": ai_rating,
-            "AI_Survey_Experience_Comments": ai_comments,
-            "Recommend_Survey_App": recommend,
-            "Why_Recommend_or_Not": recommend_why,
-        })
+        record.update(collect_answers())
 
-        # Ensure all columns exist in the dataframe to prevent column mismatch errors
-        expected_columns = [
-            "SubmissionID", "Timestamp", "User_Name", "User_Role", "CSC", "User_Email",
-            "Title_Class_Skills_Important", "Title_Class_Challenges", "Title_Class_Confidence", 
-            "Title_Class_Expected_Improvements", "Title_Class_Audit_Issues",
-            "FDR1_and_DLID_Skills_Important", "FDR1_and_DLID_Challenges", "FDR1_and_DLID_Confidence",
-            "FDR1_and_DLID_Expected_Improvements", "FDR1_and_DLID_Audit_Issues",
-            "Driver_Examiner_Skills_Important", "Driver_Examiner_Challenges", "Driver_Examiner_Confidence",
-            "Driver_Examiner_Expected_Improvements", "Driver_Examiner_Audit_Issues",
-            "Compliance_Skills_Important", "Compliance_Challenges", "Compliance_Confidence",
-            "Compliance_Expected_Improvements", "Compliance_Audit_Issues",
-            "Advanced_VDH_FDR_II_FDR_III_Skills_Important", "Advanced_VDH_FDR_II_FDR_III_Challenges", 
-            "Advanced_VDH_FDR_II_FDR_III_Confidence", "Advanced_VDH_FDR_II_FDR_III_Expected_Improvements", 
-            "Advanced_VDH_FDR_II_FDR_III_Audit_Issues",
-            "Onboarding_Process_Description", "Onboarding_Assigned_Coach", "Onboarding_Coach_Support",
-            "ELearning_Dedicated_Time", "ELearning_Time_Details", "OJT_Assessment_Success", "OJT_Assessment_Details",
-            "AI_Survey_Experience_Rating", "AI_Survey_Experience_Comments", "Recommend_Survey_App", "Why_Recommend_or_Not"
-        ]
-        
         # Fill missing columns with empty strings
-        for col in expected_columns:
+        for col in SCHEMA.columns:
             if col not in record:
                 record[col] = ""
 
-        # Save to CSV silently
+        # Durably journal the submission; the committer folds it into the master CSV
+        # and the Excel master is refreshed from it in the background
         try:
-            if os.path.exists(CSV_FILE):
-                df = pd.read_csv(CSV_FILE)
-            else:
-                df = pd.DataFrame()
-            
-            new_df = pd.concat([df, pd.DataFrame([record])], ignore_index=True)
-            new_df.to_csv(CSV_FILE, index=False)
-        except Exception as e:
-            st.error(f"❌ Error saving data: {str(e)}")
-            st.stop()
-
-        # Save to Excel silently
-        try:
-            if os.path.exists(EXCEL_FILE):
-                df_excel = pd.read_excel(EXCEL_FILE)
-            else:
-                df_excel = pd.DataFrame()
-            
-            new_df_excel = pd.concat([df_excel, pd.DataFrame([record])], ignore_index=True)
-            new_df_excel.to_excel(EXCEL_FILE, index=False)
+            get_journal().append(record)
         except Exception as e:
             st.error(f"❌ Error saving data: {str(e)}")
             st.stop()
@@ -1,330 +1,105 @@
-import os
 import streamlit as st
-from datetime import datetime, date as _date
-from zoneinfo import ZoneInfo
-
-MESSAGES = {
-    "closed": "🚫 This app is no longer available.",
-    "not_now": "⏳ This survey isn’t open right now.",
-    "prompt": "🔑 Enter Event Code",
-    "bad_code": "That code didn’t work. Please try again or ask the host.",
-    "bad_link": "This link is expired or invalid.",
-}
-
-
-def _message(key: str) -> str:
-    env_key = f"SURVEY_MESSAGE_{key.upper()}"
-    return st.secrets.get(env_key, os.getenv(env_key, MESSAGES[key]))
-
-SURVEY_OPEN = (st.secrets.get("SURVEY_OPEN", os.getenv("SURVEY_OPEN", "true")).lower() == "true")
-EVENT_CODE = st.secrets.get("SURVEY_PASS", os.getenv("SURVEY_PASS", "changeme"))
-
-# Kill switch
-if not SURVEY_OPEN:
-    st.title(_message("closed"))
-    st.stop()
-
-# Time window (optional)
-TZ = ZoneInfo("America/New_York")
-start = st.secrets.get("SURVEY_START")  # e.g. "2025-10-01 18:30"
-end = st.secrets.get("SURVEY_END")    # e.g. "2025-10-01 21:30"
-if start and end:
-    now = datetime.now(TZ)
-    s = datetime.fromisoformat(start).replace(tzinfo=TZ)
-    e = datetime.fromisoformat(end).replace(tzinfo=TZ)
-    if not (s <= now <= e):
-        st.title(_message("not_now"))
-        st.stop()
-
-# Passcode gate
-if not st.session_state.get("authed"):
-    st.title(_message("prompt"))
-    code = st.text_input("Code", type="password")
-    if st.button("Enter"):
-        if code == EVENT_CODE:
-            st.session_state["authed"] = True
-            st.rerun()
-        else:
-            st.error(_message("bad_code"))
-    st.stop()
-
-from typing import cast
-from io import BytesIO
-
-import altair as alt
-import pandas as pd
+from datetime import date as _date
+
+from gate import require_access
+from static_assets import inject as inject_styles
+
+# Kill switch, time window and event code / signed link
+require_access()
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, cast
+
+import dataset_cache
+from aggregates import Bucket, audit_columns, get_aggregates, rating_columns
+from exports import FORMATS, export_key, get_exports
+from journal import get_journal
+from lazy_imports import lazy_module
+from materializer import get_materializer
+from near_duplicates import get_near_duplicates
+from raw_grid import PAGE_SIZES, GridQuery, highlight_page, page_count, window
+from repository import CsvRepository, SurveyRepository, get_repository
+from shared_cache import cached_query, get_shared_cache, session_footprint
+from storage import AUDIT_COLUMNS, TEXT_COLUMNS
+from survey_schema import get_schema
+from text_analytics import SECTION_LABELS, get_text_analytics
+from text_index import get_text_index
+
+# Loaded on first use, so the overview is on screen before the first chart needs them
+alt = lazy_module("altair")
+pd = lazy_module("pandas")
 
 st.set_page_config(page_title="Training Feedback Survey Results", layout="wide")
 
-DATA_FILE = "Updated_Training_Feedback_Survey_Template.csv"
+SCHEMA = get_schema()
 
+# Fold any journaled submissions into the master files before reading them
+get_journal()
 
-def render_results_dashboard() -> None:
-    st.markdown(
-        """
-        <style>
-            .stApp {
-                background: linear-gradient(135deg, #2F1B14 0%, #8B2635 50%, #2F1B14 100%);
-                min-height: 100vh;
-            }
-
-            main .block-container {
-                max-width: min(1200px, 96vw);
-                margin: 0 auto;
-                padding: clamp(1.25rem, 2vw, 2.5rem) clamp(0.75rem, 4vw, 2.25rem) 4rem;
-            }
-
-            section[data-testid="stSidebar"] {
-                background: rgba(30, 15, 20, 0.85);
-                backdrop-filter: blur(6px);
-            }
-
-            section[data-testid="stSidebar"] * {
-                color: #F8F6F0 !important;
-            }
-
-            .main-header {
-                background: linear-gradient(135deg, #2F1B14 0%, #8B2635 50%, #2F1B14 100%);
-                background-size: 200% 200%;
-                animation: gradientShift 4s ease infinite;
-                padding: 2rem;
-                border-radius: 15px;
-                text-align: center;
-                margin: 2rem auto;
-                box-shadow: 
-                    0 0 20px rgba(139, 38, 53, 0.4),
-                    0 0 40px rgba(47, 27, 20, 0.3),
-                    0 0 60px rgba(139, 38, 53, 0.2),
-                    0 8px 32px rgba(0,0,0,0.2);
-                border: 1px solid rgba(255,255,255,0.3);
-                position: relative;
-                overflow: hidden;
-                max-width: 960px;
-            }
-
-            .main-header::before {
-                content: '';
-                position: absolute;
-                top: -50%;
-                left: -50%;
-                width: 200%;
-                height: 200%;
-                background: radial-gradient(circle, rgba(255,255,255,0.1) 0%, transparent 70%);
-                animation: rotate 8s linear infinite;
-                pointer-events: none;
-            }
-
-            .main-header h1 {
-                color: white;
-                margin: 0;
-                font-size: 2.5em;
-                text-shadow: 
-                    0 0 10px rgba(255,255,255,0.5),
-                    2px 2px 4px rgba(0,0,0,0.7);
-                position: relative;
-                z-index: 2;
-            }
-
-            .main-header h3 {
-                color: rgba(255,255,255,0.95);
-                margin: 10px 0 0 0;
-                font-weight: 300;
-                text-shadow: 
-                    1px 1px 2px rgba(0,0,0,0.5);
-                position: relative;
-                z-index: 2;
-            }
-
-            .gradient-header {
-                background: linear-gradient(135deg, #8B2635 0%, #2F1B14 50%, #8B2635 100%);
-                background-size: 200% 200%;
-                animation: gradientText 3s ease infinite;
-                color: white;
-                text-align: center;
-                font-weight: 700;
-                font-size: 1.3em;
-                margin: 2rem auto 1rem auto;
-                padding: 1.2rem 1.5rem;
-                border-radius: 12px;
-                box-shadow: 
-                    0 0 15px rgba(139, 38, 53, 0.3),
-                    0 0 30px rgba(47, 27, 20, 0.2),
-                    0 4px 15px rgba(0,0,0,0.2);
-                border: 1px solid rgba(255,255,255,0.2);
-                text-shadow: 1px 1px 2px rgba(0,0,0,0.5);
-                max-width: 960px;
-            }
-
-            .sub-header {
-                color: #FDF6F0;
-                font-weight: 600;
-                text-shadow: 1px 1px 2px rgba(0,0,0,0.5);
-                margin: 1.5rem 0 0.5rem 0;
-            }
-
-            div[data-testid="metric-container"] {
-                background: rgba(255,255,255,0.08);
-                border-radius: 12px;
-                padding: 1rem;
-                box-shadow: 0 6px 20px rgba(0,0,0,0.25);
-                border: 1px solid rgba(255,255,255,0.15);
-            }
-
-            div[data-testid="metric-container"] * {
-                color: #FFFFFF !important;
-            }
-
-            div[data-testid="stDataFrame"] div {
-                color: #1E1E1E !important;
-            }
-
-            @keyframes gradientShift {
-                0% { background-position: 0% 50%; }
-                50% { background-position: 100% 50%; }
-                100% { background-position: 0% 50%; }
-            }
-
-            @keyframes gradientText {
-                0% { background-position: 0% 50%; }
-                50% { background-position: 100% 50%; }
-                100% { background-position: 0% 50%; }
-            }
-
-            @keyframes rotate {
-                0% { transform: rotate(0deg); }
-                100% { transform: rotate(360deg); }
-            }
-
-            /* Responsive layout adjustments */
-            @media (max-width: 1024px) {
-                main .block-container {
-                    padding: 1.5rem 1.5rem 3.25rem;
-                }
-
-                .main-header {
-                    margin: 1.75rem auto;
-                    padding: 1.75rem 1.25rem;
-                }
-
-                .gradient-header {
-                    margin: 1.5rem auto 0.75rem auto;
-                    padding: 1rem 1.5rem;
-                }
-            }
-
-            @media (max-width: 768px) {
-                main .block-container {
-                    padding: 1.25rem 0.85rem 2.75rem;
-                }
-
-                .main-header {
-                    margin: 1.35rem auto 0.75rem auto;
-                    padding: 1.5rem 1rem;
-                }
-
-                .main-header h1 {
-                    font-size: 1.9em;
-                }
-
-                .main-header h3 {
-                    font-size: 1.1em;
-                }
-
-                .gradient-header {
-                    font-size: 1.1em;
-                    margin: 1.25rem auto 0.5rem auto;
-                    padding: 0.95rem 1.1rem;
-                }
-
-                div[data-testid="metric-container"] {
-                    margin-bottom: 0.75rem;
-                }
-
-                [data-testid="column"] {
-                    flex: 1 1 100% !important;
-                    min-width: 100% !important;
-                }
-            }
-
-            @media (max-width: 540px) {
-                main .block-container {
-                    padding: 1.1rem 0.65rem 2.5rem;
-                }
-
-                .main-header h1 {
-                    font-size: 1.75em;
-                }
-
-                .gradient-header {
-                    padding: 0.85rem 1rem;
-                }
-            }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
 
-    st.markdown(
-        """
-        <div class="main-header">
-            <h1>📊 Training Feedback Survey Results</h1>
-            <h3>Excellence Through Training - Data Analytics Dashboard</h3>
-        </div>
-        """,
-        unsafe_allow_html=True,
+def render_download(fmt: str, artifact: Any) -> None:
+    label, _, mime = FORMATS[fmt]
+    st.download_button(
+        label=f"{'📄' if fmt == 'csv' else '📊'} Download as {label}",
+        data=artifact.data,
+        file_name=artifact.file_name,
+        mime=mime,
+        help=f"Download the {artifact.rows:,} filtered responses (built {artifact.created.strftime('%I:%M:%S %p')})",
+        use_container_width=True,
+        key=f"download_{fmt}",
     )
 
-    if not os.path.exists(DATA_FILE):
-        st.error("📂 No survey data file found. Please ensure survey responses have been submitted.")
-        st.info("💡 **Next Steps:** Navigate to the Survey page to submit your first response!")
-        st.stop()
 
-    df: pd.DataFrame = pd.read_csv(DATA_FILE)
-    
-    # Check if there's actual data beyond headers
-    if len(df) == 0:
-        st.warning("📋 Survey data file exists but contains no responses yet.")
-        st.info("💡 **Next Steps:** Navigate to the Survey page to submit your first response!")
-        st.stop()
-    
-    if "Timestamp" in df.columns:
-        df["Timestamp"] = pd.to_datetime(df["Timestamp"], errors="coerce")
+def render_export_control(fmt: str, key: str, load_rows: Callable[[], Any]) -> None:
+    """Download button for one export format, building the file only on request."""
+    label = FORMATS[fmt][0]
+    manager = get_exports()
+    artifact = manager.get(key)
 
-    # Sidebar Filters with improved styling
-    st.sidebar.markdown("### 🔍 Filters")
-    st.sidebar.markdown("---")
-    
-    cscs = sorted(df.get("CSC", pd.Series([])).dropna().unique().tolist())
-    csc_filter = st.sidebar.multiselect(
-        "🏢 Select CSC(s)", 
-        options=cscs, 
-        default=cscs,
-        help="Filter responses by Customer Service Center"
-    )
+    if artifact is None and manager.job(key) is None:
+        if not st.button(f"⚙️ Prepare {label} export", key=f"prepare_{fmt}", use_container_width=True,
+                         help=f"Build a {label} file of the filtered results"):
+            return
+        rows = load_rows()
+        if len(rows) <= manager.background_rows:
+            artifact = manager.build(key, rows, fmt)
+        else:
+            manager.submit(key, rows, fmt)
+
+    if artifact is not None:
+        render_download(fmt, artifact)
+        return
+
+    # Poll the worker in a nested fragment: only this control reruns, and it
+    # swaps its progress bar for the download button once the file is ready
+    @st.fragment(run_every=1.0)
+    def export_progress() -> None:
+        finished = manager.get(key)
+        job = manager.job(key)
+        if finished is not None:
+            render_download(fmt, finished)
+        elif job is None:
+            st.info(f"The {label} export is no longer cached; prepare it again after the next refresh.")
+        elif job.error:
+            st.error(f"{label} export failed: {job.error}")
+            if st.button(f"🔁 Retry {label} export", key=f"retry_{fmt}", use_container_width=True):
+                manager.submit(key, load_rows(), fmt)
+                st.rerun(scope="fragment")
+        else:
+            st.progress(job.progress, text=f"Building {label} export of {job.rows:,} rows… {job.progress:.0%}")
 
-    date_min = df.get("Timestamp", pd.Series([pd.NaT])).min()
-    date_max = df.get("Timestamp", pd.Series([pd.NaT])).max()
-    start_date, end_date = None, None
-    if pd.notna(date_min) and pd.notna(date_max):
-        st.sidebar.markdown("📅 **Date Range**")
-        start_date = cast(_date, st.sidebar.date_input("From", date_min.date()))
-        end_date = cast(_date, st.sidebar.date_input("To", date_max.date()))
+    export_progress()
 
-    # Apply filters
-    mask = pd.Series([True] * len(df))
-    if csc_filter:
-        mask &= df["CSC"].isin(csc_filter)
-    if start_date and end_date and "Timestamp" in df.columns:
-        mask &= (df["Timestamp"] >= pd.Timestamp(start_date)) & (
-            df["Timestamp"] < pd.Timestamp(end_date) + pd.Timedelta(days=1)
-        )
 
-    fdf = df[mask].copy()
-    
-    if len(fdf) == 0:
-        st.warning("🚫 No data matches the current filters. Please adjust your filter criteria.")
-        st.stop()
+class DashboardFilters(NamedTuple):
+    """Sidebar filter state, passed explicitly to every dashboard section."""
 
+    cscs: Tuple[str, ...]
+    start: Optional[_date]
+    end: Optional[_date]
+
+
+def render_overview(summary: Bucket, csc_totals: Dict[str, int], rating_cols: List[str], columns: List[str]) -> None:
+    """Headline metrics."""
     # Overview with improved metrics
     st.markdown('<div class="gradient-header">📈 Overview</div>', unsafe_allow_html=True)
     col1, col2, col3, col4 = st.columns(4)
@@ -332,21 +107,21 @@ def render_results_dashboard() -> None:
     with col1:
         st.metric(
             label="📋 Total Responses", 
-            value=f"{len(fdf):,}",
+            value=f"{summary.count:,}",
             help="Total number of survey responses matching current filters"
         )
     
     with col2:
-        if "CSC" in fdf.columns:
+        if "CSC" in columns:
             st.metric(
                 label="🏢 Unique CSCs", 
-                value=f"{fdf['CSC'].nunique():,}",
+                value=f"{len(csc_totals):,}",
                 help="Number of different Customer Service Centers represented"
             )
     
     with col3:
-        if "Timestamp" in fdf.columns and not fdf["Timestamp"].isna().all():
-            latest_date = fdf["Timestamp"].max()
+        if "Timestamp" in columns and summary.latest is not None:
+            latest_date = summary.latest
             if pd.notna(latest_date):
                 st.metric(
                     label="📅 Latest Response", 
@@ -355,9 +130,8 @@ def render_results_dashboard() -> None:
                 )
     
     with col4:
-        rating_cols = [c for c in fdf.columns if "Confidence" in c or c == "AI_Survey_Experience_Rating"]
         if rating_cols:
-            overall_avg = fdf[rating_cols].mean(numeric_only=True).mean()
+            overall_avg = pd.Series([summary.mean(c) for c in rating_cols]).mean()
             if pd.notna(overall_avg):
                 st.metric(
                     label="⭐ Avg Rating", 
@@ -365,78 +139,71 @@ def render_results_dashboard() -> None:
                     help="Average rating across all confidence and experience metrics"
                 )
 
+
+def render_csc_chart(csc_totals: Dict[str, int]) -> None:
+    """Responses per CSC."""
     # CSC distribution with improved styling
-    if "CSC" in fdf.columns and not fdf["CSC"].dropna().empty:
-        st.markdown('<div class="gradient-header">🏢 Responses by Customer Service Center</div>', unsafe_allow_html=True)
-        csc_counts = fdf["CSC"].value_counts().reset_index()
-        csc_counts.columns = ["CSC", "Responses"]
-        
-        chart = alt.Chart(csc_counts).mark_bar(
-            color='#8B2635',
-            cornerRadiusTopLeft=3,
-            cornerRadiusTopRight=3
-        ).encode(
-            x=alt.X("CSC:N", sort="-y", title="Customer Service Center"),
-            y=alt.Y("Responses:Q", title="Number of Responses", axis=alt.Axis(tickMinStep=1)),
-            tooltip=["CSC", "Responses"],
-        ).properties(
-            height=400,
-            title="Distribution of Survey Responses by CSC"
-        )
-        st.altair_chart(chart, use_container_width=True)
+    st.markdown('<div class="gradient-header">🏢 Responses by Customer Service Center</div>', unsafe_allow_html=True)
+    csc_counts = pd.DataFrame(list(csc_totals.items()), columns=["CSC", "Responses"])
+    
+    chart = alt.Chart(csc_counts).mark_bar(
+        color='#8B2635',
+        cornerRadiusTopLeft=3,
+        cornerRadiusTopRight=3
+    ).encode(
+        x=alt.X("CSC:N", sort="-y", title="Customer Service Center"),
+        y=alt.Y("Responses:Q", title="Number of Responses", axis=alt.Axis(tickMinStep=1)),
+        tooltip=["CSC", "Responses"],
+    ).properties(
+        height=400,
+        title="Distribution of Survey Responses by CSC"
+    )
+    st.altair_chart(chart, use_container_width=True)
+
 
+def render_confidence_chart(summary: Bucket, rating_cols: List[str]) -> None:
+    """Average slider ratings per training area."""
     # Average Ratings with improved visualization
-    rating_cols = [c for c in fdf.columns if "Confidence" in c or c == "AI_Survey_Experience_Rating"]
-    if rating_cols:
-        st.markdown('<div class="gradient-header">⭐ Average Confidence Ratings</div>', unsafe_allow_html=True)
-        avgs = fdf[rating_cols].mean(numeric_only=True).reset_index()
-        avgs.columns = ["Question", "Average"]
-        # Clean up column names for better display
-        avgs["Question"] = avgs["Question"].str.replace("_", " ").str.replace("Ai ", "AI ").str.replace("Fdr1 And Dlid", "FDRI/DLID").str.replace("Title Class", "Title Class").str.replace("Driver Examiner", "Driver examiner").str.replace("Advanced Vdh Fdr Ii Fdr Iii", "Advanced VDH FDRII")
-        # Custom sort order with Title Class first
-        sort_order = {"Title Class Confidence": 0, "FDRI/DLID Confidence": 1, "Driver examiner Confidence": 2, "Compliance Confidence": 3, "Advanced VDH FDRII Confidence": 4, "AI Survey Experience Rating": 5}
-        avgs["sort_key"] = avgs["Question"].map(sort_order).fillna(999)
-        avgs = avgs.sort_values("sort_key").drop("sort_key", axis=1)
-        
-        chart = alt.Chart(avgs).mark_bar(
-            color='#2F1B14',
-            cornerRadiusTopLeft=3,
-            cornerRadiusTopRight=3
-        ).encode(
-            y=alt.Y("Question:N", sort="-x", title="Training Area"),
-            x=alt.X("Average:Q", title="Average Rating", scale=alt.Scale(domain=[0, 5]), axis=alt.Axis(tickMinStep=1)),
-            tooltip=["Question", alt.Tooltip("Average:Q", format=".2f")],
-        ).properties(
-            height=max(300, len(avgs) * 50),
-            title="Average Confidence Ratings by Training Area"
-        )
-        st.altair_chart(chart, use_container_width=True)
+    st.markdown('<div class="gradient-header">⭐ Average Confidence Ratings</div>', unsafe_allow_html=True)
+    # Rating columns come in survey order, labelled and scaled by the schema
+    avgs = pd.DataFrame({
+        "Question": [SCHEMA.label(c) for c in rating_cols],
+        "Average": [summary.mean(c) for c in rating_cols],
+        "Scale": [f"{SCHEMA.questions[c].scale[0]}-{SCHEMA.questions[c].scale[1]}" for c in rating_cols],
+    })
+    top = max(SCHEMA.questions[c].scale[1] for c in rating_cols)
+
+    chart = alt.Chart(avgs).mark_bar(
+        color='#2F1B14',
+        cornerRadiusTopLeft=3,
+        cornerRadiusTopRight=3
+    ).encode(
+        y=alt.Y("Question:N", sort="-x", title="Training Area"),
+        x=alt.X("Average:Q", title="Average Rating", scale=alt.Scale(domain=[0, top]), axis=alt.Axis(tickMinStep=1)),
+        tooltip=["Question", alt.Tooltip("Average:Q", format=".2f"), "Scale"],
+    ).properties(
+        height=max(300, len(avgs) * 50),
+        title="Average Confidence Ratings by Training Area"
+    )
+    st.altair_chart(chart, use_container_width=True)
+
 
+def render_skills(summary: Bucket, columns: List[str]) -> None:
+    """Most important skills per training area."""
     # Skills Breakdown with improved layout
-    section_skill_cols = {
-        "🎯 Title Class": "Title_Class_Skills_Important",
-        "🚗 FDRI/DLID": "FDR1_and_DLID_Skills_Important",
-        "👨‍💼 Driver Examiner": "Driver_Examiner_Skills_Important",
-        "✅ Compliance": "Compliance_Skills_Important",
-        "🚀 Advanced VDH FDRII": "Advanced_VDH_FDR_II_FDR_III_Skills_Important",
-    }
-    
-    skills_data_exists = False
-    for section, col in section_skill_cols.items():
-        if col in fdf.columns and not fdf[col].dropna().empty:
-            skills_data_exists = True
-            break
+    skill_cols = SCHEMA.plans["options"]
+    skills_data_exists = any(col in columns and summary.value_counts(col) for col in skill_cols)
     
     if skills_data_exists:
         st.markdown('<div class="gradient-header">🎯 Skills Priority Analysis</div>', unsafe_allow_html=True)
         
-        tabs = st.tabs(list(section_skill_cols.keys()))
+        tabs = st.tabs([f"{SCHEMA.section_of[col].icon} {SCHEMA.section_of[col].label}" for col in skill_cols])
         
-        for i, (section, col) in enumerate(section_skill_cols.items()):
+        for i, col in enumerate(skill_cols):
+            section = SCHEMA.section_of[col].label
             with tabs[i]:
-                if col in fdf.columns and not fdf[col].dropna().empty:
-                    counts = fdf[col].value_counts().reset_index()
-                    counts.columns = ["Option", "Count"]
+                if col in columns and summary.value_counts(col):
+                    counts = pd.DataFrame(summary.value_counts(col), columns=["Option", "Count"])
                     
                     chart = alt.Chart(counts).mark_bar(
                         color='#8B2635',
@@ -448,43 +215,29 @@ def render_results_dashboard() -> None:
                         tooltip=["Option", "Count"],
                     ).properties(
                         height=max(200, len(counts) * 30),
-                        title=f"Most Important Skills - {section.replace('🎯 ', '').replace('🚗 ', '').replace('👨‍💼 ', '').replace('✅ ', '').replace('🚀 ', '')}"
+                        title=f"Most Important Skills - {section}"
                     )
                     st.altair_chart(chart, use_container_width=True)
                 else:
                     st.info(f"No data available for {section} skills yet.")
 
+
+def render_audit(repo: SurveyRepository, filters: DashboardFilters, summary: Bucket, columns: List[str]) -> None:
+    """Audit flag breakdown with clustered details."""
     # Audit Issues Breakdown with improved presentation
-    audit_cols = [c for c in fdf.columns if c.endswith("_Audit_Issues")]
+    audit_cols = audit_columns(columns)
     if audit_cols:
         st.markdown('<div class="gradient-header">🔍 Audit Issues Analysis</div>', unsafe_allow_html=True)
         
-        audit_sections = []
-        for col in audit_cols:
-            section_name = col.replace("_Audit_Issues", "").replace("_", " ")
-            # Standardize the section names to match Skills Priority Analysis
-            if "Title Class" in section_name:
-                section_name = "Title Class"
-            elif "FDR1 and DLID" in section_name or "Fdr1 And Dlid" in section_name:
-                section_name = "FDRI/DLID"
-            elif "Driver Examiner" in section_name:
-                section_name = "Driver Examiner"
-            elif "Compliance" in section_name:
-                section_name = "Compliance"
-            elif "Advanced" in section_name or "FDR_II_FDR_III" in section_name:
-                section_name = "Advanced VDH FDRII"
-            audit_sections.append(section_name)
-        
+        audit_sections = [SCHEMA.section_of[col].label for col in audit_cols]
         audit_tabs = st.tabs(audit_sections)
         
         for i, col in enumerate(audit_cols):
             with audit_tabs[i]:
                 section_name = audit_sections[i]
                 
-                # Extract Yes/No responses
-                audit_split = fdf[col].fillna("").apply(lambda x: x.split(" - ")[0].strip() if x else "No Response")
-                counts = audit_split.value_counts().reset_index()
-                counts.columns = ["Response", "Count"]
+                # Yes/No responses
+                counts = pd.DataFrame(summary.value_counts(col), columns=["Response", "Count"])
 
                 if not counts.empty:
                     chart = alt.Chart(counts).mark_arc(
@@ -502,69 +255,284 @@ def render_results_dashboard() -> None:
                     st.altair_chart(chart, use_container_width=True)
 
                     # Show detailed issues for Yes responses
-                    yes_responses = audit_split.eq("Yes").sum()
+                    yes_responses = summary.options.get(col, {}).get("Yes", 0)
                     if yes_responses > 0:
                         st.markdown(f"### 📝 Detailed Issues ({yes_responses} responses)")
-                        issues = fdf[col].dropna().apply(lambda x: x.split(" - ", 1)[1] if " - " in x else "")
-                        issues = issues[issues != ""].reset_index(drop=True)
-                        if not issues.empty:
-                            for idx, issue in enumerate(issues, 1):
-                                st.markdown(f"**{idx}.** {issue}")
+                        full_fdf = cached_query(repo, *filters, include_text=True)
+                        # Near-identical details are collapsed into counted clusters
+                        flagged = full_fdf.loc[full_fdf[col].astype(object).eq("Yes"), "SubmissionID"]
+                        issues = get_near_duplicates().clusters(AUDIT_COLUMNS[col], flagged.astype(str))
+                        for idx, issue in enumerate(issues, 1):
+                            repeats = f" — *{issue['Responses']} responses*" if issue["Responses"] > 1 else ""
+                            st.markdown(f"**{idx}.** {issue['Answer']}{repeats}")
                     else:
                         st.success("✅ No audit issues reported for this section!")
                 else:
                     st.info("No audit issue data available for this section.")
 
-    # Enhanced Data Export Section
-    st.markdown('<div class="gradient-header">📥 Data Export & Raw Responses</div>', unsafe_allow_html=True)
-    
+
+def render_themes(filters: DashboardFilters) -> None:
+    """Precomputed themes and sentiment per training area."""
+    # Themes per training area, precomputed by the background text-analytics stage
+    st.markdown('<div class="gradient-header">🧠 Themes</div>', unsafe_allow_html=True)
+    analytics = get_text_analytics()
+    theme_tabs = st.tabs(list(SECTION_LABELS.values()))
+    for tab, (section, label) in zip(theme_tabs, SECTION_LABELS.items()):
+        with tab:
+            themes = analytics.themes(section, cscs=filters.cscs, start=filters.start, end=filters.end)
+            if not themes["documents"]:
+                st.info(f"No open-text answers analysed for {label} yet.")
+                continue
+            theme_col1, theme_col2 = st.columns(2)
+            theme_col1.metric("💬 Responses Analysed", f"{themes['documents']:,}")
+            theme_col2.metric(
+                "🙂 Average Sentiment", f"{themes['sentiment']:+.2f}",
+                help="Lexicon-based score from -1 (negative) to +1 (positive)",
+            )
+            if themes["terms"]:
+                terms_df = pd.DataFrame(themes["terms"], columns=["Term", "Weight"])
+                chart = alt.Chart(terms_df).mark_bar(
+                    color='#2F1B14',
+                    cornerRadiusTopLeft=3,
+                    cornerRadiusTopRight=3
+                ).encode(
+                    y=alt.Y("Term:N", sort="-x", title="Theme"),
+                    x=alt.X("Weight:Q", title="TF-IDF Weight"),
+                    tooltip=["Term", "Weight"],
+                ).properties(height=max(200, len(terms_df) * 25), title=f"Top Themes - {label}")
+                st.altair_chart(chart, use_container_width=True)
+            st.dataframe(pd.DataFrame(themes["per_csc"]), use_container_width=True, hide_index=True)
+    st.caption("🧠 Themes are refreshed in the background as new responses arrive.")
+
+
+@st.fragment
+def render_text_search(repo: SurveyRepository, filters: DashboardFilters) -> None:
+    """Full-text search, term frequencies and similar answers."""
+    # Full-text search over the open-text answers (served from the persisted inverted index)
+    st.markdown('<div class="gradient-header">🔎 Search Open-Text Answers</div>', unsafe_allow_html=True)
+    text_index = get_text_index()
+    text_fields = [f for f in text_index.fields if f in TEXT_COLUMNS]
+    search_col1, search_col2 = st.columns([2, 1])
+    with search_col1:
+        search_query = st.text_input("Search answers", key="text_search", placeholder="e.g. long lines, refund, scanner")
+    with search_col2:
+        search_fields = st.multiselect(
+            "Questions", text_fields, format_func=SCHEMA.label, key="text_search_fields",
+            help="Leave empty to search every open-text question",
+        )
+    if search_query.strip():
+        hits = text_index.search(search_query, limit=50, fields=search_fields, cscs=filters.cscs, start=filters.start, end=filters.end)
+        if hits:
+            results = pd.DataFrame(hits)
+            results["Field"] = results["Field"].map(SCHEMA.label)
+            st.dataframe(results, use_container_width=True, hide_index=True)
+        else:
+            st.info("No answers match that search.")
+
+    st.markdown('<div class="sub-header">🔤 Most Frequent Terms</div>', unsafe_allow_html=True)
+    terms_field = st.selectbox("Question", text_fields, format_func=SCHEMA.label, key="terms_field")
+    terms = text_index.top_terms(terms_field, limit=15, cscs=filters.cscs, start=filters.start, end=filters.end)
+    if terms:
+        terms_df = pd.DataFrame(terms, columns=["Term", "Count"])
+        chart = alt.Chart(terms_df).mark_bar(
+            color='#8B2635',
+            cornerRadiusTopLeft=3,
+            cornerRadiusTopRight=3
+        ).encode(
+            y=alt.Y("Term:N", sort="-x", title="Term"),
+            x=alt.X("Count:Q", title="Occurrences", axis=alt.Axis(tickMinStep=1)),
+            tooltip=["Term", "Count"],
+        ).properties(height=max(200, len(terms_df) * 25))
+        st.altair_chart(chart, use_container_width=True)
+    else:
+        st.info("No answers to this question yet.")
+
+    fdf = cached_query(repo, *filters)
+    similar = get_near_duplicates().clusters(terms_field, fdf["SubmissionID"].astype(str))
+    repeated = [c for c in similar if c["Responses"] > 1]
+    with st.expander(f"🧩 Similar answers ({len(repeated)} groups of repeated answers)"):
+        if similar:
+            st.dataframe(pd.DataFrame(similar[:50]), use_container_width=True, hide_index=True)
+        else:
+            st.info("No answers to this question yet.")
+
+
+@st.fragment
+def render_raw_data(repo: SurveyRepository, filters: DashboardFilters) -> None:
+    """Paginated raw responses behind a toggle."""
     # Toggle for showing raw data
     show_raw_data = st.checkbox("🔍 Show Raw Response Data", help="Display the complete survey responses in table format")
-    
+
     if show_raw_data:
+        full_fdf = cached_query(repo, *filters, include_text=True)
         st.markdown('<div class="sub-header">📋 Complete Survey Responses</div>', unsafe_allow_html=True)
-        st.dataframe(
-            fdf.style.highlight_max(axis=0, color='lightgreen'),
-            use_container_width=True,
-            height=400
+        all_columns = list(full_fdf.columns)
+        grid_col1, grid_col2, grid_col3 = st.columns([2, 1, 1])
+        with grid_col1:
+            shown_columns = st.multiselect("Columns", all_columns, default=all_columns, key="raw_columns")
+        with grid_col2:
+            sort_by = st.selectbox("Sort by", ["(none)", *all_columns], key="raw_sort_by")
+        with grid_col3:
+            descending = st.toggle("Descending", value=False, key="raw_descending")
+        search_col1, search_col2, search_col3 = st.columns([1, 2, 1])
+        with search_col1:
+            search_column = st.selectbox("Search in", all_columns, key="raw_search_column")
+        with search_col2:
+            search_text = st.text_input("Contains", key="raw_search_text", placeholder="Type to filter rows")
+        with search_col3:
+            page_size = st.selectbox("Rows per page", PAGE_SIZES, key="raw_page_size")
+
+        grid_query = GridQuery(
+            columns=shown_columns,
+            sort_by=None if sort_by == "(none)" else sort_by,
+            ascending=not descending,
+            search_column=search_column,
+            search_text=search_text,
+            page=int(st.session_state.get("raw_page", 1)),
+            page_size=page_size,
         )
-    
+        page_rows, matching = window(full_fdf, grid_query)
+        pages = page_count(matching, page_size)
+        # Keep the pager in range when a search or filter shrinks the result
+        grid_query.page = min(grid_query.page, pages)
+        st.session_state["raw_page"] = grid_query.page
+
+        first_row = (grid_query.page - 1) * page_size + 1
+        st.dataframe(highlight_page(page_rows), use_container_width=True, height=400)
+        pager_col1, pager_col2 = st.columns([1, 3])
+        with pager_col1:
+            st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, step=1, key="raw_page")
+        with pager_col2:
+            if matching:
+                st.caption(f"Showing rows {first_row:,}–{first_row + len(page_rows) - 1:,} of {matching:,}")
+            else:
+                st.caption("No rows match the search")
+
+
+@st.fragment
+def render_exports(repo: SurveyRepository, filters: DashboardFilters) -> None:
+    """Excel master status and on-demand downloads."""
     # Export buttons with improved styling
     st.markdown('<div class="sub-header">💾 Download Options</div>', unsafe_allow_html=True)
+    materializer = get_materializer()
+    excel_refreshed = materializer.freshness()
+    if excel_refreshed:
+        status = "refresh pending" if materializer.is_stale() else "up to date"
+        st.caption(f"📊 Excel master last refreshed {excel_refreshed.strftime('%m/%d/%Y %I:%M:%S %p')} ({status})")
+    else:
+        st.caption("📊 Excel master has not been generated yet")
+    # Exports are built on request and cached per dataset version and filter state
+    def load_export_rows() -> Any:
+        return cached_query(repo, *filters, include_text=True)
+
+    dataset_version = repo.version()
     col1, col2 = st.columns(2)
-    
-    with col1:
-        csv_data = fdf.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            label="📄 Download as CSV",
-            data=csv_data,
-            file_name=f"survey_results_filtered_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv",
-            help="Download filtered results as comma-separated values file",
-            use_container_width=True
-        )
-    
-    with col2:
-        # Fix Excel export using BytesIO
-        excel_buffer = BytesIO()
-        fdf.to_excel(excel_buffer, index=False, engine="openpyxl")
-        excel_data = excel_buffer.getvalue()
-        
-        st.download_button(
-            label="📊 Download as Excel",
-            data=excel_data,
-            file_name=f"survey_results_filtered_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            help="Download filtered results as Excel spreadsheet",
-            use_container_width=True
-        )
-    
+    for column, fmt in ((col1, "csv"), (col2, "xlsx")):
+        with column:
+            key = export_key(dataset_version, fmt, *filters)
+            render_export_control(fmt, key, load_export_rows)
+
+
+def render_summary_statistics(summary: Bucket, rating_cols: List[str]) -> None:
+    """describe() of the rating columns."""
     # Summary statistics
     st.markdown('<div class="sub-header">📊 Summary Statistics</div>', unsafe_allow_html=True)
     if rating_cols:
-        summary_stats = fdf[rating_cols].describe()
+        summary_stats = summary.describe(rating_cols)
         st.dataframe(summary_stats.round(2), use_container_width=True)
 
 
+def render_results_dashboard() -> None:
+    inject_styles("results")
+
+    st.markdown(
+        """
+        <div class="main-header">
+            <h1>📊 Training Feedback Survey Results</h1>
+            <h3>Excellence Through Training - Data Analytics Dashboard</h3>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    repo = get_repository()
+    if not repo.exists():
+        st.error("📂 No survey data file found. Please ensure survey responses have been submitted.")
+        st.info("💡 **Next Steps:** Navigate to the Survey page to submit your first response!")
+        st.stop()
+
+    # Check if there's actual data beyond headers
+    if repo.count() == 0:
+        st.warning("📋 Survey data file exists but contains no responses yet.")
+        st.info("💡 **Next Steps:** Navigate to the Survey page to submit your first response!")
+        st.stop()
+
+    # Sidebar Filters with improved styling
+    st.sidebar.markdown("### 🔍 Filters")
+    st.sidebar.markdown("---")
+    
+    cscs = repo.csc_values()
+    csc_filter = st.sidebar.multiselect(
+        "🏢 Select CSC(s)", 
+        options=cscs, 
+        default=cscs,
+        help="Filter responses by Customer Service Center"
+    )
+
+    date_min, date_max = repo.timestamp_bounds()
+    start_date, end_date = None, None
+    if pd.notna(date_min) and pd.notna(date_max):
+        st.sidebar.markdown("📅 **Date Range**")
+        start_date = cast(_date, st.sidebar.date_input("From", date_min.date()))
+        end_date = cast(_date, st.sidebar.date_input("To", date_max.date()))
+
+    if st.sidebar.checkbox("📦 Show memory footprint"):
+        if isinstance(repo, CsvRepository):
+            footprint = dataset_cache.memory_footprint(repo.csv_file)
+            st.sidebar.caption(
+                f"Typed dataset: {footprint['compact'] / 1e6:.2f} MB "
+                f"(+{footprint['text'] / 1e6:.2f} MB open text when loaded) · "
+                f"default dtypes: ~{footprint['default'] / 1e6:.2f} MB"
+            )
+        cache_stats = get_shared_cache().stats()
+        st.sidebar.caption(
+            f"Shared derived data: {cache_stats['bytes'] / 2**20:.2f} of {cache_stats['budget'] / 2**20:.0f} MB "
+            f"({cache_stats['entries']} artifacts, {cache_stats['evictions']} evicted) · "
+            f"this session: {session_footprint(st.session_state) / 1e3:.1f} kB private state"
+        )
+
+    # Apply filters (indexed query on the SQLite backend)
+    fdf = cached_query(repo, csc_filter, start_date, end_date)
+    
+    if len(fdf) == 0:
+        st.warning("🚫 No data matches the current filters. Please adjust your filter criteria.")
+        st.stop()
+
+
+    # Dashboard metrics are answered from the merged (CSC, day) aggregate buckets
+    summary, csc_totals = get_aggregates().select(cscs=csc_filter, start=start_date, end=end_date)
+    rating_cols = rating_columns(fdf.columns)
+    columns = list(fdf.columns)
+    filters = DashboardFilters(tuple(csc_filter), start_date, end_date)
+
+    # Sections that own widgets are fragments, so using one reruns only that section
+    render_overview(summary, csc_totals, rating_cols, columns)
+    if "CSC" in columns and csc_totals:
+        render_csc_chart(csc_totals)
+    if rating_cols:
+        render_confidence_chart(summary, rating_cols)
+    render_skills(summary, columns)
+    render_audit(repo, filters, summary, columns)
+    render_themes(filters)
+    render_text_search(repo, filters)
+
+    # Enhanced Data Export Section
+    st.markdown('<div class="gradient-header">📥 Data Export & Raw Responses</div>', unsafe_allow_html=True)
+    
+    render_raw_data(repo, filters)
+    render_exports(repo, filters)
+    render_summary_statistics(summary, rating_cols)
+
+
 if __name__ == "__main__":
     render_results_dashboard()
@@ -0,0 +1,177 @@
+"""QR codes for the current event's survey link, rendered once and cached on disk.
+
+A code is described by a ``QrSpec`` (URL, format, module scale, border).
+Rendered PNG/SVG files are stored in ``static/qr/`` under a hash of the spec,
+so the Home page links a file Streamlit already serves instead of encoding or
+uploading an image per session. Entries past ``SURVEY_QR_CACHE_FILES``
+(default 64) are evicted least-recently-used. Encoding uses ``segno`` and runs
+offline; ``python qr_codes.py --bench`` times a first render against cached
+lookups.
+"""
+
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Optional
+import hashlib
+import json
+import os
+import threading
+import time
+
+import gate
+from utils import _get_secret
+
+ROOT = Path(__file__).resolve().parent
+CACHE_DIR = ROOT / "static" / "qr"
+CACHE_URL = "app/static/qr"
+FORMATS = ("png", "svg")
+# Tokens in cached codes expire on whole hours, so the code only changes hourly
+_EXPIRY_STEP = 3600
+
+
+@dataclass(frozen=True)
+class QrSpec:
+    url: str
+    fmt: str = "png"
+    scale: int = 8  # pixels per module
+    border: int = 4  # quiet zone, in modules
+
+    def key(self) -> str:
+        return hashlib.sha256(json.dumps(asdict(self), sort_keys=True).encode("utf-8")).hexdigest()[:20]
+
+    @property
+    def filename(self) -> str:
+        return f"{self.key()}.{self.fmt}"
+
+
+def render(spec: QrSpec) -> bytes:
+    """Encode ``spec`` as PNG or SVG bytes (error correction level M)."""
+    import io
+
+    import segno
+
+    if spec.fmt not in FORMATS:
+        raise ValueError(f"Unsupported QR format: {spec.fmt}")
+    buffer = io.BytesIO()
+    segno.make(spec.url, error="m", micro=False).save(buffer, kind=spec.fmt, scale=spec.scale, border=spec.border)
+    return buffer.getvalue()
+
+
+class QrCache:
+    """Rendered codes on disk, keyed by spec hash, evicted least-recently-used."""
+
+    def __init__(self, directory: Path = CACHE_DIR, max_files: int = 64) -> None:
+        self.directory = directory
+        self.max_files = max_files
+        self.renders = 0
+        self._lock = threading.Lock()
+
+    def get(self, spec: QrSpec) -> Path:
+        """Path of the rendered code, rendering it only if it is not on disk yet."""
+        path = self.directory / spec.filename
+        try:
+            # Mark as recently used; this is the whole cost of a cache hit
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            if not path.exists():
+                self.directory.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_name(path.name + ".tmp")
+                tmp.write_bytes(render(spec))
+                os.replace(tmp, path)
+                self.renders += 1
+                self._evict()
+        return path
+
+    def _evict(self) -> None:
+        entries = [p for p in self.directory.iterdir() if p.suffix.lstrip(".") in FORMATS]
+        if len(entries) <= self.max_files:
+            return
+        entries.sort(key=lambda p: p.stat().st_mtime)
+        for old in entries[:len(entries) - self.max_files]:
+            try:
+                old.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def survey_url(signed: bool = True, now: Optional[float] = None) -> str:
+    """The current event's survey link, optionally carrying a signed access token."""
+    config = gate.get_config()
+    if not signed:
+        return f"{config.public_url}/Survey"
+    if config.window is not None:
+        expires = config.window[1].timestamp()
+    else:
+        horizon = (now if now is not None else time.time()) + config.link_ttl
+        expires = (int(horizon) // _EXPIRY_STEP + 1) * _EXPIRY_STEP
+    return gate.signed_link("Survey", expires)
+
+
+_cache: Optional[QrCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_qr_cache() -> QrCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                max_files = int(_get_secret("SURVEY_QR_CACHE_FILES", "64") or 64)
+            except ValueError:
+                max_files = 64
+            _cache = QrCache(max_files=max_files)
+        return _cache
+
+
+def event_qr(fmt: str = "png", scale: int = 8, signed: Optional[bool] = None) -> Optional[Path]:
+    """Rendered code for the current event; None if it cannot be generated here.
+
+    ``signed`` defaults to ``SURVEY_QR_SIGNED`` (true): scanning the code then
+    skips the event-code prompt.
+    """
+    if signed is None:
+        signed = (_get_secret("SURVEY_QR_SIGNED", "true") or "true").lower() == "true"
+    try:
+        return get_qr_cache().get(QrSpec(survey_url(signed), fmt=fmt, scale=scale))
+    except ImportError:
+        print("segno is not installed; using the static QR code asset")
+    except OSError as e:
+        print("Could not render the QR code:", e)
+    return None
+
+
+def _benchmark(rounds: int = 1000) -> Dict[str, float]:
+    import tempfile
+
+    cache = QrCache(Path(tempfile.mkdtemp()))
+    spec = QrSpec(survey_url(True))
+    start = time.perf_counter()
+    cache.get(spec)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(rounds):
+        cache.get(QrSpec(survey_url(True)))
+    cached = (time.perf_counter() - start) / rounds
+    return {"first_render_ms": first * 1000, "cached_lookup_ms": cached * 1000, "renders": cache.renders}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render the survey QR code for the current event.")
+    parser.add_argument("--svg", action="store_true", help="write SVG instead of PNG")
+    parser.add_argument("--scale", type=int, default=8, help="pixels per module")
+    parser.add_argument("--unsigned", action="store_true", help="plain link without an access token")
+    parser.add_argument("--bench", action="store_true", help="time a first render against cached lookups")
+    args = parser.parse_args()
+    if args.bench:
+        for name, value in _benchmark().items():
+            print(f"{name:18} {value:10.3f}")
+    else:
+        url = survey_url(not args.unsigned)
+        path = get_qr_cache().get(QrSpec(url, fmt="svg" if args.svg else "png", scale=args.scale))
+        print(url)
+        print(path)
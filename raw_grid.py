@@ -0,0 +1,66 @@
+"""Windowed view over the filtered responses for the raw-data grid.
+
+Search, sort and paging run on the server so only one page of the selected
+columns is ever styled and sent to the browser.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+PAGE_SIZES = (25, 50, 100, 250)
+
+
+@dataclass
+class GridQuery:
+    columns: List[str] = field(default_factory=list)
+    sort_by: Optional[str] = None
+    ascending: bool = True
+    search_column: Optional[str] = None
+    search_text: str = ""
+    page: int = 1
+    page_size: int = PAGE_SIZES[0]
+
+
+def _contains(series: Any, text: str) -> Any:
+    """Case-insensitive substring match; categoricals only test their categories."""
+    import pandas as pd
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories.astype(str)
+        matching = categories[categories.str.contains(text, case=False, regex=False)]
+        return series.isin(matching)
+    return series.astype("string").str.contains(text, case=False, regex=False, na=False)
+
+
+def page_count(total: int, page_size: int) -> int:
+    return max(1, -(-total // page_size))
+
+
+def window(df: Any, query: GridQuery) -> Tuple[Any, int]:
+    """Return (visible page with the selected columns, number of matching rows)."""
+    index = df.index
+    text = query.search_text.strip()
+    if text and query.search_column in df.columns:
+        index = index[_contains(df[query.search_column], text).to_numpy()]
+
+    if query.sort_by in df.columns:
+        key = df.loc[index, query.sort_by]
+        if hasattr(key, "cat"):
+            key = key.astype(object)
+        index = key.sort_values(ascending=query.ascending, na_position="last", kind="stable").index
+
+    total = len(index)
+    page = min(max(query.page, 1), page_count(total, query.page_size))
+    start = (page - 1) * query.page_size
+    columns = [c for c in query.columns if c in df.columns] or list(df.columns)
+    return df.loc[index[start:start + query.page_size], columns], total
+
+
+def highlight_page(page: Any, color: str = "lightgreen") -> Any:
+    """Style the per-column maximum of the numeric columns on this page only."""
+    from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+    numeric = [c for c in page.columns if is_numeric_dtype(page[c]) and not is_bool_dtype(page[c])]
+    styler = page.style
+    return styler.highlight_max(axis=0, color=color, subset=numeric) if numeric else styler
+
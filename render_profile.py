@@ -0,0 +1,99 @@
+"""Render profiles: the full animated theme, or a low-power variant for kiosks and phones.
+
+The low-power profile (``styles/low_power.css``) swaps the infinite banner
+animations for static gradients and the layered glows for single shadows.
+The profile is chosen, in order, by:
+
+- ``?render=low`` / ``?render=full`` (remembered for the session, so a kiosk
+  URL only needs it once; ``?render=auto`` goes back to automatic),
+- ``SURVEY_RENDER_MODE`` (``auto`` by default, or ``full`` / ``low``),
+- request hints: ``Save-Data: on`` or a mobile ``Sec-CH-UA-Mobile`` client.
+
+With the full profile, the low-power rules still apply client-side under
+``prefers-reduced-motion: reduce``. ``?probe=1`` adds a frame-time probe to
+compare the two profiles on a device.
+"""
+
+from typing import Mapping, Optional
+
+from utils import _get_secret
+
+FULL = "full"
+LOW = "low"
+AUTO = "auto"
+PARAM = "render"
+PROBE_PARAM = "probe"
+_STATE_KEY = "render_profile"
+
+
+def choose(requested: Optional[str], configured: Optional[str], headers: Mapping[str, str]) -> str:
+    """The profile for a request: explicit choice, then configuration, then client hints."""
+    for choice in (requested, configured):
+        if choice in (FULL, LOW):
+            return choice
+    if headers.get("Save-Data", "").lower() == "on":
+        return LOW
+    if headers.get("Sec-CH-UA-Mobile", "") == "?1":
+        return LOW
+    return FULL
+
+
+def _headers() -> Mapping[str, str]:
+    import streamlit as st
+
+    try:
+        return st.context.headers
+    except Exception:  # noqa: BLE001 - not available outside a browser session
+        return {}
+
+
+def current() -> str:
+    """Profile for this session; a ``?render=`` parameter is remembered across pages."""
+    import streamlit as st
+
+    requested = st.query_params.get(PARAM)
+    if requested in (FULL, LOW):
+        st.session_state[_STATE_KEY] = requested
+    elif requested == AUTO:
+        st.session_state.pop(_STATE_KEY, None)
+    configured = (_get_secret("SURVEY_RENDER_MODE", AUTO) or AUTO).lower()
+    return choose(st.session_state.get(_STATE_KEY), configured, _headers())
+
+
+_PROBE_HTML = """
+<div id="probe" style="font:13px/1.4 sans-serif;color:#F8F6F0;background:#2F1B14;padding:4px 8px;border-radius:6px">
+  measuring frame times…
+</div>
+<script>
+const seconds = %(seconds)d, profile = "%(profile)s", gaps = [];
+let last = null, total = 0;
+function tick(now) {
+  if (last !== null) {
+    gaps.push(now - last);
+    total += now - last;
+  }
+  last = now;
+  if (!gaps.length || total < seconds * 1000) {
+    requestAnimationFrame(tick);
+    return;
+  }
+  gaps.sort((a, b) => a - b);
+  const pick = q => gaps[Math.min(gaps.length - 1, Math.floor(q * gaps.length))].toFixed(1);
+  const slow = gaps.filter(g => g > 33.4).length;
+  document.getElementById("probe").textContent =
+    `${profile} profile: ${gaps.length} frames in ${seconds}s, median ${pick(0.5)} ms, ` +
+    `p95 ${pick(0.95)} ms, ${(100 * slow / gaps.length).toFixed(1)}%% over 33 ms`;
+}
+requestAnimationFrame(tick);
+</script>
+"""
+
+
+def frame_probe(profile: str, seconds: int = 10) -> None:
+    """With ``?probe=1``, show frame-time statistics sampled over ``seconds`` in the browser."""
+    import streamlit as st
+    import streamlit.components.v1 as components
+
+    if st.query_params.get(PROBE_PARAM) != "1":
+        return
+    components.html(_PROBE_HTML % {"seconds": seconds, "profile": profile}, height=42)
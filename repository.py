@@ -0,0 +1,390 @@
+"""Storage repository shared by the Survey and Results pages.
+
+Pages talk to a ``SurveyRepository`` instead of hard-coding file paths and
+whole-file pandas I/O. Two backends are available, selected with the
+``SURVEY_STORAGE`` secret/env var:
+
+* ``csv`` (default) - the append-only master CSV, parsed through the
+  process-wide ``dataset_cache``.
+* ``sqlite`` - a WAL-mode SQLite database with indexes on Timestamp, CSC and
+  SubmissionID. The master CSV is still appended to as an export mirror, so the
+  Excel materializer and downloads keep working.
+"""
+
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import csv
+import os
+import sqlite3
+import threading
+
+import dataset_cache
+import filter_index
+import storage
+from utils import _get_secret
+
+DB_FILE = "survey_responses.sqlite3"
+TABLE = "responses"
+NUMERIC_SUFFIXES = ("_Confidence", "_Rating")
+
+
+def _date_bounds(start: Optional[date], end: Optional[date]) -> Tuple[Optional[str], Optional[str]]:
+    """Turn an inclusive date range into [start, end + 1 day) timestamp strings."""
+    lo = start.strftime("%Y-%m-%d 00:00:00") if start else None
+    hi = (end + timedelta(days=1)).strftime("%Y-%m-%d 00:00:00") if end else None
+    return lo, hi
+
+
+class SurveyRepository(ABC):
+    """Interface shared by every storage backend."""
+
+    @abstractmethod
+    def exists(self) -> bool:
+        ...
+
+    def insert(self, record: Dict[str, Any]) -> None:
+        self.insert_many([record])
+
+    @abstractmethod
+    def insert_many(self, records: List[Dict[str, Any]]) -> None:
+        ...
+
+    @abstractmethod
+    def existing_ids(self, ids: Iterable[str]) -> Set[str]:
+        """Return the subset of ``ids`` that are already stored."""
+
+    @abstractmethod
+    def count(self) -> int:
+        ...
+
+    @abstractmethod
+    def csc_values(self) -> List[str]:
+        ...
+
+    @abstractmethod
+    def timestamp_bounds(self) -> Tuple[Any, Any]:
+        """Earliest and latest submission timestamps (``pd.NaT`` when unknown)."""
+
+    @abstractmethod
+    def query(
+        self,
+        cscs: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        include_text: bool = False,
+    ) -> Any:
+        """Return matching responses as a compact DataFrame (see ``dataset_cache``).
+
+        An empty ``cscs`` means every CSC; ``start``/``end`` are inclusive dates.
+        Open-text columns are only included when ``include_text`` is set.
+        """
+
+    def value_counts(
+        self,
+        column: str,
+        cscs: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> Any:
+        """Per-value response counts for ``column`` as a (value, Count) DataFrame."""
+        import pandas as pd
+
+        df = self.query(cscs, start, end)
+        if column not in df.columns:
+            return pd.DataFrame(columns=[column, "Count"])
+        counts = df[column].value_counts().reset_index()
+        counts.columns = [column, "Count"]
+        return counts
+
+    def means(
+        self,
+        columns: Sequence[str],
+        cscs: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> Any:
+        """Mean of each numeric column in ``columns`` as a Series."""
+        df = self.query(cscs, start, end)
+        return df[[c for c in columns if c in df.columns]].mean(numeric_only=True)
+
+    @abstractmethod
+    def rows_since(self, cursor: Any, include_text: bool = False) -> Tuple[Any, Any, bool]:
+        """Rows stored after ``cursor`` as (frame, new cursor, reset).
+
+        ``reset`` is True when the frame is the whole dataset rather than an
+        increment, e.g. on the first call or after the store was rewritten.
+        Open-text columns are only included when ``include_text`` is set.
+        """
+
+    @abstractmethod
+    def version(self) -> str:
+        """Opaque token that changes whenever the stored responses change."""
+
+    def export_csv(self) -> bytes:
+        return self.query(include_text=True).to_csv(index=False).encode("utf-8")
+
+
+class CsvRepository(SurveyRepository):
+    """The master CSV file, appended to one row per submission."""
+
+    def __init__(self, csv_file: str = storage.CSV_FILE) -> None:
+        self.csv_file = csv_file
+
+    def exists(self) -> bool:
+        return os.path.exists(self.csv_file)
+
+    def insert_many(self, records: List[Dict[str, Any]]) -> None:
+        storage.append_submissions(records, self.csv_file)
+
+    def existing_ids(self, ids: Iterable[str]) -> Set[str]:
+        wanted = set(ids)
+        try:
+            with open(self.csv_file, "r", newline="", encoding="utf-8") as fh:
+                return {row.get("SubmissionID", "") for row in csv.DictReader(fh)} & wanted
+        except FileNotFoundError:
+            return set()
+
+    def _load(self) -> Any:
+        """Shared parsed copy of the CSV (see ``dataset_cache``); do not mutate it."""
+        return dataset_cache.load(self.csv_file)
+
+    def count(self) -> int:
+        return len(self._load()) if self.exists() else 0
+
+    def csc_values(self) -> List[str]:
+        index, _ = filter_index.for_path(self.csv_file)
+        return sorted(c for c in {*index.by_csc, *index.undated_by_csc} if c is not None)
+
+    def timestamp_bounds(self) -> Tuple[Any, Any]:
+        import pandas as pd
+
+        index, _ = filter_index.for_path(self.csv_file)
+        if not len(index.stamps):
+            return pd.NaT, pd.NaT
+        return pd.Timestamp(index.stamps[0]), pd.Timestamp(index.stamps[-1])
+
+    def version(self) -> str:
+        try:
+            st_csv = os.stat(self.csv_file)
+        except FileNotFoundError:
+            return "csv:missing"
+        return f"csv:{st_csv.st_ino}:{st_csv.st_size}:{st_csv.st_mtime_ns}"
+
+    def rows_since(self, cursor: Any, include_text: bool = False) -> Tuple[Any, Any, bool]:
+        import pandas as pd
+
+        generation, df = dataset_cache.snapshot(self.csv_file)
+        if include_text:
+            # The text part may have been cached at a different file size; align on the core rows
+            text = dataset_cache.load_text(self.csv_file)
+            df = df.iloc[:min(len(df), len(text))]
+        reset = not (cursor is not None and cursor[0] == generation and cursor[1] <= len(df))
+        start = 0 if reset else cursor[1]
+        rows = df.iloc[start:]
+        if include_text:
+            rows = pd.concat([rows, text.iloc[start:len(df)]], axis=1)
+        return rows, (generation, len(df)), reset
+
+    def query(
+        self,
+        cscs: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        include_text: bool = False,
+    ) -> Any:
+        import pandas as pd
+
+        index, df = filter_index.for_path(self.csv_file)
+        rows = filter_index.select(index, cscs, *_date_bounds(start, end))
+        # A contiguous slice stays a view of the shared frame; positions copy only the matches
+        picked = df.iloc[rows] if isinstance(rows, slice) else df.take(rows)
+        if not include_text:
+            return picked
+        # Text rows share the core frame's row labels; reindex aligns them even if one part lags
+        text = dataset_cache.load_text(self.csv_file)
+        order = [c for c in storage.read_header(self.csv_file) if c in df.columns or c in text.columns]
+        return pd.concat([picked, text.reindex(picked.index)], axis=1)[order]
+
+
+class SqliteRepository(SurveyRepository):
+    """WAL-mode SQLite store; every submission is a single-row insert."""
+
+    def __init__(self, db_file: str = DB_FILE, mirror_csv: Optional[str] = storage.CSV_FILE) -> None:
+        self.db_file = db_file
+        self.mirror_csv = mirror_csv
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._columns: List[str] = []
+        self._init_schema()
+
+    # ------------------------------------------------------------ plumbing
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _column_type(column: str) -> str:
+        return "INTEGER" if column.endswith(NUMERIC_SUFFIXES) else "TEXT"
+
+    def _core_columns(self) -> List[str]:
+        text = set(storage.TEXT_COLUMNS)
+        return [c for c in self._columns if c not in text]
+
+    def _select(self, sql: str, params: Sequence[Any]) -> Any:
+        import pandas as pd
+
+        return dataset_cache.compact(pd.read_sql_query(sql, self._conn(), params=list(params)))
+
+    def _init_schema(self) -> None:
+        conn = self._conn()
+        with self._schema_lock, conn:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {TABLE} ("SubmissionID" TEXT PRIMARY KEY)')
+            existing = [row[1] for row in conn.execute(f"PRAGMA table_info({TABLE})")]
+            for column in storage.SUBMISSION_COLUMNS:
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE {TABLE} ADD COLUMN "{column}" {self._column_type(column)}')
+                    existing.append(column)
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{TABLE}_timestamp ON {TABLE} ("Timestamp")')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{TABLE}_csc_timestamp ON {TABLE} ("CSC", "Timestamp")')
+            self._columns = existing
+
+        # First run against an existing deployment: import the master CSV once
+        if self.mirror_csv and os.path.exists(self.mirror_csv) and self.count() == 0:
+            with open(self.mirror_csv, "r", newline="", encoding="utf-8") as fh:
+                self._insert_rows(list(csv.DictReader(fh)))
+
+    def _insert_rows(self, records: List[Dict[str, Any]]) -> None:
+        if not records:
+            return
+        records = [storage.normalize_record(r) for r in records]
+        cols = self._columns
+        placeholders = ", ".join("?" for _ in cols)
+        names = ", ".join(f'"{c}"' for c in cols)
+        rows = [tuple(None if r.get(c) in (None, "") else r.get(c) for c in cols) for r in records]
+        conn = self._conn()
+        with conn:
+            conn.executemany(f"INSERT OR IGNORE INTO {TABLE} ({names}) VALUES ({placeholders})", rows)
+
+    def _where(
+        self,
+        cscs: Optional[Sequence[str]],
+        start: Optional[date],
+        end: Optional[date],
+    ) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if cscs:
+            clauses.append(f'"CSC" IN ({", ".join("?" for _ in cscs)})')
+            params.extend(cscs)
+        lo, hi = _date_bounds(start, end)
+        if lo:
+            clauses.append('"Timestamp" >= ?')
+            params.append(lo)
+        if hi:
+            clauses.append('"Timestamp" < ?')
+            params.append(hi)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    # ----------------------------------------------------------------- API
+    def exists(self) -> bool:
+        return os.path.exists(self.db_file)
+
+    def insert_many(self, records: List[Dict[str, Any]]) -> None:
+        self._insert_rows(records)
+        if self.mirror_csv:
+            storage.append_submissions(records, self.mirror_csv)
+
+    def existing_ids(self, ids: Iterable[str]) -> Set[str]:
+        wanted = list(set(ids))
+        found: Set[str] = set()
+        for i in range(0, len(wanted), 500):
+            chunk = wanted[i:i + 500]
+            sql = f'SELECT "SubmissionID" FROM {TABLE} WHERE "SubmissionID" IN ({", ".join("?" for _ in chunk)})'
+            found.update(row[0] for row in self._conn().execute(sql, chunk))
+        return found
+
+    def count(self) -> int:
+        return self._conn().execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+
+    def csc_values(self) -> List[str]:
+        sql = f'SELECT DISTINCT "CSC" FROM {TABLE} WHERE "CSC" IS NOT NULL ORDER BY "CSC"'
+        return [row[0] for row in self._conn().execute(sql)]
+
+    def timestamp_bounds(self) -> Tuple[Any, Any]:
+        import pandas as pd
+
+        lo, hi = self._conn().execute(f'SELECT MIN("Timestamp"), MAX("Timestamp") FROM {TABLE}').fetchone()
+        return pd.to_datetime(lo, errors="coerce"), pd.to_datetime(hi, errors="coerce")
+
+    def query(
+        self,
+        cscs: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        include_text: bool = False,
+    ) -> Any:
+        where, params = self._where(cscs, start, end)
+        names = ", ".join(f'"{c}"' for c in (self._columns if include_text else self._core_columns()))
+        return self._select(f'SELECT {names} FROM {TABLE}{where} ORDER BY "Timestamp"', params)
+
+    def version(self) -> str:
+        # Rows are only ever inserted (never updated in place), so these move together
+        last, total = self._conn().execute(f"SELECT MAX(rowid), COUNT(*) FROM {TABLE}").fetchone()
+        return f"sqlite:{last or 0}:{total}"
+
+    def rows_since(self, cursor: Any, include_text: bool = False) -> Tuple[Any, Any, bool]:
+        names = ", ".join(f'"{c}"' for c in (self._columns if include_text else self._core_columns()))
+        df = self._select(f'SELECT rowid AS "_rowid", {names} FROM {TABLE} WHERE rowid > ? ORDER BY rowid', [cursor or 0])
+        new_cursor = int(df["_rowid"].iloc[-1]) if len(df) else (cursor or 0)
+        return df.drop(columns="_rowid"), new_cursor, cursor is None
+
+    def value_counts(
+        self,
+        column: str,
+        cscs: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> Any:
+        import pandas as pd
+
+        where, params = self._where(cscs, start, end)
+        extra = f'{" AND" if where else " WHERE"} "{column}" IS NOT NULL'
+        sql = f'SELECT "{column}", COUNT(*) AS "Count" FROM {TABLE}{where}{extra} GROUP BY "{column}" ORDER BY 2 DESC'
+        return pd.read_sql_query(sql, self._conn(), params=params)
+
+    def means(
+        self,
+        columns: Sequence[str],
+        cscs: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> Any:
+        import pandas as pd
+
+        cols = [c for c in columns if c in self._columns]
+        if not cols:
+            return pd.Series(dtype=float)
+        where, params = self._where(cscs, start, end)
+        averages = ", ".join(f'AVG("{c}")' for c in cols)
+        row = self._conn().execute(f"SELECT {averages} FROM {TABLE}{where}", params).fetchone()
+        return pd.Series(list(row), index=cols, dtype=float)
+
+
+_repository: Optional[SurveyRepository] = None
+_repository_lock = threading.Lock()
+
+
+def get_repository() -> SurveyRepository:
+    """Return the process-wide repository for the configured ``SURVEY_STORAGE`` backend."""
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            backend = (_get_secret("SURVEY_STORAGE", "csv") or "csv").lower()
+            _repository = SqliteRepository() if backend == "sqlite" else CsvRepository()
+        return _repository
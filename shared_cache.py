@@ -0,0 +1,120 @@
+"""Process-wide cache of derived artifacts shared by every dashboard session.
+
+The parsed dataset itself lives in ``dataset_cache``; this module holds what
+is derived from it - filtered frames and export files - so sessions looking at
+the same filters read one copy instead of each keeping their own. Entries are
+evicted least-recently-used once their total size exceeds
+``SURVEY_CACHE_BUDGET_MB``. Cached values are shared and must not be mutated.
+"""
+
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence
+import sys
+import threading
+
+from utils import _get_secret
+
+
+def sizeof(value: Any) -> int:
+    """Approximate deep size in bytes of a cached value."""
+    if hasattr(value, "memory_usage") and hasattr(value, "columns"):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    data = getattr(value, "data", None)
+    if isinstance(data, (bytes, bytearray)):
+        return len(data) + sys.getsizeof(value)
+    return sys.getsizeof(value)
+
+
+class SharedCache:
+    """Thread-safe LRU keyed by hashable keys, bounded by total size."""
+
+    def __init__(self, budget_bytes: int = 256 * 1024 * 1024) -> None:
+        self.budget_bytes = budget_bytes
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> Any:
+        size = sizeof(value) if size is None else size
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._sizes[key]
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self._bytes += size
+            # Evict least recently used, but always keep the newest entry
+            while len(self._entries) > 1 and self._bytes > self.budget_bytes:
+                old, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(old)
+                self.evictions += 1
+        return value
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        return value if value is not None else self.put(key, build())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "budget": self.budget_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+
+def cached_query(
+    repository: Any,
+    cscs: Optional[Sequence[str]] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    include_text: bool = False,
+) -> Any:
+    """``repository.query`` shared across sessions, keyed by data version and filters."""
+    key = ("query", repository.version(), tuple(sorted(cscs or [])), start, end, include_text)
+    return get_shared_cache().get_or_build(key, lambda: repository.query(cscs, start, end, include_text))
+
+
+def session_footprint(state: Any) -> int:
+    """Bytes held privately by one session's state (excluding shared cache entries)."""
+    return sum(sizeof(value) for value in dict(state).values())
+
+
+_cache: Optional[SharedCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> SharedCache:
+    """Return the process-wide cache, sized from ``SURVEY_CACHE_BUDGET_MB`` (default 256)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                budget_mb = float(_get_secret("SURVEY_CACHE_BUDGET_MB", "256") or 256)
+            except ValueError:
+                budget_mb = 256.0
+            _cache = SharedCache(int(budget_mb * 1024 * 1024))
+        return _cache
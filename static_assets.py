@@ -0,0 +1,362 @@
+"""Build and inject the pages' stylesheets as hashed static files.
+
+Each page's CSS lives in ``styles/<page>.css``. The build splits them into
+one minified ``theme`` sheet (every declaration the pages all share, same
+selector and media query) plus a small per-page delta, written to
+``static/<name>.<hash>.css`` and listed in ``static/manifest.json``. The
+build fails if theme + delta would resolve any selector differently from the
+page's own sheet under some combination of its media queries. Streamlit
+serves that folder at ``app/static/`` (``server.enableStaticServing``), so a
+page only sends two ``<link>`` tags per rerun and browsers keep the files; a
+changed stylesheet gets a new name instead of a stale cache hit. Streamlit
+releases before 1.56 serve ``.css`` as ``text/plain``; on those, and with
+static serving off, ``inject`` falls back to an inline ``<style>`` block.
+
+Run ``python static_assets.py`` to build ahead of time. Pages also rebuild on
+first use when the sources are newer than the manifest.
+"""
+
+from collections import Counter
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import os
+import re
+import threading
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(ROOT, "styles")
+STATIC_DIR = os.path.join(ROOT, "static")
+MANIFEST = "manifest.json"
+PAGES = ("home", "survey", "results")
+THEME = "theme"
+LOW_POWER = "low_power"
+# Low-power rules applied by the browser itself when the OS asks for less motion
+REDUCED_MOTION = "reduced_motion"
+_REDUCED_MOTION_QUERY = "@media (prefers-reduced-motion: reduce)"
+
+# (media query or "", selector or @-rule prelude, declarations / block body)
+Rule = Tuple[str, str, List[str]]
+
+# Before Streamlit 1.56 the static file handler sends everything but images,
+# fonts, PDF, XML and JSON as text/plain with nosniff, which browsers refuse to
+# use as a stylesheet or a video; those files are only linked from 1.56 on
+TYPED_STATIC_SINCE = (1, 56)
+_ALWAYS_TYPED = (".jpg", ".jpeg", ".png", ".gif", ".webp")
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_SPACE = re.compile(r"\s+")
+
+
+def _compact(text: str) -> str:
+    text = _SPACE.sub(" ", text).strip()
+    return re.sub(r"\s*([{};,>])\s*", r"\1", text)
+
+
+def _declarations(body: str) -> List[str]:
+    out = []
+    for part in body.split(";"):
+        name, sep, value = part.partition(":")
+        if sep and name.strip():
+            out.append(f"{name.strip()}:{_SPACE.sub(' ', value).strip()}")
+    return out
+
+
+def parse(css: str) -> List[Rule]:
+    """Flatten a stylesheet into rules; @media blocks are unwrapped, other @-rules kept whole."""
+    css = _COMMENT.sub("", css)
+    rules: List[Rule] = []
+
+    def walk(text: str, media: str) -> None:
+        pos = 0
+        while True:
+            open_at = text.find("{", pos)
+            if open_at == -1:
+                return
+            prelude = _SPACE.sub(" ", text[pos:open_at]).strip()
+            depth, close_at = 1, open_at + 1
+            while depth:
+                depth += {"{": 1, "}": -1}.get(text[close_at], 0)
+                close_at += 1
+            body = text[open_at + 1:close_at - 1]
+            if prelude.startswith("@media"):
+                walk(body, prelude)
+            elif prelude.startswith("@"):
+                rules.append((media, prelude, [_compact(body)]))
+            else:
+                rules.append((media, re.sub(r"\s*,\s*", ",", prelude), _declarations(body)))
+            pos = close_at
+
+    walk(css, "")
+    return rules
+
+
+def render(rules: List[Rule]) -> str:
+    """Minified CSS for ``rules``, regrouping consecutive rules that share a media query."""
+    out: List[str] = []
+    current = ""
+    for media, selector, body in rules:
+        if media != current:
+            if current:
+                out.append("}")
+            if media:
+                out.append(_compact(media) + "{")
+            current = media
+        out.append(f"{selector}{{{';'.join(body)}}}" if body else "")
+    if current:
+        out.append("}")
+    return "".join(out)
+
+
+def _related(a: str, b: str) -> bool:
+    """Whether properties ``a`` and ``b`` can override each other (same, or shorthand and longhand)."""
+    return a == b or a.startswith(b + "-") or b.startswith(a + "-")
+
+
+def split_shared(sheets: Dict[str, List[Rule]]) -> Tuple[List[Rule], Dict[str, List[Rule]]]:
+    """Pull what every sheet declares into a shared list; return it and the per-sheet deltas.
+
+    A property set by every sheet for the same selector and media query is
+    shared with its most common value; sheets using another value keep theirs
+    in their delta, which loads later and so still wins. ``!important`` and
+    repeated (fallback) declarations are never shared, nor is a property that
+    a delta still sets for the same selector under another media query.
+    """
+    def declared(rules: List[Rule]) -> Dict[Tuple[str, str], List[str]]:
+        merged: Dict[Tuple[str, str], List[str]] = {}
+        for media, selector, body in rules:
+            merged.setdefault((media, selector), []).extend(body)
+        return merged
+
+    per_sheet = [declared(rules) for rules in sheets.values()]
+    shared: List[Rule] = []
+    common: Dict[Tuple[str, str], Dict[str, str]] = {}
+    for key, body in per_sheet[0].items():
+        if key[1].startswith("@"):
+            if all(other.get(key) == body for other in per_sheet):
+                common[key] = {"": body[0]}
+            continue
+        values: Dict[str, List[str]] = {}
+        for other in per_sheet:
+            props = [d.partition(":") for d in other.get(key, ())]
+            counts = Counter(name for name, _, _ in props)
+            for name, _, value in props:
+                if counts[name] == 1 and "!important" not in value:
+                    values.setdefault(name, []).append(value)
+        chosen = {
+            name: Counter(found).most_common(1)[0][0]
+            for name, found in values.items()
+            if len(found) == len(per_sheet)
+        }
+        if chosen:
+            common[key] = chosen
+
+    # Sharing moves a declaration ahead of whatever the page keeps in its delta.
+    # That is only safe when nothing left in a delta for the same selector sets
+    # the same property under another media query, or a shorthand/longhand of
+    # it (background vs background-size); unshare until no such pair is left.
+    while True:
+        left: Dict[str, set] = {}
+        for declarations in per_sheet:
+            for (media, selector), body in declarations.items():
+                keep = common.get((media, selector), {})
+                for d in body:
+                    name, _, value = d.partition(":")
+                    if keep.get(name) != value:
+                        left.setdefault(selector, set()).add((media, name))
+        clashes = [
+            (key, name)
+            for key, chosen in common.items()
+            if not key[1].startswith("@")
+            for name in chosen
+            if any(
+                _related(name, other) and not (other_media == key[0] and other == name)
+                for other_media, other in left.get(key[1], ())
+            )
+        ]
+        if not clashes:
+            break
+        for key, name in clashes:
+            del common[key][name]
+    for key in [k for k, chosen in common.items() if not chosen]:
+        del common[key]
+    for key, body in per_sheet[0].items():
+        if key in common:
+            if not key[1].startswith("@"):
+                body = [f"{n}:{v}" for n, v in common[key].items()]
+            shared.append((key[0], key[1], body))
+
+    deltas: Dict[str, List[Rule]] = {}
+    for name, rules in sheets.items():
+        delta = []
+        for media, selector, body in rules:
+            keep = common.get((media, selector), {})
+            if selector.startswith("@"):
+                rest = [] if keep else body
+            else:
+                rest = [d for d in body if keep.get(d.partition(":")[0]) != d.partition(":")[2]]
+            if rest:
+                delta.append((media, selector, rest))
+        deltas[name] = delta
+    return shared, deltas
+
+
+def effective(rules: List[Rule], active: Iterable[str] = ()) -> Dict[str, Dict[str, str]]:
+    """Winning declarations per selector when the media queries in ``active`` match.
+
+    Later declarations win unless the earlier one is ``!important``, and a
+    shorthand resets the longhands set before it.
+    """
+    active = set(active)
+    out: Dict[str, Dict[str, str]] = {}
+    for media, selector, body in rules:
+        if media and media not in active:
+            continue
+        if selector.startswith("@"):
+            out[selector] = {"": body[0]}
+            continue
+        props = out.setdefault(selector, {})
+        for d in body:
+            name, _, value = d.partition(":")
+            if "!important" in props.get(name, "") and "!important" not in value:
+                continue
+            for longhand in [p for p in props if p.startswith(name + "-") and "!important" not in props[p]]:
+                del props[longhand]
+            props[name] = value
+    return out
+
+
+def check_split(sheets: Dict[str, List[Rule]], shared: List[Rule], deltas: Dict[str, List[Rule]]) -> List[str]:
+    """Differences between each sheet and theme + its delta, for every combination of media queries."""
+    queries = sorted({media for rules in sheets.values() for media, _, _ in rules if media})
+    problems = []
+    for size in range(len(queries) + 1):
+        for active in combinations(queries, size):
+            for page, rules in sheets.items():
+                before = effective(rules, active)
+                after = effective(shared + deltas[page], active)
+                for selector in sorted(set(before) | set(after)):
+                    if before.get(selector, {}) != after.get(selector, {}):
+                        where = " and ".join(active) or "no media query"
+                        problems.append(f"{page}: {selector} differs with {where}")
+    return problems
+
+
+def _write(path: str, data: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+def build(source_dir: str = SOURCE_DIR, static_dir: str = STATIC_DIR) -> Dict[str, str]:
+    """Write the hashed theme and page sheets plus the manifest; returns name -> file name."""
+    sheets = {}
+    for page in PAGES:
+        with open(os.path.join(source_dir, f"{page}.css"), encoding="utf-8") as fh:
+            sheets[page] = parse(fh.read())
+    shared, deltas = split_shared(sheets)
+    problems = check_split(sheets, shared, deltas)
+    if problems:
+        raise ValueError("Shared theme changes the pages' styles:\n" + "\n".join(problems))
+    with open(os.path.join(source_dir, f"{LOW_POWER}.css"), encoding="utf-8") as fh:
+        low_power = parse(fh.read())
+    outputs = {
+        THEME: render(shared),
+        **{page: render(rules) for page, rules in deltas.items()},
+        LOW_POWER: render(low_power),
+        REDUCED_MOTION: render([(_REDUCED_MOTION_QUERY, selector, body) for _, selector, body in low_power]),
+    }
+
+    os.makedirs(static_dir, exist_ok=True)
+    manifest = {}
+    for name, css in outputs.items():
+        digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:10]
+        manifest[name] = f"{name}.{digest}.css"
+        target = os.path.join(static_dir, manifest[name])
+        if not os.path.exists(target):
+            _write(target, css)
+    _write(os.path.join(static_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True))
+    # Drop sheets from earlier builds
+    current = set(manifest.values())
+    for entry in os.listdir(static_dir):
+        if re.fullmatch(r"[a-z_]+\.[0-9a-f]{10}\.css", entry) and entry not in current:
+            os.remove(os.path.join(static_dir, entry))
+    return manifest
+
+
+def _stale(source_dir: str, static_dir: str) -> bool:
+    try:
+        built = os.path.getmtime(os.path.join(static_dir, MANIFEST))
+    except OSError:
+        return True
+    sources = PAGES + (LOW_POWER,)
+    return any(os.path.getmtime(os.path.join(source_dir, f"{name}.css")) > built for name in sources)
+
+
+_manifest: Optional[Dict[str, str]] = None
+_manifest_lock = threading.Lock()
+
+
+def get_manifest() -> Dict[str, str]:
+    """The current manifest, building the sheets first if they are missing or out of date."""
+    global _manifest
+    with _manifest_lock:
+        if _manifest is None:
+            if _stale(SOURCE_DIR, STATIC_DIR):
+                _manifest = build()
+            else:
+                with open(os.path.join(STATIC_DIR, MANIFEST), encoding="utf-8") as fh:
+                    _manifest = json.load(fh)
+        return _manifest
+
+
+def _streamlit_version() -> Tuple[int, ...]:
+    import streamlit as st
+
+    return tuple(int(part) for part in re.findall(r"\d+", st.__version__)[:2])
+
+
+def serves_static(filename: str) -> bool:
+    """True when ``app/static/<filename>`` reaches the browser with its real Content-Type."""
+    import streamlit as st
+
+    if not st.get_option("server.enableStaticServing"):
+        return False
+    return filename.lower().endswith(_ALWAYS_TYPED) or _streamlit_version() >= TYPED_STATIC_SINCE
+
+
+def inject(page: str) -> None:
+    """Link the theme, ``page`` and render-profile stylesheets (inline them if they cannot be served)."""
+    import streamlit as st
+
+    import render_profile
+
+    profile = render_profile.current()
+    extra = LOW_POWER if profile == render_profile.LOW else REDUCED_MOTION
+    try:
+        manifest = get_manifest()
+    except (OSError, ValueError) as e:
+        print("Could not build stylesheets:", e)
+        manifest = None
+    if manifest is not None and serves_static(manifest[THEME]):
+        links = "".join(f'<link rel="stylesheet" href="app/static/{manifest[n]}">' for n in (THEME, page, extra))
+        st.markdown(links, unsafe_allow_html=True)
+    else:
+        rules = []
+        for name in (page, LOW_POWER):
+            with open(os.path.join(SOURCE_DIR, f"{name}.css"), encoding="utf-8") as fh:
+                rules.append(parse(fh.read()))
+        page_rules, low_power = rules
+        if extra == REDUCED_MOTION:
+            low_power = [(_REDUCED_MOTION_QUERY, selector, body) for _, selector, body in low_power]
+        st.markdown(f"<style>{render(page_rules + low_power)}</style>", unsafe_allow_html=True)
+    render_profile.frame_probe(profile)
+
+
+if __name__ == "__main__":
+    built = build()
+    for name, filename in sorted(built.items()):
+        size = os.path.getsize(os.path.join(STATIC_DIR, filename))
+        print(f"{filename:32} {size:6,} bytes")
@@ -0,0 +1,151 @@
+"""Append-only persistence for survey submissions.
+
+Each submission is written as a single CSV row at the end of the master file,
+so the cost of a submit no longer depends on how many responses came before it.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import csv
+import io
+import os
+import threading
+import time
+
+from survey_schema import get_schema
+from utils import _get_secret
+
+# Master files (everything writes here)
+CSV_FILE = "Updated_Training_Feedback_Survey_Template.csv"
+EXCEL_FILE = "Updated_Training_Feedback_Survey_Template.xlsx"
+
+# Column lists are compiled from survey_schema.json
+_SCHEMA = get_schema()
+
+# Canonical column order for a new master file
+SUBMISSION_COLUMNS: List[str] = list(_SCHEMA.columns)
+
+# Audit answers are stored as a Yes/No flag plus a separate details column
+AUDIT_COLUMNS: Dict[str, str] = dict(_SCHEMA.audit_columns)
+
+# Closed-vocabulary answers (kept as pandas categoricals in memory)
+CATEGORICAL_COLUMNS: List[str] = list(_SCHEMA.categorical_columns)
+
+# Slider answers: 1-10 confidence per section and the 1-5 survey rating
+RATING_COLUMNS: List[str] = list(_SCHEMA.rating_columns)
+
+# Open-text answers, only loaded into memory when a view needs them
+TEXT_COLUMNS: List[str] = list(_SCHEMA.text_columns)
+
+# fsync policies: "always" (every append), "interval" (at most every
+# SURVEY_FSYNC_INTERVAL seconds per file) or "never" (leave it to the OS).
+FSYNC_POLICIES = ("always", "interval", "never")
+
+_write_lock = threading.Lock()
+_last_fsync: Dict[str, float] = {}
+
+
+def _fsync_policy() -> str:
+    policy = (_get_secret("SURVEY_FSYNC_POLICY", "always") or "always").lower()
+    return policy if policy in FSYNC_POLICIES else "always"
+
+
+def _fsync_interval() -> float:
+    try:
+        return float(_get_secret("SURVEY_FSYNC_INTERVAL", "1.0") or 1.0)
+    except ValueError:
+        return 1.0
+
+
+def _maybe_fsync(fh: Any, filename: str, policy: str) -> None:
+    if policy == "never":
+        return
+    now = time.monotonic()
+    if policy == "interval" and now - _last_fsync.get(filename, 0.0) < _fsync_interval():
+        return
+    fh.flush()
+    os.fsync(fh.fileno())
+    _last_fsync[filename] = now
+
+
+def split_audit_answer(value: Any) -> Tuple[str, str]:
+    """Split a legacy ``"{Yes|No} - {details}"`` audit string into (flag, details).
+
+    Only the first separator counts, so details may themselves contain " - ".
+    """
+    text = "" if value is None or value != value else str(value)
+    flag, _, details = text.partition(" - ")
+    return flag.strip(), details.strip()
+
+
+def normalize_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Return ``record`` with any legacy combined audit answers split into flag + details."""
+    out = dict(record)
+    for flag_col, details_col in AUDIT_COLUMNS.items():
+        value = out.get(flag_col)
+        if details_col not in out and isinstance(value, str) and " - " in value:
+            out[flag_col], out[details_col] = split_audit_answer(value)
+    return out
+
+
+def _encode_rows(rows: List[List[Any]]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def read_header(filename: str) -> List[str]:
+    """Return the header row of a CSV file, or an empty list if it has none."""
+    try:
+        with open(filename, "r", newline="", encoding="utf-8") as fh:
+            first = fh.readline()
+    except FileNotFoundError:
+        return []
+    return next(csv.reader([first]), []) if first.strip() else []
+
+
+def append_submissions(
+    records: List[Dict[str, Any]],
+    filename: str = CSV_FILE,
+    columns: Optional[List[str]] = None,
+    fsync_policy: Optional[str] = None,
+) -> str:
+    """Append submissions to the end of a CSV file without rereading it.
+
+    Rows follow the file's existing header so older masters keep lining up;
+    a missing or empty file is started with ``columns`` (the canonical order).
+    Keys that are not in the header are ignored and missing ones are blank.
+    """
+    columns = columns or SUBMISSION_COLUMNS
+    policy = fsync_policy or _fsync_policy()
+
+    with _write_lock:
+        with open(filename, "a+b") as fh:
+            fh.seek(0, os.SEEK_END)
+            size = fh.tell()
+            header = read_header(filename) if size else []
+            prefix = b""
+            if not header:
+                header = list(columns)
+                prefix = _encode_rows([header])
+            else:
+                # Never glue a new row onto a final line without a newline
+                fh.seek(size - 1)
+                if fh.read(1) not in (b"\n", b"\r"):
+                    prefix = b"\n"
+
+            records = [normalize_record(r) for r in records]
+            rows = [["" if r.get(c) is None else r.get(c) for c in header] for r in records]
+            fh.write(prefix + _encode_rows(rows))
+            _maybe_fsync(fh, filename, policy)
+    return filename
+
+
+def append_submission(
+    record: Dict[str, Any],
+    filename: str = CSV_FILE,
+    columns: Optional[List[str]] = None,
+    fsync_policy: Optional[str] = None,
+) -> str:
+    """Append a single submission (dict) as one CSV row."""
+    return append_submissions([record], filename, columns, fsync_policy)
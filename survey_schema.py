@@ -0,0 +1,247 @@
+"""The survey definition, compiled once per process from ``survey_schema.json``.
+
+The JSON file is the single description of the survey: respondent fields,
+training sections (expanded from a shared question template), and the
+onboarding and survey-experience questions with their follow-ups. Compiling
+it produces what the rest of the app used to hard-code separately: the
+canonical column order, pandas dtypes, display labels, rating scales, the
+Yes/No flag -> details pairs and, per aggregation plan, the columns it
+applies to. The Survey page renders its widgets from it and the storage,
+aggregate and Results code read the same compiled lists, so none of them
+derive names or labels from column strings on a rerun.
+
+``python survey_schema.py`` prints the compiled schema and checks the master
+CSV header against it (``--write-header`` fixes a header-only master).
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import threading
+
+SCHEMA_FILE = Path(__file__).resolve().parent / "survey_schema.json"
+
+KINDS = ("id", "timestamp", "short_text", "text", "choice", "rating")
+# Aggregation plans: "rating" keeps count/sum/histogram, "options" and "flag"
+# count answers ("flag" reports blanks as "No Response"), "text" answers are
+# indexed and analysed for themes instead of being kept in the main frame
+PLANS = ("rating", "options", "flag", "text")
+_DTYPES = {
+    "id": "object",
+    "timestamp": "datetime64[ns]",
+    "short_text": "object",
+    "text": "object",
+    "choice": "category",
+    "rating": "Int8",
+}
+
+
+@dataclass(frozen=True)
+class Question:
+    column: str
+    kind: str
+    label: str
+    prompt: str = ""
+    options: Tuple[str, ...] = ()
+    scale: Optional[Tuple[int, int]] = None  # (min, max) for ratings
+    default: Any = ""
+    plan: Optional[str] = None
+    # (controlling column, answers that show this question)
+    show_if: Optional[Tuple[str, Tuple[str, ...]]] = None
+
+
+@dataclass(frozen=True)
+class Section:
+    key: str
+    label: str
+    title: str
+    icon: str
+    training: bool
+    questions: Tuple[Question, ...]
+
+
+@dataclass(frozen=True)
+class SurveySchema:
+    version: int
+    respondent: Tuple[Question, ...]
+    sections: Tuple[Section, ...]
+    columns: Tuple[str, ...]
+    questions: Dict[str, Question]
+    dtypes: Dict[str, str]
+    labels: Dict[str, str]
+    plans: Dict[str, Tuple[str, ...]]
+    categorical_columns: Tuple[str, ...]
+    rating_columns: Tuple[str, ...]
+    text_columns: Tuple[str, ...]
+    # Yes/No flag column -> the details column shown when it is "Yes"
+    audit_columns: Dict[str, str]
+    # training section key -> its open-text columns
+    section_text: Dict[str, Tuple[str, ...]]
+    section_of: Dict[str, Section]
+
+    @property
+    def training_sections(self) -> Tuple[Section, ...]:
+        return tuple(s for s in self.sections if s.training)
+
+    def label(self, column: str) -> str:
+        return self.labels.get(column, column)
+
+
+def _fill(value: Any, names: Dict[str, str]) -> Any:
+    return value.format(**names) if isinstance(value, str) else value
+
+
+def _question(raw: Dict[str, Any], names: Dict[str, str], lists: Dict[str, Any]) -> Question:
+    column = _fill(raw["column"], names)
+    kind = raw.get("kind")
+    if kind not in KINDS:
+        raise ValueError(f"{column}: unknown question kind {kind!r}")
+    options = tuple(lists[raw["options_from"]] if "options_from" in raw else raw.get("options", ()))
+    if kind == "choice" and not options:
+        raise ValueError(f"{column}: a choice question needs options")
+    scale = None
+    default: Any = ""
+    if kind == "rating":
+        scale = (int(raw["min"]), int(raw["max"]))
+        default = int(raw.get("default", scale[0]))
+        if not scale[0] <= default <= scale[1]:
+            raise ValueError(f"{column}: default {default} is outside {scale[0]}-{scale[1]}")
+    plan = raw.get("aggregate", {"rating": "rating", "text": "text"}.get(kind))
+    if plan is not None and plan not in PLANS:
+        raise ValueError(f"{column}: unknown aggregation plan {plan!r}")
+    show_if = None
+    if "show_if" in raw:
+        show_if = (_fill(raw["show_if"]["column"], names), tuple(raw["show_if"]["in"]))
+    return Question(
+        column=column,
+        kind=kind,
+        label=_fill(raw.get("label"), names) or column.replace("_", " "),
+        prompt=_fill(raw.get("prompt", ""), names),
+        options=options,
+        scale=scale,
+        default=default,
+        plan=plan,
+        show_if=show_if,
+    )
+
+
+def compile_schema(raw: Dict[str, Any]) -> SurveySchema:
+    """Expand templates and precompute the column lists, dtypes, labels and plans."""
+    templates = raw.get("templates", {})
+    respondent = tuple(_question(q, {}, {}) for q in raw["respondent"])
+    sections: List[Section] = []
+    for spec in raw["sections"]:
+        names = {"key": spec["key"], "label": spec["label"]}
+        template = templates[spec["template"]] if "template" in spec else {}
+        questions = template.get("questions", []) + spec.get("questions", [])
+        sections.append(Section(
+            key=spec["key"],
+            label=spec["label"],
+            title=_fill(spec.get("title") or template.get("title") or spec["label"], names),
+            icon=spec.get("icon", ""),
+            training=spec.get("template") == "training",
+            questions=tuple(_question(q, names, spec) for q in questions),
+        ))
+
+    all_questions = [*respondent, *(q for s in sections for q in s.questions)]
+    section_of = {q.column: s for s in sections for q in s.questions}
+    questions: Dict[str, Question] = {}
+    for q in all_questions:
+        if q.column in questions:
+            raise ValueError(f"Column {q.column} is defined twice")
+        if q.show_if and q.show_if[0] not in questions:
+            raise ValueError(f"{q.column} depends on {q.show_if[0]}, which must come before it")
+        # Sections rerun on their own, so a follow-up must live with its question
+        if q.show_if and section_of.get(q.show_if[0]) is not section_of.get(q.column):
+            raise ValueError(f"{q.column} depends on {q.show_if[0]} from another section")
+        questions[q.column] = q
+
+    dtypes = {q.column: _DTYPES[q.kind] for q in all_questions}
+    for spec in raw["respondent"]:
+        if "dtype" in spec:
+            dtypes[spec["column"]] = spec["dtype"]
+    plans = {plan: tuple(q.column for q in all_questions if q.plan == plan) for plan in PLANS}
+    audit = {
+        q.show_if[0]: q.column
+        for q in all_questions
+        if q.show_if and questions[q.show_if[0]].plan == "flag"
+    }
+    return SurveySchema(
+        version=int(raw.get("version", 1)),
+        respondent=respondent,
+        sections=tuple(sections),
+        columns=tuple(questions),
+        questions=questions,
+        dtypes=dtypes,
+        labels={q.column: q.label for q in all_questions},
+        plans=plans,
+        categorical_columns=tuple(c for c, t in dtypes.items() if t == "category"),
+        rating_columns=plans["rating"],
+        text_columns=plans["text"],
+        audit_columns=audit,
+        section_text={
+            s.key: tuple(q.column for q in s.questions if q.plan == "text") for s in sections if s.training
+        },
+        section_of=section_of,
+    )
+
+
+def load(path: Path = SCHEMA_FILE) -> SurveySchema:
+    with open(path, encoding="utf-8") as fh:
+        return compile_schema(json.load(fh))
+
+
+_schema: Optional[SurveySchema] = None
+_schema_lock = threading.Lock()
+
+
+def get_schema() -> SurveySchema:
+    """Return the process-wide compiled schema."""
+    global _schema
+    with _schema_lock:
+        if _schema is None:
+            _schema = load()
+        return _schema
+
+
+if __name__ == "__main__":
+    import argparse
+    import csv
+    import os
+
+    import storage
+
+    parser = argparse.ArgumentParser(description="Show the compiled survey schema and check the master CSV header.")
+    parser.add_argument("--write-header", action="store_true",
+                        help="rewrite the master CSV header in schema order if it has no responses yet")
+    args = parser.parse_args()
+
+    schema = get_schema()
+    print(f"version {schema.version}: {len(schema.columns)} columns in {len(schema.sections)} sections")
+    for plan, columns in schema.plans.items():
+        print(f"{plan:8} {len(columns):3}  {', '.join(schema.label(c) for c in columns)}")
+
+    header = storage.read_header(storage.CSV_FILE)
+    if header == list(schema.columns):
+        print(f"{storage.CSV_FILE}: header matches the schema")
+    elif not header:
+        print(f"{storage.CSV_FILE}: no header yet (the first submission writes it)")
+    else:
+        missing = [c for c in schema.columns if c not in header]
+        extra = [c for c in header if c not in schema.questions]
+        if missing or extra:
+            print(f"{storage.CSV_FILE}: missing {missing or 'nothing'}; not in the schema: {extra or 'nothing'}")
+        else:
+            print(f"{storage.CSV_FILE}: same columns as the schema in a different order")
+        if args.write_header:
+            with open(storage.CSV_FILE, encoding="utf-8") as fh:
+                has_rows = len(fh.read().splitlines()) > 1
+            if has_rows:
+                print("Not rewriting: the file already holds responses (new rows follow its own header)")
+            else:
+                tmp = storage.CSV_FILE + ".tmp"
+                with open(tmp, "w", newline="", encoding="utf-8") as fh:
+                    csv.writer(fh, lineterminator="\n").writerow(schema.columns)
+                os.replace(tmp, storage.CSV_FILE)
+                print("Header rewritten in schema order")
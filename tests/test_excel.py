@@ -0,0 +1,80 @@
+"""Excel writers: written rows must reload cleanly through openpyxl."""
+
+import csv
+import io
+import math
+
+from openpyxl import load_workbook
+import pandas as pd
+
+from exports import _write_xlsx
+from materializer import ExcelMaterializer
+from utils import write_excel_stream
+
+
+def _rows(path, sheet="responses"):
+    wb = load_workbook(path)
+    return [list(row) for row in wb[sheet].iter_rows(values_only=True)]
+
+
+def test_stream_writes_sanitized_rows(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    write_excel_stream(
+        [
+            {"id": "001", "score": 3},
+            {"id": "002", "score": 4.5},
+            {"score": math.inf, "id": "x\x01y"},
+            {"id": "003", "score": math.nan},
+        ],
+        path,
+        ["id", "score"],
+    )
+
+    assert _rows(path) == [
+        ["id", "score"],
+        ["001", 3],
+        ["002", 4.5],
+        ["xy", "inf"],
+        ["003", None],
+    ]
+
+
+def test_stream_header_from_first_record(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    write_excel_stream([{"a": 1, "b": "two"}, {"b": "three"}], path, sheet_name="first")
+
+    assert _rows(path, "first") == [["a", "b"], [1, "two"], [None, "three"]]
+
+
+def test_materializer_picks_up_appended_csv_rows(tmp_path):
+    csv_file = tmp_path / "master.csv"
+    header = ["SubmissionID", "User_Name", "Title_Class_Confidence"]
+    with open(csv_file, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(header)
+        writer.writerow(["0001", "1_000", "7"])
+    materializer = ExcelMaterializer(str(csv_file), str(tmp_path / "master.xlsx"))
+    assert materializer.materialize() == 1
+    assert materializer.materialize() == 0
+
+    with open(csv_file, "a", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["0002", "inf", "inf"])
+        writer.writerow(["0003", "Ann", ""])
+    assert materializer.is_stale()
+    assert materializer.materialize() == 3
+
+    assert _rows(materializer.excel_file) == [
+        header,
+        ["0001", "1_000", 7],
+        ["0002", "inf", "inf"],
+        ["0003", "Ann", None],
+    ]
+    assert not materializer.is_stale()
+
+
+def test_xlsx_export_sanitizes_cells():
+    df = pd.DataFrame({"comment": ["ok", "bell\x07"], "score": [math.inf, math.nan]})
+    data = _write_xlsx(df, lambda progress: None)
+
+    assert _rows(io.BytesIO(data)) == [["comment", "score"], ["ok", "inf"], ["bell", None]]
@@ -0,0 +1,334 @@
+"""Theme extraction over the open-text answers, run outside the page rerun.
+
+For every submission and training section the Challenges, Expected
+Improvements and audit-details answers are tokenized into stem counts and
+given a lexicon-based sentiment score. Results are cached per SubmissionID
+together with a hash of the section text, so a refresh only analyses new or
+changed rows. They are also summed into (section, CSC, day) buckets, from
+which the Results page reads TF-IDF top terms and average sentiment.
+
+Refreshes run on a background thread (requested after each journal commit
+and whenever the page asks), and results are saved to ``ANALYTICS_FILE``.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import atexit
+import hashlib
+import math
+import os
+import pickle
+import re
+import threading
+import time
+
+from repository import SurveyRepository, get_repository
+from survey_schema import get_schema
+from text_index import day_number, stem, tokenize
+
+ANALYTICS_FILE = "survey_text_analytics.pkl"
+_FORMAT = 2
+_SAVE_INTERVAL = 30.0
+
+_SCHEMA = get_schema()
+# Training section key -> display label, and the open-text answers analysed per section
+SECTION_LABELS: Dict[str, str] = {s.key: s.label for s in _SCHEMA.training_sections}
+SECTION_COLUMNS: Dict[str, Tuple[str, ...]] = dict(_SCHEMA.section_text)
+
+POSITIVE = frozenset("""
+good great helpful help helps easy easier clear confident confidence comfortable improve improved improvement
+better best excellent effective efficient smooth supportive support supported useful valuable enjoy enjoyed
+understand understood organized thorough patient friendly quick fast prepared success successful love like
+""".split())
+NEGATIVE = frozenset("""
+bad difficult hard confusing confused unclear slow slower long lack lacking missing wrong error errors mistake
+mistakes issue issues problem problems frustrating frustrated overwhelming overwhelmed stressful stress rushed
+impatient complicated inconsistent outdated broken fail failed failure poor worse worst boring insufficient
+""".split())
+NEGATIONS = frozenset({"not", "no", "never", "isn't", "wasn't", "don't", "didn't", "doesn't", "can't", "cannot", "hardly"})
+
+BucketKey = Tuple[str, Optional[str], int]  # (section, CSC, day number)
+
+_WORD = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+
+def sentiment(text: str) -> Tuple[int, int]:
+    """(positive, negative) lexicon hits, flipping a word preceded by a negation."""
+    words = _WORD.findall(text.lower())
+    pos = neg = 0
+    for i, word in enumerate(words):
+        negated = i > 0 and words[i - 1] in NEGATIONS
+        if word in POSITIVE:
+            pos, neg = (pos, neg + 1) if negated else (pos + 1, neg)
+        elif word in NEGATIVE:
+            pos, neg = (pos + 1, neg) if negated else (pos, neg + 1)
+    return pos, neg
+
+
+@dataclass
+class SectionResult:
+    digest: str
+    csc: Optional[str]
+    day: int
+    terms: Counter
+    words: Counter  # surface forms, for showing a stem as a real word
+    positive: int
+    negative: int
+
+    @property
+    def score(self) -> float:
+        """Sentiment in [-1, 1]; 0 when no lexicon words were found."""
+        hits = self.positive + self.negative
+        return (self.positive - self.negative) / hits if hits else 0.0
+
+
+@dataclass
+class ThemeBucket:
+    documents: int = 0
+    sentiment_sum: float = 0.0
+    terms: Counter = field(default_factory=Counter)
+
+
+def analyse(text: str, csc: Optional[str], day: int, digest: str) -> SectionResult:
+    words = Counter(tokenize(text))
+    terms: Counter = Counter()
+    for word, count in words.items():
+        terms[stem(word)] += count
+    pos, neg = sentiment(text)
+    return SectionResult(digest, csc, day, terms, words, pos, neg)
+
+
+class TextAnalytics:
+    """Per-submission analysis cache plus the (section, CSC, day) theme buckets."""
+
+    def __init__(self) -> None:
+        # (SubmissionID, section) -> result
+        self.results: Dict[Tuple[str, str], SectionResult] = {}
+        # section -> stem -> number of submissions using it (for IDF)
+        self.doc_freq: Dict[str, Counter] = {s: Counter() for s in SECTION_LABELS}
+        self.section_docs: Counter = Counter()
+        self.buckets: Dict[BucketKey, ThemeBucket] = {}
+        # stem -> surface word -> uses, derived from ``results`` like the buckets
+        self.surface: Dict[str, Counter] = {}
+        self._cursor: Any = None
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._dirty = False
+        self._last_save = 0.0
+        self._save_lock = threading.Lock()
+
+    # ------------------------------------------------------------ building
+    def _apply(self, section: str, result: SectionResult, sign: int) -> None:
+        bucket = self.buckets.setdefault((section, result.csc, result.day), ThemeBucket())
+        bucket.documents += sign
+        self.section_docs[section] += sign
+        bucket.sentiment_sum += sign * result.score
+        for word, count in result.words.items():
+            self.surface.setdefault(stem(word), Counter())[word] += sign * count
+        if sign > 0:
+            bucket.terms.update(result.terms)
+            self.doc_freq[section].update(result.terms.keys())
+        else:
+            bucket.terms.subtract(result.terms)
+            self.doc_freq[section].subtract(result.terms.keys())
+
+    def add_rows(self, df: Any) -> int:
+        """Analyse new or changed section answers in ``df``; returns how many were (re)analysed."""
+        if df.empty or "SubmissionID" not in df.columns:
+            return 0
+        ids = df["SubmissionID"].astype(str).tolist()
+        cscs = df["CSC"].astype(object).tolist() if "CSC" in df.columns else [None] * len(df)
+        days = df["Timestamp"].tolist() if "Timestamp" in df.columns else [None] * len(df)
+        analysed = 0
+        for section in SECTION_LABELS:
+            columns = [c for c in SECTION_COLUMNS[section] if c in df.columns]
+            if not columns:
+                continue
+            texts = df[columns].astype(object).where(df[columns].notna(), "").astype(str).agg("\n".join, axis=1).tolist()
+            for row, submission_id in enumerate(ids):
+                text = texts[row].strip()
+                previous = self.results.get((submission_id, section))
+                if not text:
+                    if previous is not None:
+                        self._apply(section, self.results.pop((submission_id, section)), -1)
+                        analysed += 1
+                    continue
+                digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+                if previous is not None and previous.digest == digest:
+                    continue
+                csc = cscs[row] if isinstance(cscs[row], str) else None
+                result = analyse(text, csc, day_number(days[row]), digest)
+                if previous is not None:
+                    self._apply(section, previous, -1)
+                self.results[(submission_id, section)] = result
+                self._apply(section, result, +1)
+                analysed += 1
+        return analysed
+
+    def _drop_missing(self, present: Sequence[str]) -> int:
+        """Remove the results of submissions that are no longer stored (after a rewrite)."""
+        keep = set(present)
+        gone = [key for key in self.results if key[0] not in keep]
+        for key in gone:
+            self._apply(key[1], self.results.pop(key), -1)
+        return len(gone)
+
+    def refresh(self, repository: Optional[SurveyRepository] = None) -> int:
+        repository = repository or get_repository()
+        with self._lock:
+            rows, cursor, reset = repository.rows_since(self._cursor, include_text=True)
+            analysed = 0
+            if reset and "SubmissionID" in rows.columns:
+                analysed += self._drop_missing(rows["SubmissionID"].astype(str).tolist())
+            analysed += self.add_rows(rows)
+            self._cursor = cursor
+            if analysed:
+                self._dirty = True
+            return analysed
+
+    # ------------------------------------------------------------- reading
+    def themes(
+        self,
+        section: str,
+        cscs: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        limit: int = 10,
+    ) -> Dict[str, Any]:
+        """TF-IDF top terms and average sentiment for ``section`` within the filters.
+
+        Returns a dict with ``documents``, ``sentiment`` and ``terms`` (list of
+        (word, score)), plus ``per_csc`` rows with the same figures per CSC.
+        """
+        wanted = set(cscs) if cscs else None
+        lo = (start - date(1970, 1, 1)).days if start else None
+        hi = (end - date(1970, 1, 1)).days if end else None
+        with self._lock:
+            merged: Dict[Optional[str], ThemeBucket] = {}
+            for (s, csc, day), bucket in self.buckets.items():
+                if s != section or (wanted is not None and csc not in wanted):
+                    continue
+                if (lo is not None or hi is not None) and day < 0:
+                    continue
+                if (lo is not None and day < lo) or (hi is not None and day > hi):
+                    continue
+                total = merged.setdefault(csc, ThemeBucket())
+                total.documents += bucket.documents
+                total.sentiment_sum += bucket.sentiment_sum
+                total.terms.update(bucket.terms)
+
+            doc_freq = self.doc_freq[section]
+            n_docs = self.section_docs[section] or 1
+
+            def top(terms: Counter, n: int) -> List[Tuple[str, float]]:
+                scored = Counter({
+                    t: c * math.log(1 + n_docs / doc_freq[t]) for t, c in terms.items() if c > 0 and doc_freq[t] > 0
+                })
+                return [(self.surface[t].most_common(1)[0][0], round(v, 2)) for t, v in scored.most_common(n)]
+
+            overall = ThemeBucket()
+            per_csc = []
+            for csc, bucket in sorted(merged.items(), key=lambda kv: -kv[1].documents):
+                if bucket.documents <= 0:
+                    continue
+                overall.documents += bucket.documents
+                overall.sentiment_sum += bucket.sentiment_sum
+                overall.terms.update(bucket.terms)
+                per_csc.append({
+                    "CSC": csc or "Unknown",
+                    "Responses": bucket.documents,
+                    "Sentiment": round(bucket.sentiment_sum / bucket.documents, 2),
+                    "Top Terms": ", ".join(w for w, _ in top(bucket.terms, 3)),
+                })
+            return {
+                "documents": overall.documents,
+                "sentiment": overall.sentiment_sum / overall.documents if overall.documents else 0.0,
+                "terms": top(overall.terms, limit),
+                "per_csc": per_csc,
+            }
+
+    # --------------------------------------------------------- background
+    def request(self) -> None:
+        """Ask the background thread to analyse anything new."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                self.refresh()
+                # Pickling every result is costly, so busy periods save at most
+                # every _SAVE_INTERVAL seconds; the exit hook writes the rest
+                if self._dirty and time.monotonic() - self._last_save > _SAVE_INTERVAL:
+                    self.save()
+            except Exception as e:  # noqa: BLE001
+                print("Text analytics refresh failed:", e)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="text-analytics", daemon=True)
+            self._thread.start()
+
+    # --------------------------------------------------------- persistence
+    def save(self, path: str = ANALYTICS_FILE) -> None:
+        with self._save_lock:
+            with self._lock:
+                data = pickle.dumps((_FORMAT, self.results), protocol=pickle.HIGHEST_PROTOCOL)
+                self._dirty = False
+                self._last_save = time.monotonic()
+            tmp = path + ".tmp"
+            try:
+                with open(tmp, "wb") as fh:
+                    fh.write(data)
+                os.replace(tmp, path)
+            except OSError:
+                self._dirty = True
+                raise
+
+    @classmethod
+    def load(cls, path: str = ANALYTICS_FILE) -> "TextAnalytics":
+        """Restore cached results (rebuilding the buckets without re-running any analysis)."""
+        analytics = cls()
+        try:
+            with open(path, "rb") as fh:
+                fmt, results = pickle.load(fh)
+            if fmt != _FORMAT:
+                raise ValueError(f"saved format {fmt}, expected {_FORMAT}")
+            for (submission_id, section), result in results.items():
+                if section in analytics.doc_freq:
+                    analytics.results[(submission_id, section)] = result
+                    analytics._apply(section, result, +1)
+        except FileNotFoundError:
+            pass
+        except Exception as e:  # noqa: BLE001
+            print("Could not load the saved text analytics, rebuilding them:", e)
+            return cls()
+        return analytics
+
+
+_analytics: Optional[TextAnalytics] = None
+_analytics_lock = threading.Lock()
+
+
+def _save_on_exit() -> None:
+    if _analytics is not None and _analytics._dirty:
+        try:
+            _analytics.save()
+        except OSError as e:
+            print("Could not save text analytics:", e)
+
+
+def get_text_analytics() -> TextAnalytics:
+    """Return the process-wide analytics store and schedule a background refresh."""
+    global _analytics
+    with _analytics_lock:
+        if _analytics is None:
+            _analytics = TextAnalytics.load()
+            _analytics.start()
+            atexit.register(_save_on_exit)
+    _analytics.request()
+    return _analytics
@@ -0,0 +1,373 @@
+"""Inverted index over the open-text survey answers.
+
+Every non-empty answer in ``storage.TEXT_COLUMNS`` is one document. Answers
+are tokenized, stop-word filtered and stemmed, and each stem keeps a posting
+list of (document, term frequency) that only ever grows as submissions
+arrive. Search ranks with BM25 and is scored with numpy over the posting
+arrays, so it never goes back to the CSV. Term counts are also kept per
+(field, CSC, day) so the dashboard can show filtered term frequencies the same
+way ``aggregates`` answers its metrics.
+
+The index is saved to ``TEXT_INDEX_FILE`` from a background thread (and on
+exit) and reloaded on startup; only submissions it has not seen yet are
+tokenized, and a file that cannot be loaded is rebuilt from the master data.
+"""
+
+from array import array
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import atexit
+import heapq
+import math
+import os
+import pickle
+import re
+import threading
+import time
+
+import storage
+from repository import SurveyRepository, get_repository
+
+TEXT_INDEX_FILE = "survey_text_index.pkl"
+_FORMAT = 1
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_SAVE_INTERVAL = 30.0
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOP_WORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here hers
+him his how i if in into is it its itself just me more most my no nor not now of off on once only or other our
+ours out over own same she should so some such than that the their theirs them then there these they this those
+through to too under until up very was we were what when where which while who whom why will with would you
+your yours n/a na none nothing yes
+""".split())
+
+# Longest first; the first matching suffix is stripped
+_SUFFIXES = (
+    "ational", "ization", "fulness", "iveness", "ousness", "ations", "ation", "ments", "ment",
+    "ness", "ings", "ing", "edly", "ies", "ied", "ed", "ly", "es", "s",
+)
+
+
+def stem(word: str) -> str:
+    """Light suffix-stripping stemmer ("trainings", "trained", "training" -> "train")."""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == "s" and word.endswith(("ss", "us", "is")):
+                return word
+            base = word[: -len(suffix)]
+            if suffix in ("ies", "ied"):
+                return base + "y"
+            break
+    else:
+        base = word
+    # "stopped" -> "stop", "change"/"changes" -> "chang"
+    if len(base) > 3 and base[-1] == base[-2] and base[-1] not in "lsz":
+        base = base[:-1]
+    if len(base) > 3 and base.endswith("e"):
+        base = base[:-1]
+    return base
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased words of ``text`` without stop words (unstemmed)."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOP_WORDS and len(t) > 1]
+
+
+def day_number(value: Any) -> int:
+    """Days since 1970-01-01, or -1 when unknown."""
+    if value is None or value != value:
+        return -1
+    try:
+        return int(value.value // 86_400_000_000_000)
+    except AttributeError:
+        return -1
+
+
+class TextIndex:
+    """Append-only BM25 index; one document per (submission, open-text field)."""
+
+    def __init__(self, fields: Sequence[str] = storage.TEXT_COLUMNS) -> None:
+        self.fields: List[str] = list(fields)
+        self._field_ids = {f: i for i, f in enumerate(self.fields)}
+        # Per-document columns, indexed by document id
+        self.doc_submission: List[str] = []
+        self.doc_text: List[str] = []
+        self.doc_field = array("H")
+        self.doc_csc = array("i")
+        self.doc_day = array("i")
+        self.doc_len = array("i")
+        self.total_len = 0
+        # stem -> (document ids, term frequencies)
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        # stem -> surface form counts, for display
+        self.surface: Dict[str, Counter] = {}
+        # (field, CSC, day) -> stem counts
+        self.term_buckets: Dict[Tuple[int, int, int], Counter] = {}
+        self.cscs: List[Optional[str]] = []
+        self._csc_ids: Dict[Optional[str], int] = {}
+        self.submissions: Set[str] = set()
+        self.removed = array("b")
+
+        self._cursor: Any = None
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._last_save = 0.0
+        self._save_lock = threading.Lock()
+        self._saver: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------ building
+    def _csc_id(self, csc: Optional[str]) -> int:
+        if csc not in self._csc_ids:
+            self._csc_ids[csc] = len(self.cscs)
+            self.cscs.append(csc)
+        return self._csc_ids[csc]
+
+    def add(self, submission_id: str, field: str, text: str, csc: Optional[str] = None, day: int = -1) -> None:
+        words = tokenize(text)
+        doc_id = len(self.doc_submission)
+        field_id = self._field_ids[field]
+        csc_id = self._csc_id(csc)
+        self.doc_submission.append(submission_id)
+        self.doc_text.append(text)
+        self.doc_field.append(field_id)
+        self.doc_csc.append(csc_id)
+        self.doc_day.append(day)
+        self.doc_len.append(len(words))
+        self.removed.append(0)
+        self.total_len += len(words)
+
+        stems = Counter()
+        for word in words:
+            s = stem(word)
+            stems[s] += 1
+            self.surface.setdefault(s, Counter())[word] += 1
+        for s, tf in stems.items():
+            ids, tfs = self.postings.setdefault(s, (array("i"), array("i")))
+            ids.append(doc_id)
+            tfs.append(tf)
+        self.term_buckets.setdefault((field_id, csc_id, day), Counter()).update(stems)
+
+    def add_rows(self, df: Any) -> int:
+        """Index the open-text answers of ``df``; submissions already indexed are skipped."""
+        if df.empty or "SubmissionID" not in df.columns:
+            return 0
+        fields = [f for f in self.fields if f in df.columns]
+        ids = df["SubmissionID"].astype(str).tolist()
+        cscs = df["CSC"].astype(object).tolist() if "CSC" in df.columns else [None] * len(df)
+        days = [day_number(v) for v in df["Timestamp"]] if "Timestamp" in df.columns else [-1] * len(df)
+        columns = [df[f].astype(object).tolist() for f in fields]
+        added = 0
+        for row, submission_id in enumerate(ids):
+            if submission_id in self.submissions:
+                continue
+            self.submissions.add(submission_id)
+            csc = cscs[row] if isinstance(cscs[row], str) else None
+            for field, values in zip(fields, columns):
+                text = values[row]
+                if isinstance(text, str) and text.strip():
+                    self.add(submission_id, field, text.strip(), csc, days[row])
+                    added += 1
+        return added
+
+    def _drop_missing(self, present: Iterable[str]) -> None:
+        """Hide documents whose submission is no longer stored (after a rewrite)."""
+        gone = self.submissions - set(present)
+        if not gone:
+            return
+        for doc_id, submission_id in enumerate(self.doc_submission):
+            if submission_id in gone and not self.removed[doc_id]:
+                self.removed[doc_id] = 1
+                key = (self.doc_field[doc_id], self.doc_csc[doc_id], self.doc_day[doc_id])
+                self.term_buckets[key].subtract(stem(w) for w in tokenize(self.doc_text[doc_id]))
+        self.submissions -= gone
+
+    def refresh(self, repository: Optional[SurveyRepository] = None) -> None:
+        """Index rows stored since the last refresh."""
+        repository = repository or get_repository()
+        with self._lock:
+            rows, cursor, reset = repository.rows_since(self._cursor, include_text=True)
+            if reset and "SubmissionID" in rows.columns:
+                self._drop_missing(rows["SubmissionID"].astype(str))
+            if self.add_rows(rows):
+                self._dirty = True
+            self._cursor = cursor
+            if self._dirty and time.monotonic() - self._last_save > _SAVE_INTERVAL:
+                self._save_in_background()
+
+    # ------------------------------------------------------------ querying
+    def _allowed(
+        self,
+        fields: Optional[Sequence[str]],
+        cscs: Optional[Sequence[str]],
+        start: Optional[date],
+        end: Optional[date],
+    ) -> Any:
+        import numpy as np
+
+        allowed = np.frombuffer(self.removed, dtype=np.int8) == 0
+        if fields:
+            wanted = [self._field_ids[f] for f in fields if f in self._field_ids]
+            allowed &= np.isin(np.frombuffer(self.doc_field, dtype=np.uint16), wanted)
+        if cscs:
+            wanted = [self._csc_ids[c] for c in cscs if c in self._csc_ids]
+            allowed &= np.isin(np.frombuffer(self.doc_csc, dtype=np.int32), wanted)
+        days = np.frombuffer(self.doc_day, dtype=np.int32)
+        if start:
+            allowed &= days >= (start - date(1970, 1, 1)).days
+        if end:
+            allowed &= (days >= 0) & (days <= (end - date(1970, 1, 1)).days)
+        return allowed
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        fields: Optional[Sequence[str]] = None,
+        cscs: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> List[Dict[str, Any]]:
+        """BM25-ranked answers matching ``query`` (same filter semantics as ``repository.query``)."""
+        import numpy as np
+
+        with self._lock:
+            n_docs = len(self.doc_submission)
+            stems = {stem(w) for w in tokenize(query)}
+            if not n_docs or not stems:
+                return []
+            avg_len = self.total_len / n_docs or 1.0
+            lengths = np.frombuffer(self.doc_len, dtype=np.int32)
+            scores = np.zeros(n_docs)
+            for s in stems:
+                if s not in self.postings:
+                    continue
+                ids, tfs = self.postings[s]
+                doc_ids = np.frombuffer(ids, dtype=np.int32)
+                tf = np.frombuffer(tfs, dtype=np.int32).astype(float)
+                idf = math.log(1 + (n_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+                norm = K1 * (1 - B + B * lengths[doc_ids] / avg_len)
+                scores[doc_ids] += idf * tf * (K1 + 1) / (tf + norm)
+            scores[~self._allowed(fields, cscs, start, end)] = 0.0
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+            best = heapq.nlargest(limit, candidates.tolist(), key=lambda d: scores[d])
+            return [
+                {
+                    "Score": round(float(scores[d]), 3),
+                    "Field": self.fields[self.doc_field[d]],
+                    "CSC": self.cscs[self.doc_csc[d]],
+                    "SubmissionID": self.doc_submission[d],
+                    "Answer": self.doc_text[d],
+                }
+                for d in best
+            ]
+
+    def top_terms(
+        self,
+        field: str,
+        limit: int = 15,
+        cscs: Optional[Sequence[str]] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> List[Tuple[str, int]]:
+        """Most frequent terms in ``field`` as (display word, count), from the (field, CSC, day) buckets."""
+        with self._lock:
+            field_id = self._field_ids.get(field)
+            wanted = {self._csc_ids[c] for c in cscs if c in self._csc_ids} if cscs else None
+            lo = (start - date(1970, 1, 1)).days if start else None
+            hi = (end - date(1970, 1, 1)).days if end else None
+            totals: Counter = Counter()
+            for (f, csc_id, day), counts in self.term_buckets.items():
+                if f != field_id or (wanted is not None and csc_id not in wanted):
+                    continue
+                if (lo is not None or hi is not None) and day < 0:
+                    continue
+                if (lo is not None and day < lo) or (hi is not None and day > hi):
+                    continue
+                totals.update(counts)
+            return [(self.surface[s].most_common(1)[0][0], c) for s, c in totals.most_common(limit) if c > 0]
+
+    # --------------------------------------------------------- persistence
+    def save(self, path: str = TEXT_INDEX_FILE) -> None:
+        with self._save_lock:
+            # Searches only wait for the snapshot, not for the disk write
+            with self._lock:
+                state = {k: v for k, v in self.__dict__.items() if not k.startswith("_") or k in ("_field_ids", "_csc_ids")}
+                data = pickle.dumps((_FORMAT, state), protocol=pickle.HIGHEST_PROTOCOL)
+                self._dirty = False
+                self._last_save = time.monotonic()
+            tmp = path + ".tmp"
+            try:
+                with open(tmp, "wb") as fh:
+                    fh.write(data)
+                os.replace(tmp, path)
+            except OSError:
+                self._dirty = True
+                raise
+
+    def _save_in_background(self) -> None:
+        """Save from a short-lived thread so a refresh never waits for the pickle."""
+        if self._saver is not None and self._saver.is_alive():
+            return
+        self._last_save = time.monotonic()
+        self._saver = threading.Thread(target=self._save_quietly, name="text-index-save", daemon=True)
+        self._saver.start()
+
+    def _save_quietly(self) -> None:
+        try:
+            self.save()
+        except Exception as e:  # noqa: BLE001
+            print("Could not save the text index:", e)
+
+    @classmethod
+    def load(cls, path: str = TEXT_INDEX_FILE) -> "TextIndex":
+        """Load a saved index, or start an empty one (rebuilt on refresh) if it is missing or unusable."""
+        index = cls()
+        try:
+            with open(path, "rb") as fh:
+                fmt, state = pickle.load(fh)
+            if fmt != _FORMAT:
+                raise ValueError(f"saved format {fmt}, expected {_FORMAT}")
+            if state.get("fields") != index.fields:
+                raise ValueError("the indexed fields have changed")
+            index.__dict__.update(state)
+        except FileNotFoundError:
+            pass
+        except Exception as e:  # noqa: BLE001
+            print("Could not load the saved text index, rebuilding it:", e)
+            return cls()
+        return index
+
+
+_index: Optional[TextIndex] = None
+_index_lock = threading.Lock()
+
+
+def _save_on_exit() -> None:
+    if _index is not None and _index._dirty:
+        try:
+            _index.save()
+        except OSError as e:
+            print("Could not save the text index:", e)
+
+
+def get_text_index() -> TextIndex:
+    """Return the process-wide text index, brought up to date."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TextIndex.load()
+            atexit.register(_save_on_exit)
+    _index.refresh()
+    return _index
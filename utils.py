@@ -1,11 +1,10 @@
 """Utility helpers for exporting survey data and sending emails."""
 
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional
+import math
+import numbers
 import os
-import smtplib
-from email.mime.text import MIMEText
-
-import pandas as pd
+import re
 
 # Optional: try to read Streamlit secrets if available
 def _get_secret(name: str, default: str | None = None) -> str | None:
@@ -17,24 +16,46 @@ def _get_secret(name: str, default: str | None = None) -> str | None:
         pass
     return os.getenv(name, default)
 
-def export_to_excel(
-    data: Dict[str, Any],
-    filename: str = "survey_results.xlsx",
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _excel_value(value: Any) -> Any:
+    """A value openpyxl can store: no NaN/inf numbers, no XML control characters."""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, numbers.Real):
+        # Excel has no non-finite numbers; keep inf as text, NaN as an empty cell
+        if math.isnan(value):
+            return None
+        return value if math.isfinite(value) else str(value)
+    if isinstance(value, str):
+        return _ILLEGAL_XML.sub("", value)
+    return value
+
+
+def write_excel_stream(
+    records: Iterable[Dict[str, Any]],
+    filename: str,
+    columns: Optional[List[str]] = None,
     sheet_name: str = "responses",
 ) -> str:
-    """Append a single submission (dict) to an Excel file."""
-    new_df = pd.DataFrame([data])
+    """Write many records in one pass with a constant-memory (write-only) workbook."""
+    from openpyxl import Workbook
 
-    if os.path.exists(filename):
-        try:
-            existing = pd.read_excel(filename, sheet_name=sheet_name, engine="openpyxl")  # type: ignore
-            out_df = pd.concat([existing, new_df], ignore_index=True)
-        except ValueError:
-            out_df = new_df
-    else:
-        out_df = new_df
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    iterator = iter(records)
+    first = next(iterator, None)
+    header = list(columns or (first.keys() if first else []))
+    ws.append(header)
+    if first is not None:
+        ws.append([_excel_value(first.get(c)) for c in header])
+    for record in iterator:
+        ws.append([_excel_value(record.get(c)) for c in header])
 
-    out_df.to_excel(filename, sheet_name=sheet_name, index=False, engine="openpyxl")  # type: ignore
+    tmp = filename + ".tmp.xlsx"
+    wb.save(tmp)
+    os.replace(tmp, filename)
     return filename
 
 
@@ -62,6 +83,9 @@ def send_email(subject: str, body: str, to_emails: List[str]) -> None:
             print("SendGrid send failed, falling back to SMTP:", e)
 
     # 2) Fallback: local SMTP relay (optional; okay if it fails silently)
+    import smtplib
+    from email.mime.text import MIMEText
+
     msg = MIMEText(body)
     msg["Subject"] = subject
     msg["From"] = from_email